@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# usage :
+# $ python3 gst_log_index.py build file.log
+# $ python3 gst_log_index.py query file.log --object queue0 --start 1.5 --end 2
+# $ python3 gst_log_index.py graph file.log mygraph.dot
+#
+# Builds a sidecar index (file.log.gstidx) of a GST_DEBUG log once, so that later
+# queries and graph extractions only read the parts of the log they need.
+
+import argparse
+import array
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from gst_log_to_dot import (EVENT_RE, PREFILTER, CHUNK_SIZE, PipelineGraph, chunk_bounds, complete_lines_size,
+                            is_compressed, write_outputs)
+
+# Default log line header:
+# 0:00:01.234567890 12345 0x55d5c0 DEBUG   GST_PADS gstpad.c:2378:gst_pad_link_full:<queue0:src> message
+HEADER_RE = re.compile(
+    rb'(\d+):(\d\d):(\d\d\.\d+)\s+\d+\s+(0x[0-9a-fA-F]+)\s+([A-Z]+)\s+(\S+)\s+[^:\s]*:\d+:[^:\s]*:(?:<([^>]*)>)?'
+)
+ANSI_RE = re.compile(rb'\x1b\[[0-9;]*m')
+
+# Message types of the lines the graph is built from, by EVENT_RE group
+MESSAGE_TYPES = {'sink': 'link', 'bin': 'add', 'factory': 'create', 'uri': 'uri'}
+
+# Keys a query can filter on, in the order they are stored
+KINDS = ('thread', 'category', 'level', 'object', 'type')
+
+# Lines are grouped in blocks of about this size, the unit the index points at
+BLOCK_SIZE = 64 * 1024
+
+# Width of the timestamp buckets in seconds
+BUCKET = 1
+
+
+def parse_line(line):
+    """
+    Split the header of a log line.
+
+    Returns:
+        Tuple (timestamp, thread, level, category, object) with bytes fields, object
+        being None for lines without one, or None if the line has no header
+    """
+    if b'\x1b' in line:
+        line = ANSI_RE.sub(b'', line)
+    mobj = HEADER_RE.match(line)
+    if not mobj:
+        return None
+    hours, minutes, seconds, thread, level, category, obj = mobj.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds), thread, level, category, obj
+
+
+def message_type(line):
+    """Graph message type of a line ('link', 'add', 'create' or 'uri'), None for other lines."""
+    for needle in PREFILTER:
+        if needle in line:
+            mobj = EVENT_RE.search(line.decode(errors='replace'))
+            return MESSAGE_TYPES[mobj.lastgroup] if mobj else None
+    return None
+
+
+def index_chunk(filename, start, end, block_size=BLOCK_SIZE):
+    """
+    Index one line-aligned byte range of a log. Executed in a worker process.
+
+    Returns:
+        Tuple (blocks, postings): blocks are (offset, end, first time, last time, lines)
+        tuples, postings map (kind, key) to the sorted ids of the blocks (counted from
+        0 in this range) holding a line with that key
+    """
+    blocks = []
+    postings = {}
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            block_start = pos
+            t_first = t_last = None
+            lines = 0
+            keys = set()
+            while pos < end and pos - block_start < block_size:
+                line = f.readline()
+                if not line:
+                    break
+                pos += len(line)
+                lines += 1
+                header = parse_line(line)
+                if header is None:
+                    continue
+                timestamp, thread, level, category, obj = header
+                if t_first is None or timestamp < t_first:
+                    t_first = timestamp
+                if t_last is None or timestamp > t_last:
+                    t_last = timestamp
+                keys.add(('thread', thread))
+                keys.add(('level', level))
+                keys.add(('category', category))
+                if obj:
+                    keys.add(('object', obj))
+                    if b':' in obj:
+                        # Pads are also found under the name of their element
+                        keys.add(('object', obj.split(b':')[0]))
+                kind = message_type(line)
+                if kind:
+                    keys.add(('type', kind.encode()))
+            if pos == block_start:
+                break
+            block_id = len(blocks)
+            blocks.append((block_start, pos, t_first, t_last, lines))
+            for kind, key in keys:
+                postings.setdefault((kind, key.decode(errors='replace')), []).append(block_id)
+    return blocks, postings
+
+
+def _encode(block_ids):
+    deltas = array.array('I', (block_id - previous for previous, block_id in zip([0] + block_ids, block_ids)))
+    return zlib.compress(deltas.tobytes())
+
+
+def _decode(blob):
+    deltas = array.array('I')
+    deltas.frombytes(zlib.decompress(blob))
+    block_ids = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        block_ids.append(total)
+    return block_ids
+
+
+def _parse_time(value):
+    """Parse a time given in seconds or as [H:]MM:SS[.fff] into seconds."""
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class LogIndex:
+    """
+    Sidecar index of a GST_DEBUG log, stored in SQLite next to it (<log>.gstidx).
+
+    The log is cut into blocks of about BLOCK_SIZE bytes at line boundaries. The index
+    holds the byte range and time range of every block, the blocks of each timestamp
+    bucket, and for every thread, debug category, level, object and graph message type
+    the list of blocks with at least one such line (delta encoded, compressed). A query
+    intersects these lists and only reads the blocks left. The index records the size
+    and mtime of the log; when the log only grew, the new lines are indexed on top.
+    """
+
+    # Bump when the schema changes to rebuild older indexes
+    FORMAT_VERSION = 1
+
+    def __init__(self, log, path=None):
+        self.log = log
+        self.path = path or log + '.gstidx'
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);'
+            'CREATE TABLE IF NOT EXISTS blocks ('
+            ' id INTEGER PRIMARY KEY, offset INTEGER, end INTEGER, t_first REAL, t_last REAL, lines INTEGER);'
+            'CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER PRIMARY KEY, first_block INTEGER, last_block INTEGER);'
+            'CREATE TABLE IF NOT EXISTS postings (kind TEXT, key TEXT, blocks BLOB, PRIMARY KEY (kind, key));'
+        )
+
+    def _meta(self):
+        return dict(self._db.execute('SELECT key, value FROM meta'))
+
+    def _head(self, size):
+        """Digest of the first `size` bytes of the log, to tell an appended log from a new one."""
+        with open(self.log, 'rb') as f:
+            return hashlib.blake2b(f.read(size), digest_size=16).hexdigest()
+
+    def status(self):
+        """'fresh', 'grown' (only lines were appended to the log) or 'stale'."""
+        meta = self._meta()
+        st = os.stat(self.log)
+        if meta.get('version') != str(self.FORMAT_VERSION) or \
+                meta.get('head') != self._head(int(meta.get('head_size', 0))):
+            return 'stale'
+        if (meta.get('size'), meta.get('mtime_ns')) == (str(st.st_size), str(st.st_mtime_ns)):
+            return 'fresh'
+        if st.st_size > int(meta['size']):
+            return 'grown'
+        return 'stale'
+
+    def update(self, jobs=None):
+        """Bring the index up to date with the log, returns the number of bytes indexed."""
+        status = self.status()
+        if status == 'fresh':
+            return 0
+        if status == 'stale':
+            self._db.executescript('DELETE FROM meta; DELETE FROM blocks; DELETE FROM buckets; DELETE FROM postings;')
+            start = 0
+        else:
+            start = int(self._meta()['indexed'])
+        st = os.stat(self.log)
+        end = complete_lines_size(self.log)
+        self._index_range(start, end, jobs)
+        self._db.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+            ('version', str(self.FORMAT_VERSION)),
+            ('head', self._head(min(end, 4096))),
+            ('head_size', str(min(end, 4096))),
+            ('size', str(st.st_size)),
+            ('mtime_ns', str(st.st_mtime_ns)),
+            ('indexed', str(end)),
+        ])
+        self._db.commit()
+        return end - start
+
+    def _index_range(self, start, end, jobs=None):
+        """Index the complete lines between two byte offsets, on a process pool unless they fit one chunk."""
+        jobs = jobs or os.cpu_count() or 1
+        size = end - start
+        if size <= CHUNK_SIZE:
+            bounds = [(start, end)] if size else []
+        else:
+            bounds = chunk_bounds(self.log, max(jobs * 4, -(-size // CHUNK_SIZE)), end, start)
+        if jobs == 1 or len(bounds) <= 1:
+            results = (index_chunk(self.log, chunk_start, chunk_end) for chunk_start, chunk_end in bounds)
+            self._merge(results)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                self._merge(executor.map(index_chunk, *zip(*((self.log, s, e) for s, e in bounds))))
+
+    def _merge(self, results):
+        """Append the chunk results, in log order, to the blocks, buckets and postings."""
+        base = self._db.execute('SELECT COALESCE(MAX(id) + 1, 0) FROM blocks').fetchone()[0]
+        postings = {}
+        buckets = {}
+        for blocks, chunk_postings in results:
+            rows = []
+            for i, (offset, end, t_first, t_last, lines) in enumerate(blocks):
+                block_id = base + i
+                rows.append((block_id, offset, end, t_first, t_last, lines))
+                if t_first is not None:
+                    for bucket in range(int(t_first // BUCKET), int(t_last // BUCKET) + 1):
+                        first, last = buckets.get(bucket, (block_id, block_id))
+                        buckets[bucket] = (min(first, block_id), max(last, block_id))
+            self._db.executemany('INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?)', rows)
+            for key, block_ids in chunk_postings.items():
+                postings.setdefault(key, []).extend(base + block_id for block_id in block_ids)
+            base += len(blocks)
+
+        for bucket, (first, last) in buckets.items():
+            row = self._db.execute('SELECT first_block, last_block FROM buckets WHERE bucket = ?', (bucket,)).fetchone()
+            if row:
+                first, last = min(first, row[0]), max(last, row[1])
+            self._db.execute('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)', (bucket, first, last))
+        for (kind, key), block_ids in postings.items():
+            row = self._db.execute('SELECT blocks FROM postings WHERE kind = ? AND key = ?', (kind, key)).fetchone()
+            if row:
+                block_ids = _decode(row[0]) + block_ids
+            self._db.execute('INSERT OR REPLACE INTO postings VALUES (?, ?, ?)', (kind, key, _encode(block_ids)))
+
+    def keys(self, kind):
+        """Keys of one kind with the number of blocks holding them, most frequent first."""
+        counts = [(key, len(_decode(blob)))
+                  for key, blob in self._db.execute('SELECT key, blocks FROM postings WHERE kind = ?', (kind,))]
+        return sorted(counts, key=lambda item: -item[1])
+
+    def blocks(self, filters=None, start=None, end=None):
+        """
+        Byte ranges of the blocks that may hold lines matching all filters.
+
+        Args:
+            filters: Dict of kind to a key, or a list of keys any of which may match
+            start, end: Optional time range in seconds
+
+        Returns:
+            Sorted list of (offset, end) byte ranges, adjacent blocks merged
+        """
+        candidates = None
+        for kind, keys in (filters or {}).items():
+            keys = [keys] if isinstance(keys, str) else keys
+            block_ids = set()
+            for key in keys:
+                row = self._db.execute('SELECT blocks FROM postings WHERE kind = ? AND key = ?', (kind, key)).fetchone()
+                if row:
+                    block_ids.update(_decode(row[0]))
+            candidates = block_ids if candidates is None else candidates & block_ids
+
+        query = 'SELECT id, offset, end FROM blocks WHERE 1'
+        args = []
+        if start is not None or end is not None:
+            first, last = self._db.execute(
+                'SELECT MIN(first_block), MAX(last_block) FROM buckets WHERE bucket BETWEEN ? AND ?',
+                (int((start or 0) // BUCKET), int(end // BUCKET) if end is not None else 2 ** 62)
+            ).fetchone()
+            if first is None:
+                return []
+            query += ' AND id BETWEEN ? AND ? AND t_last >= ? AND t_first <= ?'
+            args += [first, last, start if start is not None else float('-inf'),
+                     end if end is not None else float('inf')]
+        if candidates is not None:
+            if not candidates:
+                return []
+            if len(candidates) < 10000:
+                query += f' AND id IN ({",".join("?" * len(candidates))})'
+                args += sorted(candidates)
+
+        ranges = []
+        for block_id, offset, block_end in self._db.execute(query + ' ORDER BY id', args):
+            if candidates is not None and block_id not in candidates:
+                continue
+            if ranges and ranges[-1][1] == offset:
+                ranges[-1][1] = block_end
+            else:
+                ranges.append([offset, block_end])
+        return [tuple(byte_range) for byte_range in ranges]
+
+    def lines(self, filters=None, start=None, end=None):
+        """Yield the lines of the log matching all filters within the time range."""
+        wanted = {kind: [keys] if isinstance(keys, str) else list(keys) for kind, keys in (filters or {}).items()}
+        with open(self.log, 'rb') as f:
+            for offset, block_end in self.blocks(filters, start, end):
+                f.seek(offset)
+                pos = offset
+                while pos < block_end:
+                    line = f.readline()
+                    pos += len(line)
+                    if self._matches(line, wanted, start, end):
+                        yield line
+
+    @staticmethod
+    def _matches(line, wanted, start, end):
+        if not wanted and start is None and end is None:
+            return True
+        header = parse_line(line)
+        if header is None:
+            return False
+        timestamp, thread, level, category, obj = header
+        if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+            return False
+        fields = {'thread': thread, 'level': level, 'category': category}
+        for kind, keys in wanted.items():
+            if kind == 'object':
+                if not obj or not any(obj == key.encode() or obj.startswith(key.encode() + b':') for key in keys):
+                    return False
+            elif kind == 'type':
+                if message_type(line) not in keys:
+                    return False
+            elif fields[kind].decode(errors='replace') not in keys:
+                return False
+        return True
+
+    def graph(self):
+        """Build the PipelineGraph of the log from the blocks holding graph messages only."""
+        graph = PipelineGraph()
+        for line in self.lines({'type': list(MESSAGE_TYPES.values())}):
+            graph.feed(line.decode(errors='replace'))
+        return graph
+
+    def close(self):
+        self._db.close()
+
+
+def open_index(args):
+    """Open the index of the log, building or extending it first if needed."""
+    if not os.path.isfile(args.log) or is_compressed(args.log):
+        print(f"Error: {args.log} is not an uncompressed log file", file=sys.stderr)
+        sys.exit(1)
+    index = LogIndex(args.log, args.index)
+    start_time = time.time()
+    indexed = index.update(jobs=args.jobs)
+    if indexed:
+        print(f"Indexed {indexed / (1024 * 1024):.1f} MB in {time.time() - start_time:.1f}s ({index.path})",
+              file=sys.stderr)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Index a GST_DEBUG log once and query it without scanning it again')
+    parser.add_argument('--index', help='Index file (default: <log>.gstidx)')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Processes indexing chunks of the log in parallel (default: number of CPU cores)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Build or update the index of a log')
+    build_parser.add_argument('log')
+
+    query_parser = subparsers.add_parser('query', help='Print the lines matching all the given filters')
+    query_parser.add_argument('log')
+    query_parser.add_argument('--object', action='append', help='Element or pad name (element:pad), repeatable')
+    query_parser.add_argument('--thread', action='append', help='Thread id, e.g. 0x55d5c0a0, repeatable')
+    query_parser.add_argument('--category', action='append', help='Debug category, e.g. GST_PADS, repeatable')
+    query_parser.add_argument('--level', action='append', help='Debug level, e.g. WARN, repeatable')
+    query_parser.add_argument('--type', action='append', choices=sorted(set(MESSAGE_TYPES.values())),
+                              help='Graph message type, repeatable')
+    query_parser.add_argument('--start', type=_parse_time, help='Start time, in seconds or H:MM:SS.fff')
+    query_parser.add_argument('--end', type=_parse_time, help='End time, in seconds or H:MM:SS.fff')
+
+    keys_parser = subparsers.add_parser('keys', help='List the threads, categories, levels, objects or types')
+    keys_parser.add_argument('log')
+    keys_parser.add_argument('kind', choices=KINDS)
+
+    graph_parser = subparsers.add_parser('graph', help='Write the pipeline graph using the index')
+    graph_parser.add_argument('log')
+    graph_parser.add_argument('output', help='dot file to write')
+    graph_parser.add_argument('--svg', metavar='FILE', help='Also render the graph to an SVG file with dot')
+
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    index = open_index(args)
+    try:
+        if args.command == 'query':
+            filters = {kind: getattr(args, kind) for kind in KINDS if getattr(args, kind)}
+            out = sys.stdout.buffer
+            for line in index.lines(filters, args.start, args.end):
+                out.write(line)
+        elif args.command == 'keys':
+            for key, blocks in index.keys(args.kind):
+                print(f'{key}\t{blocks}')
+        elif args.command == 'graph':
+            write_outputs(index.graph(), args.output, args.svg)
+    except BrokenPipeError:
+        pass
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,212 +1,656 @@
+#!/usr/bin/env python3
 # usage :
-# $ python gobj-log-2-graph.py file.log mygraph.dot
-# $ dot -Tsvg mygraph.dot mygraph.svg
+# $ python3 gst_log_to_dot.py file.log mygraph.dot
+# $ dot -Tsvg mygraph.dot -o mygraph.svg
+#
+# The log needs the GST_PADS and GST_PARENTAGE categories, e.g. GST_DEBUG=*:5
+# or GST_DEBUG=GST_PADS:4,GST_PARENTAGE:5,GST_ELEMENT_FACTORY:5
+#
+# Logs compressed with gzip, xz or zstd are decompressed on the fly:
+# $ python3 gst_log_to_dot.py file.log.zst mygraph.dot
+#
+# Follow a log while the pipeline runs, rewriting the graph when it changes:
+# $ python3 gst_log_to_dot.py --follow $GST_DEBUG_FILE mygraph.dot --svg mygraph.svg
 #
 # if something:
 # dot is in graphviz package
 # apt install graphviz
 
+import argparse
+import contextlib
+import gzip
+import io
+import lzma
+import mmap
+import os
 import re
-import fileinput
+import shutil
+import subprocess
 import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
-# 'obj' : 'parent'
-
-g_pads = {}
-g_elements = {}
-g_bins = []
-g_graph_elements = []
 indent_char = '\t'
 
-class Config:
-    has_playbin = False
-    root_bin = 'pipeline0'
-    extra_root_bin_comments = ''
-
-config = Config() 
-
-def new_element_in_graph (element):
-  for el in g_graph_elements:
-    if el == element:
-      return False
-  return True
-
-def new_bin (bin_element):
-  for b in g_bins:
-    if b == bin_element:
-      return False
-  return True
-
-def get_root_bins():
-  root_bins = []
-  if config.root_bin:
-    root_bins.append(config.root_bin)
-  for e in g_elements:
-    if g_elements[e] == '(NULL)':
-      root_bins.append(e)
-  return root_bins
-
-def get_elements_from_bin(bin_el):
-  elements = []
-  for e in g_elements:
-    if g_elements[e] == bin_el:
-      elements.append(e)
-  return elements
-
-def get_pad_for_element(element):
-  pads = []
-  for p in g_pads:
-    pad = p.split(':')[0]
-    if p.split(':')[0] == element:
-      pads.append(p)
-    if g_pads[p].split(':')[0] == element:
-      pads.append(g_pads[p])
-  return pads
-      
+# One pattern for every event the graph is built from, the named group that
+# matched tells which one it is. Only the message part of a line can match,
+# so neither the ANSI colors nor the header of the line need to be stripped.
+EVENT_RE = re.compile(
+    r'linked (?P<src>\S+) and (?P<sink>\S+), successful'
+    r'|adding element (?P<element>\S+) to bin (?P<bin>\S+)'
+    r'|created element "(?P<factory>[^"]*)"'
+    r'|set new uri to (?P<uri>.*?)\s*$'
+)
+
+# Byte strings every line matching EVENT_RE contains, found with a plain
+# substring search before the line is decoded and matched
+PREFILTER = (b'linked ', b'adding element ', b'created element ', b'set new uri to ')
+
+# Logs are parsed in chunks of at most this size, which bounds the memory
+# mapped by a worker at any time
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# Read buffer of compressed logs and stdin
+READ_BUFFER = 1024 * 1024
+
+# Leading bytes of the compressed formats read transparently
+COMPRESSION_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\xfd7zXZ\x00': 'xz',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+}
+
+BEAUTIFY_TABLE = str.maketrans(':-', '__')
+
+
 def beautify_name(name):
-  for r in [':', '-']:
-    name = name.replace(r, '_')
-  return name
-
-def add_connection(pad_sink, pad_src, indent, label=''):
-  print indent,'%s -> %s %s' %(beautify_name(pad_sink),beautify_name(pad_src), label)
-
-def add_pad(pad_name, indent):
-  body_indent = indent + indent;
-  print indent,'subgraph ',beautify_name(pad_name),'{'
-  print body_indent,'label="";'
-  print body_indent,'style="invis";'
-  if 'sink' in pad_name:
-    print body_indent,beautify_name(pad_name),'[color=black, fillcolor="#aaaaff", label="sink\\n[>][bfb]", height="0.2", style="filled,solid"];'
-  else:
-    print body_indent,beautify_name(pad_name),'[color=black, fillcolor="#aaaaff", label="src\\n[>][bfb]", height="0.2", style="filled,solid"];'
-  print indent,'}'
-
-def add_element (element, parent_bin, indent):
-  if new_element_in_graph(element):
-    body_indent = indent + indent;
-    print indent,'subgraph cluster_%s {' % beautify_name(element)
-    print body_indent,'fontname="Bitstream Vera Sans";'
-    print body_indent,'fontsize="8";'
-    print body_indent,'style="filled,rounded";'
-    print body_indent,'color=black;'
-    print body_indent,'label="%s\\n[>]\\nparent=(GstPipeline) %s"' % (beautify_name(element), parent_bin)
-    for p in get_pad_for_element(element):
-      add_pad(p, indent + indent_char)
-
-    for el in get_elements_from_bin(element):
-      add_element(el, element, indent + indent_char)
-    print indent,'fillcolor="#aaaaff";'
-    print indent,'}'
-
-#subgraph
-def create_subgraph(indent):
-  for b in get_root_bins():
-    add_element(b, config.root_bin, indent + indent_char)
-    #element = pads[pad].split(':')[0]
-    #print '"',pads[pad].split(':')[0],'"' , '->', '"',pad,'";'
-
-
-#connection
-def create_connection(indent):
-  for pad in g_pads:
-    add_connection(g_pads[pad], pad, indent)
-
-def format_gst_line(line):
-    ansi_escape = re.compile(r'\x1b[^m]*m')
-    line = ansi_escape.sub('\t', line)
-    tab = re.split(r'\t+', line)
-    line = tab.pop()
-    return line
-
-def parse_file(filename):
-  for line in fileinput.input([filename]):
-      mobj = re.match(r".*linked.*successful", line)
-      #get pads
-      if mobj:
-          line = format_gst_line(mobj.group())
-          tab = re.split(r'\t+', line)
-          line = tab.pop()
-          tab = line.split('and')
-          
-          g_pads[tab[1].replace(', successful','').strip()] = tab[0].replace('linked','').strip()
-      #get elements and bins
-      mobj = re.match(r".*adding element.*", line)
-      if mobj:
-        line = format_gst_line(mobj.group())
-        tab = line.split(' to ')
-        #print line
-        gst_bin = tab[1].replace('bin ','').strip()
-        gst_element = tab[0].replace('adding element ','').strip()
-        if gst_element == 'uridecodebin0':
-          config.root_bin = gst_bin
-
-        if new_bin (gst_bin):
-          g_bins.append(gst_bin)
-        g_elements[gst_element] = gst_bin
-      #detect playbin
-      mobj = re.match(r".*created element.*", line)
-      if mobj:
-          line = format_gst_line(mobj.group())
-          if 'playbin' in line:
-              config.has_playbin = True
-      #detect playbin URI
-      mobj = re.match(r".*set new uri to.*", line)
-      if mobj:
-          line = format_gst_line(mobj.group())
-          tab = line.split(' to ')
-          config.extra_root_bin_comments += '\\ncurrent-uri=\\"%s\\"' % tab[1]
-
-def show_elements():
-  elements ='\\lelements:'
-  for e in g_elements:
-    elements += '\\l%s in bin %s' % (e,g_elements[e])
-  return elements
-
-def show_pads():
-  pads ='\\lpads:'
-  for p in g_pads:
-      pads += '\\l%s -> %s' % (p,g_pads[p])
-  return pads
-
-
-#Start of the program.
-input_filename = '-'
-try:
-  input_filename = sys.argv[1]
-except:
-  print "Use stdin as input method"
-  input_filename = '-'
-
-stdout = sys.stdout
-try:
-  f = open(sys.argv[2],'w')
-  sys.stdout = f
-except:
-  print "Use stdout as output method"
-  sys.stdout = stdout
-
-parse_file(input_filename)
-
-print 'digraph pipeline {'
-print indent_char,'rankdir=LR;'
-print indent_char,'fontname="sans";'
-print indent_char,'fontsize="10";'
-print indent_char,'labelloc=t;'
-print indent_char,'nodesep=.1;'
-print indent_char,'ranksep=.2;'
-print indent_char,'label="<GstPipeline>\\n%s\\n[>]%s";' % (config.root_bin, config.extra_root_bin_comments)
-print indent_char,'node [style="filled,rounded", shape=box, fontsize="9", fontname="sans", margin="0.0,0.0"];'
-print indent_char,'edge [labelfontsize="6", fontsize="9", fontname="monospace"];'
-print indent_char,'legend ['
-print indent_char,'pos="0,0!",'
-print indent_char,'margin="0.05,0.05",'
-print indent_char,'style="filled"'
-print indent_char, 'label="Legend\l%s\l%s"' %  (show_elements(), show_pads())
-print indent_char,'];'
-print '\n'
-
-# create the graph
-create_subgraph('')
-create_connection('')
-print '}'
+    return name.translate(BEAUTIFY_TABLE)
+
+
+class PipelineGraph:
+    """
+    Elements, bins and pad links of the pipelines found in a GST_DEBUG log.
+
+    The model only keeps what the log says: which bin each element was added to
+    ('(NULL)' for elements without a parent) and which source pad each sink pad is
+    linked to. Parent to children and element to pads indexes are built in one pass
+    when the graph is written, so emitting the graph is linear in its size.
+    """
+
+    def __init__(self):
+        # 'sink pad' : 'src pad'
+        self.pads = {}
+        # 'element' : 'parent bin'
+        self.elements = {}
+        # Bins in order of appearance
+        self.bins = {}
+        self.has_playbin = False
+        self.root_bin = 'pipeline0'
+        self.extra_root_bin_comments = ''
+
+    def feed(self, line):
+        """
+        Update the model from one log line.
+
+        Returns:
+            True if the line changed the topology (elements, bins or links)
+        """
+        mobj = EVENT_RE.search(line)
+        if not mobj:
+            return False
+        return self.apply(mobj.lastgroup, mobj.groupdict())
+
+    def apply(self, kind, fields):
+        """
+        Update the model from one event, as parsed by EVENT_RE.
+
+        Args:
+            kind: Name of the last group that matched ('sink', 'bin', 'factory' or 'uri')
+            fields: Values of the named groups
+
+        Returns:
+            True if the event changed the topology (elements, bins or links)
+        """
+        if kind == 'sink':
+            sink = fields['sink']
+            src = fields['src']
+            if self.pads.get(sink) == src:
+                return False
+            self.pads[sink] = src
+            return True
+
+        if kind == 'bin':
+            gst_element = fields['element']
+            gst_bin = fields['bin']
+            if gst_element == 'uridecodebin0':
+                self.root_bin = gst_bin
+            self.bins.setdefault(gst_bin, None)
+            if self.elements.get(gst_element) == gst_bin:
+                return False
+            self.elements[gst_element] = gst_bin
+            return True
+
+        if kind == 'factory':
+            if 'playbin' in fields['factory']:
+                self.has_playbin = True
+            return False
+
+        self.extra_root_bin_comments += '\\ncurrent-uri=\\"%s\\"' % fields['uri']
+        return False
+
+    def get_root_bins(self):
+        root_bins = []
+        if self.root_bin:
+            root_bins.append(self.root_bin)
+        for element, parent in self.elements.items():
+            if parent == '(NULL)':
+                root_bins.append(element)
+        return root_bins
+
+    def _indexes(self):
+        """Children of each bin and pads of each element, in order of appearance."""
+        children = {}
+        for element, parent in self.elements.items():
+            children.setdefault(parent, []).append(element)
+        element_pads = {}
+        for sink, src in self.pads.items():
+            element_pads.setdefault(sink.split(':')[0], []).append(sink)
+            element_pads.setdefault(src.split(':')[0], []).append(src)
+        return children, element_pads
+
+    def show_elements(self):
+        return '\\lelements:' + ''.join('\\l%s in bin %s' % (element, parent)
+                                        for element, parent in self.elements.items())
+
+    def show_pads(self):
+        return '\\lpads:' + ''.join('\\l%s -> %s' % (sink, src) for sink, src in self.pads.items())
+
+    def write_dot(self, out):
+        """Write the graph in the dot format of GST_DEBUG_BIN_TO_DOT_FILE()."""
+        lines = []
+        emit = lines.append
+        children, element_pads = self._indexes()
+        emitted = set()
+
+        def add_pad(pad_name, indent):
+            body_indent = indent + indent
+            name = beautify_name(pad_name)
+            emit('%s subgraph  %s {' % (indent, name))
+            emit('%s label="";' % body_indent)
+            emit('%s style="invis";' % body_indent)
+            direction = 'sink' if 'sink' in pad_name else 'src'
+            emit('%s %s [color=black, fillcolor="#aaaaff", label="%s\\n[>][bfb]", height="0.2", '
+                 'style="filled,solid"];' % (body_indent, name, direction))
+            emit('%s }' % indent)
+
+        def add_element(element, parent_bin, indent):
+            if element in emitted:
+                return
+            emitted.add(element)
+            body_indent = indent + indent
+            emit('%s subgraph cluster_%s {' % (indent, beautify_name(element)))
+            emit('%s fontname="Bitstream Vera Sans";' % body_indent)
+            emit('%s fontsize="8";' % body_indent)
+            emit('%s style="filled,rounded";' % body_indent)
+            emit('%s color=black;' % body_indent)
+            emit('%s label="%s\\n[>]\\nparent=(GstPipeline) %s"' % (body_indent, beautify_name(element), parent_bin))
+            for pad in element_pads.get(element, ()):
+                add_pad(pad, indent + indent_char)
+            for child in children.get(element, ()):
+                add_element(child, element, indent + indent_char)
+            emit('%s fillcolor="#aaaaff";' % indent)
+            emit('%s }' % indent)
+
+        emit('digraph pipeline {')
+        emit('%s rankdir=LR;' % indent_char)
+        emit('%s fontname="sans";' % indent_char)
+        emit('%s fontsize="10";' % indent_char)
+        emit('%s labelloc=t;' % indent_char)
+        emit('%s nodesep=.1;' % indent_char)
+        emit('%s ranksep=.2;' % indent_char)
+        emit('%s label="<GstPipeline>\\n%s\\n[>]%s";' % (indent_char, self.root_bin, self.extra_root_bin_comments))
+        emit('%s node [style="filled,rounded", shape=box, fontsize="9", fontname="sans", margin="0.0,0.0"];'
+             % indent_char)
+        emit('%s edge [labelfontsize="6", fontsize="9", fontname="monospace"];' % indent_char)
+        emit('%s legend [' % indent_char)
+        emit('%s pos="0,0!",' % indent_char)
+        emit('%s margin="0.05,0.05",' % indent_char)
+        emit('%s style="filled"' % indent_char)
+        emit('%s label="Legend\\l%s\\l%s"' % (indent_char, self.show_elements(), self.show_pads()))
+        emit('%s ];' % indent_char)
+        emit('\n')
+
+        # subgraphs
+        for root in self.get_root_bins():
+            add_element(root, self.root_bin, indent_char)
+
+        # connections
+        for sink, src in self.pads.items():
+            emit(' %s -> %s ' % (beautify_name(src), beautify_name(sink)))
+        emit('}')
+
+        out.write('\n'.join(lines))
+        out.write('\n')
+
+
+def detect_compression(raw):
+    """Compression format of a buffered binary stream from its magic bytes, None if plain."""
+    head = raw.peek(6)[:6]
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _zstd_reader(raw):
+    """Streaming zstd decompressor, from the zstandard module or else the zstd tool."""
+    try:
+        import zstandard
+    except ImportError:
+        pass
+    else:
+        # Rotated or --rsyncable logs hold several concatenated frames
+        return _ZstdReader(zstandard.ZstdDecompressor().stream_reader(
+            raw, read_size=READ_BUFFER, read_across_frames=True, closefd=True), zstandard.ZstdError)
+
+    try:
+        process = subprocess.Popen(['zstd', '-dcq'], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError('reading .zst logs needs the zstandard module or the zstd tool') from None
+
+    def pump():
+        # The magic bytes were already read from raw, feed zstd from it rather than from its descriptor
+        with raw, process.stdin, contextlib.suppress(BrokenPipeError):
+            shutil.copyfileobj(raw, process.stdin, READ_BUFFER)
+
+    threading.Thread(target=pump, daemon=True).start()
+    return _ProcessReader(process)
+
+
+def open_log(filename):
+    """
+    Open a log file, or stdin for '-', as a buffered binary stream.
+
+    gzip, xz and zstd compressed logs are recognized from their magic bytes and
+    decompressed while they are read, whatever their file name.
+    """
+    if filename == '-':
+        raw = io.BufferedReader(io.FileIO(sys.stdin.fileno(), closefd=False), READ_BUFFER)
+    else:
+        raw = open(filename, 'rb', buffering=READ_BUFFER)
+
+    compression = detect_compression(raw)
+    if compression == 'gzip':
+        stream = gzip.GzipFile(fileobj=raw)
+    elif compression == 'xz':
+        stream = lzma.LZMAFile(raw)
+    elif compression == 'zstd':
+        stream = _zstd_reader(raw)
+    else:
+        return raw
+    # The decompressors do not close the file object they were given
+    if compression != 'zstd':
+        stream = _ClosingReader(stream, raw)
+    return io.BufferedReader(stream, READ_BUFFER)
+
+
+class _ClosingReader(io.RawIOBase):
+    """Raw reader over a decompressor that also closes the underlying file."""
+
+    def __init__(self, stream, raw):
+        self.stream = stream
+        self.raw = raw
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.stream.readinto(buffer)
+
+    def close(self):
+        if not self.closed:
+            self.stream.close()
+            self.raw.close()
+        super().close()
+
+
+class _ZstdReader(io.RawIOBase):
+    """Raw reader over a zstandard stream reader, reporting corrupt data as RuntimeError like _ProcessReader."""
+
+    def __init__(self, stream, error):
+        self.stream = stream
+        self.error = error
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            return self.stream.readinto(buffer)
+        except self.error as e:
+            raise RuntimeError(f'corrupt zstd data: {e}') from None
+
+    def close(self):
+        if not self.closed:
+            self.stream.close()
+        super().close()
+
+
+class _ProcessReader(io.RawIOBase):
+    """Raw reader over the stdout of a decompressing process, failing if the process does."""
+
+    def __init__(self, process):
+        self.process = process
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.process.stdout.readinto(buffer)
+        if not count and self.process.wait() != 0:
+            raise RuntimeError(f'{self.process.args[0]} exited with code {self.process.returncode}')
+        return count
+
+    def close(self):
+        if not self.closed:
+            self.process.stdout.close()
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.wait()
+        super().close()
+
+
+def is_compressed(filename):
+    """True if a file starts with the magic bytes of a supported compression format."""
+    with open(filename, 'rb') as f:
+        return detect_compression(io.BufferedReader(f)) is not None
+
+
+def parse_stream(stream, graph):
+    """Feed the lines of a binary stream holding PREFILTER strings to the graph."""
+    feed = graph.feed
+    for line in stream:
+        for needle in PREFILTER:
+            if needle in line:
+                feed(line.decode(errors='replace'))
+                break
+
+
+def chunk_bounds(filename, chunks, size=None, start=0):
+    """Split the bytes [start, size) of a file into about `chunks` byte ranges ending at line boundaries."""
+    if size is None:
+        size = os.path.getsize(filename)
+    step = max(1, -(-(size - start) // chunks))
+    bounds = []
+    with open(filename, 'rb') as f:
+        while start < size:
+            f.seek(min(size, start + step))
+            f.readline()
+            end = min(size, f.tell())
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def parse_chunk(filename, start, end):
+    """
+    Find the events in one byte range of a log. Executed in a worker process.
+
+    Only the range is memory mapped. Lines are located with a substring search
+    for the PREFILTER strings and only those lines are decoded and matched.
+
+    Returns:
+        List of (kind, fields) events in the order of the log
+    """
+    offset = start - start % mmap.ALLOCATIONGRANULARITY
+    with open(filename, 'rb') as f, \
+            mmap.mmap(f.fileno(), end - offset, access=mmap.ACCESS_READ, offset=offset) as mm:
+        start -= offset
+        end -= offset
+        line_starts = set()
+        for needle in PREFILTER:
+            hit = mm.find(needle, start, end)
+            while hit != -1:
+                line_start = mm.rfind(b'\n', start, hit) + 1 or start
+                line_starts.add(line_start)
+                line_end = mm.find(b'\n', hit, end)
+                if line_end == -1:
+                    break
+                hit = mm.find(needle, line_end, end)
+
+        events = []
+        for line_start in sorted(line_starts):
+            line_end = mm.find(b'\n', line_start, end)
+            line = mm[line_start:line_end if line_end != -1 else end].decode(errors='replace')
+            mobj = EVENT_RE.search(line)
+            if mobj:
+                events.append((mobj.lastgroup, mobj.groupdict()))
+        return events
+
+
+def parse_file(filename, graph=None, jobs=None, size=None):
+    """
+    Build (or update) a PipelineGraph from a GST_DEBUG log file, '-' for stdin.
+
+    Plain regular files are memory mapped and parsed in line-aligned chunks on a pool of
+    `jobs` processes (default: one per core). The events of each chunk are applied
+    in the order of the chunks, so the result is the same as a sequential parse.
+    Files of at most one chunk are parsed in this process, starting the pool would
+    cost more than the parse. With `size`, only the first `size` bytes are parsed.
+    """
+    if graph is None:
+        graph = PipelineGraph()
+
+    if filename == '-' or not os.path.isfile(filename) or is_compressed(filename):
+        # Streams cannot be split, decompress and parse them sequentially
+        with open_log(filename) as f:
+            parse_stream(f, graph)
+        return graph
+
+    jobs = jobs or os.cpu_count() or 1
+    if size is None:
+        size = os.path.getsize(filename)
+    if size <= CHUNK_SIZE:
+        bounds = [(0, size)] if size else []
+    else:
+        bounds = chunk_bounds(filename, max(jobs * 4, -(-size // CHUNK_SIZE)), size)
+    if jobs == 1 or len(bounds) <= 1:
+        results = (parse_chunk(filename, start, end) for start, end in bounds)
+        for events in results:
+            for kind, fields in events:
+                graph.apply(kind, fields)
+        return graph
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # map() yields the chunk results in submission order
+        results = executor.map(parse_chunk, *zip(*((filename, start, end) for start, end in bounds)))
+        for events in results:
+            for kind, fields in events:
+                graph.apply(kind, fields)
+    return graph
+
+
+def complete_lines_size(filename):
+    """Size of a growing file up to and including its last complete line."""
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        end = size
+        while end > 0:
+            start = max(0, end - READ_BUFFER)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline != -1:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+class LogFollower:
+    """
+    Incremental reader of a growing log, updating a PipelineGraph with each new line.
+
+    Only the bytes appended since the previous poll are read, and a line is only
+    parsed once it is complete. When the log is truncated or replaced (a new run
+    writing to the same GST_DEBUG_FILE) the graph starts over.
+    """
+
+    def __init__(self, filename, graph=None, offset=0):
+        self.filename = filename
+        self.graph = graph or PipelineGraph()
+        self.offset = offset
+        self._file = None
+        self._inode = None
+        self._partial = b''
+
+    def _reopen(self):
+        if self._file:
+            self._file.close()
+        self._file = open(self.filename, 'rb')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._file.seek(self.offset)
+
+    def poll(self):
+        """
+        Read what was appended to the log since the last poll.
+
+        Returns:
+            True if the topology of the graph changed
+        """
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return False
+        changed = False
+        if self._file is None or st.st_ino != self._inode or st.st_size < self.offset:
+            if self._file is not None or st.st_size < self.offset:
+                # Rotated or truncated: a new run, start a new graph
+                self.graph = PipelineGraph()
+                self.offset = 0
+                self._partial = b''
+                changed = True
+            self._reopen()
+
+        data = self._file.read()
+        if not data:
+            return changed
+        self.offset += len(data)
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        feed = self.graph.feed
+        for line in lines:
+            for needle in PREFILTER:
+                if needle in line:
+                    changed = feed(line.decode(errors='replace')) or changed
+                    break
+        return changed
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def write_outputs(graph, dot_path, svg_path=None):
+    """
+    Write the dot file, and optionally render it to SVG, replacing both atomically.
+
+    Viewers reloading the files on change (xdot, browsers) never see a partial file.
+    """
+    directory = os.path.dirname(os.path.abspath(dot_path))
+    with tempfile.NamedTemporaryFile('w', dir=directory, prefix='.', suffix='.dot', delete=False) as out:
+        graph.write_dot(out)
+    os.replace(out.name, dot_path)
+
+    if svg_path:
+        tmp = svg_path + '.tmp'
+        try:
+            subprocess.run(['dot', '-Tsvg', dot_path, '-o', tmp], check=True, capture_output=True)
+            os.replace(tmp, svg_path)
+        except FileNotFoundError:
+            print("Warning: dot (graphviz) is not installed, cannot render the SVG", file=sys.stderr)
+        except subprocess.CalledProcessError as e:
+            print(f"Warning: dot failed: {e.stderr.decode(errors='replace').strip()}", file=sys.stderr)
+
+
+def follow(filename, dot_path, svg_path=None, jobs=None, interval=0.5, debounce=1.0):
+    """
+    Tail a growing log and rewrite the graph when its topology changes.
+
+    The log is polled every `interval` seconds. A rewrite waits for the topology to
+    stay unchanged for `debounce` seconds, so a burst of pad-added and link events
+    produces one rewrite, but it is never delayed by more than 5 * `debounce` seconds
+    while the pipeline keeps changing. Runs until interrupted.
+    """
+    # Parse what is already there in parallel, then continue incrementally
+    size = complete_lines_size(filename)
+    follower = LogFollower(filename, parse_file(filename, jobs=jobs, size=size), offset=size)
+    write_outputs(follower.graph, dot_path, svg_path)
+    print(f"Following {filename}, {len(follower.graph.elements)} elements, "
+          f"{len(follower.graph.pads)} links", file=sys.stderr)
+
+    first_change = last_change = None
+    try:
+        while True:
+            now = time.monotonic()
+            if follower.poll():
+                last_change = now
+                first_change = first_change or now
+            if last_change is not None and (now - last_change >= debounce or now - first_change >= 5 * debounce):
+                write_outputs(follower.graph, dot_path, svg_path)
+                print(f"{time.strftime('%H:%M:%S')} graph updated: {len(follower.graph.elements)} elements, "
+                      f"{len(follower.graph.pads)} links", file=sys.stderr)
+                first_change = last_change = None
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        if last_change is not None:
+            write_outputs(follower.graph, dot_path, svg_path)
+    finally:
+        follower.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Rebuild the pipeline graph of a GST_DEBUG log as a dot file')
+    parser.add_argument('input', nargs='?', default='-', help='GST_DEBUG log file (default: stdin)')
+    parser.add_argument('output', nargs='?', help='dot file to write (default: stdout)')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Processes parsing chunks of the log in parallel (default: number of CPU cores)')
+    parser.add_argument('-f', '--follow', action='store_true',
+                        help='Keep reading the log as it grows and rewrite the output when the topology changes')
+    parser.add_argument('--svg', metavar='FILE',
+                        help='Also render the graph to an SVG file with dot (graphviz)')
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='With --follow, seconds between polls of the log (default: 0.5)')
+    parser.add_argument('--debounce', type=float, default=1.0,
+                        help='With --follow, seconds the topology must stay unchanged before a rewrite (default: 1.0)')
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.svg and not args.output:
+        parser.error('--svg needs an output dot file')
+    if args.follow:
+        if args.input == '-' or not args.output:
+            parser.error('--follow needs an input log file and an output dot file')
+        if not os.path.isfile(args.input) or is_compressed(args.input):
+            parser.error('--follow needs an uncompressed log file')
+        follow(args.input, args.output, args.svg, jobs=args.jobs, interval=args.interval, debounce=args.debounce)
+        return
+    if args.input == '-':
+        print("Use stdin as input method", file=sys.stderr)
+    try:
+        graph = parse_file(args.input, jobs=args.jobs)
+    except (OSError, EOFError, lzma.LZMAError, zlib.error, RuntimeError) as e:
+        print(f"Error: Could not read {args.input}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output:
+        write_outputs(graph, args.output, args.svg)
+    else:
+        graph.write_dot(sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+# The tools are standalone scripts, make them importable as modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timestamp(seconds):
+    return f'{int(seconds // 3600)}:{int(seconds // 60 % 60):02d}:{seconds % 60:012.9f}'
+
+
+def debug_log_lines(count, start=0.0, prefix='el'):
+    """Lines of a synthetic GST_DEBUG log: noise, bins, elements, links and a uri, 10 ms apart."""
+    lines = []
+    for i in range(count):
+        ts = _timestamp(start + i * 0.01)
+        thread = f'0x{i % 3 + 1:x}'
+        lines.append(f'{ts} 100 {thread} LOG  GST_BUFFER gstbuffer.c:1:gst_buffer_new:<queue{i % 10}> noise {i}')
+        if i == 0:
+            lines.extend(f'{ts} 100 {thread} DEBUG GST_PARENTAGE gstbin.c:1:gst_bin_add_func:<pipeline0> '
+                         f'adding element bin{k} to bin pipeline0' for k in range(4))
+        if i % 5 == 0:
+            lines.append(f'{ts} 100 {thread} DEBUG GST_ELEMENT_FACTORY gstelementfactory.c:1:'
+                         f'gst_element_factory_create: created element "queue"')
+            lines.append(f'{ts} 100 {thread} DEBUG GST_PARENTAGE gstbin.c:1:gst_bin_add_func:<bin{i % 4}> '
+                         f'adding element {prefix}{i} to bin bin{i % 4}')
+        if i % 5 == 1 and i > 5:
+            lines.append(f'{ts} 100 {thread} INFO GST_PADS gstpad.c:1:gst_pad_link_full:<{prefix}{i - 6}:src> '
+                         f'linked {prefix}{i - 6}:src and {prefix}{i - 1}:sink, successful')
+        if i == 3:
+            lines.append(f'{ts} 100 {thread} DEBUG filesrc gstfilesrc.c:1:gst_file_src_set_location:<src> '
+                         f'set new uri to file:///media/input.mkv')
+    return lines
+
+
+@pytest.fixture
+def make_log(tmp_path):
+    """Factory writing a synthetic debug log, make_log(name, count=..., start=..., append=...)."""
+    def make(name='gst.log', count=2000, start=0.0, append=False, prefix='el'):
+        path = tmp_path / name
+        with open(path, 'a' if append else 'w') as f:
+            f.write(''.join(line + '\n' for line in debug_log_lines(count, start, prefix)))
+        return path
+    return make
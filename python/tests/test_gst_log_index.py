@@ -0,0 +1,126 @@
+import io
+
+import pytest
+
+import gst_log_index
+from gst_log_index import LogIndex, parse_line
+from gst_log_to_dot import parse_file
+
+
+def scan(path, match):
+    """Reference query: every line of the log the predicate accepts."""
+    with open(path, 'rb') as f:
+        return [line for line in f if match(line)]
+
+
+def render(graph):
+    out = io.StringIO()
+    graph.write_dot(out)
+    return out.getvalue()
+
+
+@pytest.fixture
+def index(make_log):
+    # About 50 blocks
+    path = make_log(count=20000)
+    index = LogIndex(str(path))
+    index.update(jobs=1)
+    yield index
+    index.close()
+
+
+def test_parse_line():
+    timestamp, thread, level, category, obj = parse_line(
+        b'1:02:03.500000000 42 0x7f01 DEBUG   GST_PADS gstpad.c:2378:gst_pad_link_full:<queue0:src> linked')
+    assert timestamp == pytest.approx(3723.5)
+    assert (thread, level, category, obj) == (b'0x7f01', b'DEBUG', b'GST_PADS', b'queue0:src')
+    assert parse_line(b'not a log line') is None
+
+
+def test_query_by_object(index):
+    lines = list(index.lines({'object': 'queue7'}))
+    assert lines == scan(index.log, lambda line: b'<queue7>' in line)
+
+
+def test_query_reads_only_matching_blocks(index):
+    ranges = index.blocks({'object': 'el100'})
+    assert sum(end - start for start, end in ranges) <= 2 * gst_log_index.BLOCK_SIZE
+    assert list(index.lines({'object': 'el100'})) == scan(index.log, lambda line: b'<el100:' in line)
+
+
+def test_query_pad_by_element(index):
+    assert list(index.lines({'object': 'el0'})) == scan(index.log, lambda line: b'<el0:' in line)
+
+
+def test_query_combined_filters_and_time(index):
+    lines = list(index.lines({'thread': '0x2', 'level': 'LOG'}, start=10.0, end=12.5))
+
+    def match(line):
+        timestamp, thread, level, _, _ = parse_line(line)
+        return thread == b'0x2' and level == b'LOG' and 10.0 <= timestamp <= 12.5
+
+    assert lines and lines == scan(index.log, match)
+
+
+def test_query_message_type(index):
+    assert list(index.lines({'type': 'link'})) == scan(index.log, lambda line: b'linked ' in line)
+
+
+def test_query_without_match(index):
+    assert index.blocks({'object': 'nothing'}) == []
+    assert list(index.lines(start=1000.0)) == []
+
+
+def test_keys(index):
+    keys = dict(index.keys('category'))
+    assert set(keys) == {'GST_BUFFER', 'GST_ELEMENT_FACTORY', 'GST_PARENTAGE', 'GST_PADS', 'filesrc'}
+
+
+def test_graph_matches_full_parse(index):
+    assert render(index.graph()) == render(parse_file(index.log, jobs=1))
+
+
+def test_fresh_index_is_not_rebuilt(index):
+    assert index.status() == 'fresh'
+    assert index.update(jobs=1) == 0
+
+
+def test_incremental_update_matches_rebuild(index, make_log, tmp_path, monkeypatch):
+    size = len(open(index.log, 'rb').read())
+    make_log(count=1000, start=200.0, append=True, prefix='late')
+    assert index.status() == 'grown'
+    assert index.update(jobs=1) == len(open(index.log, 'rb').read()) - size
+
+    # Rebuild from scratch on the process pool, in several chunks
+    monkeypatch.setattr(gst_log_index, 'CHUNK_SIZE', 256 * 1024)
+    rebuilt = LogIndex(index.log, str(tmp_path / 'rebuilt.gstidx'))
+    rebuilt.update(jobs=2)
+    try:
+        for filters, start, end in [({'object': 'queue3'}, None, None), ({'type': 'add'}, None, None),
+                                    ({'thread': '0x1'}, 199.0, 201.0), ({}, 205.0, None)]:
+            assert list(index.lines(filters, start, end)) == list(rebuilt.lines(filters, start, end))
+        # Block counts depend on where the blocks were cut, the keys do not
+        assert {key for key, _ in index.keys('object')} == {key for key, _ in rebuilt.keys('object')}
+        assert render(index.graph()) == render(parse_file(index.log, jobs=1))
+    finally:
+        rebuilt.close()
+
+
+def test_partial_last_line_is_indexed_once_complete(index):
+    line = b'0:05:00.000000000 100 0x9 LOG  GST_BUFFER gstbuffer.c:1:f:<queue42> tail\n'
+    with open(index.log, 'ab') as f:
+        f.write(line[:30])
+    index.update(jobs=1)
+    assert list(index.lines({'thread': '0x9'})) == []
+    with open(index.log, 'ab') as f:
+        f.write(line[30:])
+    index.update(jobs=1)
+    assert list(index.lines({'thread': '0x9'})) == [line]
+
+
+def test_rewritten_log_is_rebuilt(index, make_log):
+    make_log(count=20000, prefix='other')
+    assert index.status() == 'stale'
+    index.update(jobs=1)
+    assert list(index.lines({'type': 'add'})) == scan(index.log, lambda line: b'adding element ' in line)
+    assert not list(index.lines({'object': 'el0'}))
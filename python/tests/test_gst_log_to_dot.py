@@ -0,0 +1,179 @@
+import gzip
+import io
+import lzma
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import gst_log_to_dot
+from gst_log_to_dot import LogFollower, PipelineGraph, open_log, parse_file, parse_stream
+
+
+def render(graph):
+    out = io.StringIO()
+    graph.write_dot(out)
+    return out.getvalue()
+
+
+def sequential(path):
+    """Reference graph, fed line by line."""
+    graph = PipelineGraph()
+    with open(path) as f:
+        for line in f:
+            graph.feed(line)
+    return render(graph)
+
+
+def test_graph_content(make_log):
+    dot = sequential(make_log(count=200))
+    assert 'subgraph cluster_bin0' in dot
+    assert 'el0_src -> el5_sink' in dot
+    assert 'file:///media/input.mkv' in dot
+
+
+def test_single_chunk_matches_sequential(make_log):
+    path = make_log()
+    assert render(parse_file(str(path), jobs=1)) == sequential(path)
+    assert render(parse_file(str(path), jobs=4)) == sequential(path)
+
+
+def test_chunked_matches_sequential(make_log, monkeypatch):
+    path = make_log(count=5000)
+    # Force many chunks, so both the inline and the pool paths split the log
+    monkeypatch.setattr(gst_log_to_dot, 'CHUNK_SIZE', 4096)
+    assert render(parse_file(str(path), jobs=1)) == sequential(path)
+    assert render(parse_file(str(path), jobs=3)) == sequential(path)
+
+
+def test_size_limits_the_parse(make_log):
+    path = make_log(count=100)
+    data = path.read_bytes()
+    size = data.index(b'linked el5:src')
+    partial = path.with_name('partial.log')
+    partial.write_bytes(data[:size])
+    assert render(parse_file(str(path), jobs=1, size=size)) == sequential(partial)
+
+
+def test_empty_log(tmp_path):
+    path = tmp_path / 'empty.log'
+    path.write_bytes(b'')
+    assert render(parse_file(str(path))) == render(PipelineGraph())
+
+
+def _zstd(data):
+    try:
+        import zstandard
+    except ImportError:
+        if not shutil.which('zstd'):
+            pytest.skip('needs the zstandard module or the zstd tool')
+        return subprocess.run(['zstd', '-cq'], input=data, stdout=subprocess.PIPE, check=True).stdout
+    return zstandard.ZstdCompressor().compress(data)
+
+
+COMPRESSORS = {'gzip': gzip.compress, 'xz': lzma.compress, 'zstd': _zstd}
+
+
+@pytest.mark.parametrize('compression', sorted(COMPRESSORS))
+def test_compressed_matches_plain(make_log, compression):
+    path = make_log()
+    # No telling file extension, the format is found from the magic bytes
+    compressed = path.with_name('compressed.log')
+    compressed.write_bytes(COMPRESSORS[compression](path.read_bytes()))
+    assert gst_log_to_dot.is_compressed(str(compressed))
+    assert render(parse_file(str(compressed))) == sequential(path)
+
+
+def test_zstd_multiple_frames(make_log):
+    path = make_log()
+    data = path.read_bytes()
+    compressed = path.with_name('rotated.log.zst')
+    compressed.write_bytes(_zstd(data[:len(data) // 2]) + _zstd(data[len(data) // 2:]))
+    assert render(parse_file(str(compressed))) == sequential(path)
+
+
+def test_corrupt_zstd_raises_runtime_error(make_log):
+    _zstd(b'')
+    corrupt = make_log().with_name('corrupt.log.zst')
+    # zstd magic followed by an invalid frame header
+    corrupt.write_bytes(b'\x28\xb5\x2f\xfd' + bytes(range(256)) * 16)
+    with pytest.raises(RuntimeError):
+        parse_file(str(corrupt))
+
+
+def test_truncated_gzip_raises(make_log):
+    path = make_log()
+    truncated = path.with_name('truncated.log.gz')
+    truncated.write_bytes(gzip.compress(path.read_bytes())[:-100])
+    with pytest.raises(EOFError):
+        parse_file(str(truncated))
+
+
+def _truncate(data):
+    return data[:-100]
+
+
+def _corrupt(data):
+    # The first deflate block, right after the 10 byte gzip header, gets an invalid block type
+    return data[:10] + b'\xff' + data[11:]
+
+
+@pytest.mark.parametrize('damage', [_truncate, _corrupt])
+def test_damaged_gzip_exits_with_error(make_log, monkeypatch, capsys, damage):
+    path = make_log()
+    damaged = path.with_name('damaged.log.gz')
+    damaged.write_bytes(damage(gzip.compress(path.read_bytes())))
+    monkeypatch.setattr(sys, 'argv', ['gst_log_to_dot.py', str(damaged), str(path.with_name('out.dot'))])
+    with pytest.raises(SystemExit) as exit_info:
+        gst_log_to_dot.main()
+    assert exit_info.value.code == 1
+    assert f'Could not read {damaged}' in capsys.readouterr().err
+
+
+def test_stream_matches_file(make_log):
+    path = make_log()
+    graph = PipelineGraph()
+    with open_log(str(path)) as f:
+        parse_stream(f, graph)
+    assert render(graph) == sequential(path)
+
+
+def test_follower_picks_up_appended_lines(make_log):
+    path = make_log(count=500)
+    follower = LogFollower(str(path), offset=0)
+    try:
+        assert follower.poll()
+        make_log(count=500, start=5.0, append=True, prefix='late')
+        assert follower.poll()
+        assert not follower.poll()
+        assert render(follower.graph) == sequential(path)
+    finally:
+        follower.close()
+
+
+def test_follower_waits_for_complete_lines(tmp_path):
+    path = tmp_path / 'live.log'
+    line = b'0:00:00.000000000 1 0x1 DEBUG GST_PARENTAGE gstbin.c:1:f:<bin0> adding element el0 to bin bin0\n'
+    path.write_bytes(line[:40])
+    follower = LogFollower(str(path))
+    try:
+        assert not follower.poll()
+        with open(path, 'ab') as f:
+            f.write(line[40:])
+        assert follower.poll()
+        assert follower.graph.elements
+    finally:
+        follower.close()
+
+
+def test_follower_restarts_on_truncation(make_log):
+    path = make_log(count=500)
+    follower = LogFollower(str(path))
+    try:
+        follower.poll()
+        make_log(count=50, prefix='new')
+        assert follower.poll()
+        assert render(follower.graph) == sequential(path)
+    finally:
+        follower.close()
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from video_remux_batch import collect_inputs, find_collisions, output_path_for
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    for name in ('a/clip.mp4', 'b/clip.mp4', 'b/deep/other.mkv', 'c/clip.mkv', 'notes.txt'):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'media')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def relative_paths(inputs):
+    return sorted(str(rel) for _, rel in inputs)
+
+
+def test_directory_inputs_keep_their_layout(tree):
+    assert relative_paths(collect_inputs(['b'], recursive=True)) == ['clip.mp4', 'deep/other.mkv']
+    assert relative_paths(collect_inputs(['b'])) == ['clip.mp4']
+
+
+def test_glob_inputs_are_relative_to_the_pattern_root(tree):
+    assert relative_paths(collect_inputs(['*/clip.mp4'])) == ['a/clip.mp4', 'b/clip.mp4']
+    assert relative_paths(collect_inputs([str(tree / '*' / 'clip.mp4')])) == ['a/clip.mp4', 'b/clip.mp4']
+    assert relative_paths(collect_inputs(['b/**/*.mkv'], recursive=True)) == ['deep/other.mkv']
+
+
+def test_manifest_and_duplicates(tree):
+    manifest = tree / 'list.txt'
+    manifest.write_text('# inputs\na/clip.mp4\n\na/clip.mp4\n')
+    inputs = collect_inputs([str(tree / 'a' / 'clip.mp4')], manifest=str(manifest))
+    assert [str(path) for path, _ in inputs] == [str(tree / 'a' / 'clip.mp4')]
+
+
+def test_files_with_the_same_name_collide(tree):
+    inputs = collect_inputs(['a/clip.mp4', 'b/clip.mp4'])
+    jobs = [(path, output_path_for(path, rel, Path('out'))) for path, rel in inputs]
+    assert list(find_collisions(jobs).values()) == [[Path('a/clip.mp4'), Path('b/clip.mp4')]]
+
+
+def test_target_format_can_make_outputs_collide(tree):
+    inputs = collect_inputs(['a/clip.mp4', 'c/clip.mkv'])
+    assert not find_collisions([(path, output_path_for(path, rel, Path('out'))) for path, rel in inputs])
+    jobs = [(path, output_path_for(path, rel, Path('out'), 'webm')) for path, rel in inputs]
+    assert len(find_collisions(jobs)) == 1
+
+
+def test_output_never_overwrites_the_input(tree):
+    path = Path('a/clip.mp4')
+    assert output_path_for(path, Path('clip.mp4'), Path('a')) == Path('a/clip_copy.mp4')
@@ -0,0 +1,51 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+import video_remux_bench
+from video_remux_bench import compare
+
+
+def result(codec='x264enc', fps=100.0, cpu_time=10.0, output_size=1000000, success=True):
+    return {'resolution': '1280x720', 'duration': 10, 'codec': codec, 'preset': 'medium', 'container': 'mp4',
+            'success': success, 'fps': fps, 'cpu_time': cpu_time, 'output_size': output_size}
+
+
+def report(*results):
+    return {'meta': {'gstreamer': 'GStreamer 1.22.0', 'date': '2024-01-01'}, 'results': list(results)}
+
+
+def test_compare_within_threshold(capsys):
+    assert compare(report(result()), report(result(fps=96.0, cpu_time=10.4, output_size=1040000)), 5.0)
+    assert 'REGRESSION' not in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('changes', [{'fps': 90.0}, {'cpu_time': 11.0}, {'output_size': 1100000}])
+def test_compare_flags_regressions(capsys, changes):
+    assert not compare(report(result()), report(result(**changes)), 5.0)
+    assert 'REGRESSION' in capsys.readouterr().out
+
+
+def test_compare_new_and_failed_cases(capsys):
+    baseline = report(result(), result(codec='vp9enc', success=False))
+    assert compare(baseline, report(result(), result(codec='x265enc'), result(codec='vp9enc', success=False)), 5.0)
+    assert re.search(r'x265enc medium mp4 +new', capsys.readouterr().out)
+    assert not compare(baseline, report(result(success=False)), 5.0)
+    assert 'FAILED (passed in baseline)' in capsys.readouterr().out
+
+
+def test_measure_collects_a_large_stderr(monkeypatch):
+    popen = subprocess.Popen
+
+    def chatty(args, **kwargs):
+        # More error output than a pipe holds, the process must not block on it
+        script = 'import sys; sys.stderr.write("e" * 1000000); sys.exit(1)'
+        return popen([sys.executable, '-c', script], **kwargs)
+
+    monkeypatch.setattr(video_remux_bench.subprocess, 'Popen', chatty)
+    run = video_remux_bench.measure('videotestsrc ! fakesink')
+    assert not run['success']
+    assert run['error'] == 'e' * 1000000
+    assert run['cpu_user'] >= 0 and run['peak_rss_kb'] > 0
@@ -0,0 +1,753 @@
+import io
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import video_remux_gstlaunch
+from video_remux_gstlaunch import (CapabilityRegistry, KeyframeIndex, OutputCache, PipelineProfile, PipelineTuning,
+                                   ProbeCache, RemuxJob, VideoRemuxer, content_fingerprint, parse_timestamp)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Keep sidecars that fall back to the cache directory out of the user cache
+    monkeypatch.setattr(video_remux_gstlaunch, 'default_cache_dir', lambda: tmp_path / 'cache')
+
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / 'input.mkv'
+    path.write_bytes(bytes(range(256)) * 4096)
+    return path
+
+
+@pytest.mark.parametrize('value, seconds', [
+    ('90', 90.0), ('1.5', 1.5), ('01:30', 90.0), ('1:02:03.250', 3723.25), ('0:00:00', 0.0),
+])
+def test_parse_timestamp(value, seconds):
+    assert parse_timestamp(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize('value', ['', 'abc', '-1', '1:2:3:4', '1:xx'])
+def test_parse_timestamp_invalid(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+
+
+def test_content_fingerprint(tmp_path, media):
+    copy = tmp_path / 'copy.mkv'
+    copy.write_bytes(media.read_bytes())
+    assert content_fingerprint(copy) == content_fingerprint(media)
+    data = bytearray(media.read_bytes())
+    data[0] ^= 1
+    copy.write_bytes(bytes(data))
+    assert content_fingerprint(copy) != content_fingerprint(media)
+
+
+def test_probe_cache_round_trip(tmp_path, media):
+    cache = ProbeCache(str(tmp_path / 'probe.sqlite'))
+    assert cache.get(media) is None
+    cache.put(media, {'duration': 12.5})
+    assert cache.get(media) == {'duration': 12.5}
+    # An edited file is probed again
+    media.write_bytes(b'changed')
+    assert cache.get(media) is None
+    cache.close()
+
+
+def test_probe_cache_eviction(tmp_path):
+    cache = ProbeCache(str(tmp_path / 'probe.sqlite'), max_entries=2)
+    files = []
+    for i in range(3):
+        path = tmp_path / f'{i}.mkv'
+        path.write_bytes(b'x' * (i + 1))
+        cache.put(path, {'i': i})
+        files.append(path)
+    assert cache.get(files[0]) is None
+    assert cache.get(files[2]) == {'i': 2}
+    cache.close()
+
+
+def test_probe_cache_size_cap(tmp_path):
+    cache = ProbeCache(str(tmp_path / 'probe.sqlite'), max_size=2500)
+    files = []
+    for i in range(3):
+        path = tmp_path / f'{i}.mkv'
+        path.write_bytes(b'x' * (i + 1))
+        cache.put(path, {'i': i, 'tags': 'x' * 1000})
+        files.append(path)
+    assert cache.get(files[0]) is None
+    assert cache.get(files[1])['i'] == 1
+    assert cache.get(files[2])['i'] == 2
+    cache.close()
+
+
+# gst-discoverer-1.0 -v output (GStreamer 1.22) for an MKV file with H.264 video and AAC audio
+DISCOVERER_OUTPUT = """\
+Analyzing file:///media/input.mkv
+Done discovering file:///media/input.mkv
+
+Properties:
+  Duration: 0:00:10.010000000
+  Seekable: yes
+  Live: no
+  Tags: 
+      video codec: H.264 / AVC
+      audio codec: MPEG-4 AAC
+      encoder: Lavf60.3.100
+      container format: Matroska
+  container #0: video/x-matroska
+    Tags:
+      encoder: Lavf60.3.100
+      container format: Matroska
+
+    video #1: video/x-h264, level=(string)4, profile=(string)high, codec_data=(buffer)01640028ffe1001b67640028acd940780227e5c044000003000400000300f03c60c65801000668ebe3cb22c0, stream-format=(string)avc, alignment=(string)au, width=(int)1920, height=(int)1080, pixel-aspect-ratio=(fraction)1/1, framerate=(fraction)30/1, interlace-mode=(string)progressive, chroma-format=(string)4:2:0, bit-depth-luma=(uint)8, bit-depth-chroma=(uint)8, parsed=(boolean)true
+      Stream ID: 8d6b0e56cc5f2c9a9b4e1c3d0a7f2e61c0d6a5b3e4f1d2c3b4a5968778695a4b/001:1
+      Tags:
+        video codec: H.264 / AVC
+        encoder: Lavc60.3.100 libx264
+        duration: 0:00:10.010000000
+      Codec:
+        video/x-h264, level=(string)4, profile=(string)high, codec_data=(buffer)01640028ffe1001b67640028acd940780227e5c044000003000400000300f03c60c65801000668ebe3cb22c0, stream-format=(string)avc, alignment=(string)au, width=(int)1920, height=(int)1080, pixel-aspect-ratio=(fraction)1/1, framerate=(fraction)30/1, interlace-mode=(string)progressive, chroma-format=(string)4:2:0, bit-depth-luma=(uint)8, bit-depth-chroma=(uint)8, parsed=(boolean)true
+      Width: 1920
+      Height: 1080
+      Depth: 24
+      Frame rate: 30/1
+      Pixel aspect ratio: 1/1
+      Interlaced: false
+      Bitrate: 0
+      Max bitrate: 0
+
+    audio #2: audio/mpeg, mpegversion=(int)4, framed=(boolean)true, stream-format=(string)raw, level=(string)2, base-profile=(string)lc, profile=(string)lc, codec_data=(buffer)1190, rate=(int)48000, channels=(int)2
+      Stream ID: 8d6b0e56cc5f2c9a9b4e1c3d0a7f2e61c0d6a5b3e4f1d2c3b4a5968778695a4b/002:2
+      Tags:
+        audio codec: MPEG-4 AAC
+        language code: en
+        encoder: Lavc60.3.100 aac
+      Codec:
+        audio/mpeg, mpegversion=(int)4, framed=(boolean)true, stream-format=(string)raw, level=(string)2, base-profile=(string)lc, profile=(string)lc, codec_data=(buffer)1190, rate=(int)48000, channels=(int)2
+      Language: en
+      Channels: 2 (front-left, front-right)
+      Sample rate: 48000
+      Depth: 32
+      Bitrate: 0
+      Max bitrate: 0
+"""
+
+
+def test_parse_discoverer_output():
+    info = VideoRemuxer._parse_discoverer_output(DISCOVERER_OUTPUT)
+    assert info['duration'] == pytest.approx(10.01)
+    assert info['container'] == 'video/x-matroska'
+    video, audio = info['streams']
+    assert video['codec_type'] == 'video' and video['codec_name'] == 'video/x-h264'
+    assert video['caps'].startswith('video/x-h264, level=(string)4,')
+    assert (video['width'], video['height'], video['framerate']) == (1920, 1080, 30.0)
+    assert audio['codec_type'] == 'audio' and audio['codec_name'] == 'audio/mpeg'
+    assert (audio['channels'], audio['sample_rate']) == (2, 48000)
+    assert VideoRemuxer._caps_family(video['caps']) == 'h264'
+    assert VideoRemuxer._caps_family(audio['caps']) == 'aac'
+
+    # Caps are still found under "Codec:" when the header carries a codec description
+    described = re.sub(r'(?m)^(    video #1: ).*$', r'\1H.264 (High Profile)', DISCOVERER_OUTPUT)
+    video = VideoRemuxer._parse_discoverer_output(described)['streams'][0]
+    assert video['codec_name'] == 'H.264 (High Profile)'
+    assert video['caps'] == info['streams'][0]['caps']
+
+
+def test_probe_cache_shared_across_threads(tmp_path):
+    cache = ProbeCache(str(tmp_path / 'probe.sqlite'))
+    files = []
+    for i in range(8):
+        path = tmp_path / f'{i}.mkv'
+        path.write_bytes(b'x' * (i + 1))
+        files.append(path)
+
+    def probe(i):
+        path = files[i % len(files)]
+        cache.put(path, {'i': i % len(files)})
+        return cache.get(path)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(probe, range(200)))
+    assert results == [{'i': i % len(files)} for i in range(200)]
+    cache.close()
+
+
+def test_output_cache_store_and_fetch(tmp_path, media):
+    cache = OutputCache(str(tmp_path / 'outputs'))
+    key = cache.key(media, 'settings')
+    assert cache.key(media, 'other settings') != key
+    output = tmp_path / 'output.mp4'
+    assert not cache.fetch(key, output)
+
+    output.write_bytes(b'remuxed' * 1000)
+    cache.store(key, output)
+    output.unlink()
+    assert cache.fetch(key, output)
+    assert output.read_bytes() == b'remuxed' * 1000
+    cache.close()
+
+
+def test_output_cache_drops_corrupted_entries(tmp_path, media):
+    cache = OutputCache(str(tmp_path / 'outputs'))
+    key = cache.key(media, 'settings')
+    output = tmp_path / 'output.mp4'
+    output.write_bytes(b'remuxed' * 1000)
+    cache.store(key, output)
+    output.unlink()
+    cache._object(key).write_bytes(b'truncated')
+    assert not cache.fetch(key, output)
+    assert not output.exists()
+    assert not cache._object(key).exists()
+    cache.close()
+
+
+def test_output_cache_eviction(tmp_path, media):
+    cache = OutputCache(str(tmp_path / 'outputs'), max_size=2500)
+    keys = []
+    for i in range(3):
+        output = tmp_path / f'{i}.mp4'
+        output.write_bytes(bytes([i]) * 1000)
+        keys.append(cache.key(media, str(i)))
+        cache.store(keys[-1], output)
+    assert not cache.fetch(keys[0], tmp_path / 'again.mp4')
+    assert cache.fetch(keys[2], tmp_path / 'again.mp4')
+    cache.close()
+
+
+def test_output_cache_shared_across_threads(tmp_path, media):
+    cache = OutputCache(str(tmp_path / 'outputs'))
+
+    def job(i):
+        key = cache.key(media, str(i % 4))
+        output = tmp_path / f'out{i}.mp4'
+        if not cache.fetch(key, output):
+            output.write_bytes(str(i % 4).encode() * 100)
+            cache.store(key, output)
+        return output.read_bytes()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(job, range(64)))
+    assert results == [str(i % 4).encode() * 100 for i in range(64)]
+    cache.close()
+
+
+def _remuxer(media, **options):
+    remuxer = VideoRemuxer(str(media), output_format='mkv', backend='launch', **options)
+    remuxer.info = {'duration': 10.0, 'streams': [
+        {'codec_type': 'video', 'codec_name': 'h264', 'width': 1920, 'height': 1080, 'framerate': 30.0},
+        {'codec_type': 'audio', 'codec_name': 'aac'},
+    ]}
+    return remuxer
+
+
+def test_cache_settings_ignore_concurrency_of_copies(media):
+    streams = {'video', 'audio'}
+    single = _remuxer(media, concurrency=1)
+    packed = _remuxer(media, concurrency=8)
+    assert single._cache_settings(streams) == packed._cache_settings(streams)
+
+
+def test_cache_settings_follow_encoder_threads(media):
+    # Frame-threaded encoders produce a different output for each thread count
+    streams = {'video', 'audio'}
+    two = _remuxer(media, video_codec='x264enc', threads=2)._cache_settings(streams)
+    assert _remuxer(media, video_codec='x264enc', threads=4)._cache_settings(streams) != two
+    assert _remuxer(media, video_codec='x264enc', threads=2, concurrency=8)._cache_settings(streams) == two
+
+
+def test_cache_settings_follow_output_options(media):
+    streams = {'video', 'audio'}
+    base = _remuxer(media, video_codec='x264enc')._cache_settings(streams)
+    assert _remuxer(media, video_codec='x264enc', preset='slow')._cache_settings(streams) != base
+    assert _remuxer(media, video_codec='x264enc', resolution='640x360')._cache_settings(streams) != base
+    assert _remuxer(media, video_codec='x264enc', start=5.0)._cache_settings(streams) != base
+    assert _remuxer(media)._cache_settings(streams) != base
+
+
+def test_keyframe_index_sidecar(media):
+    index = KeyframeIndex([0.0, 2.0, 4.0, 6.0], duration=8.0)
+    assert index.save(media) == media.with_name(f'.{media.name}.keyframes.json')
+    loaded = KeyframeIndex.load(media)
+    assert loaded.keyframes == [0.0, 2.0, 4.0, 6.0]
+    assert loaded.duration == 8.0
+    assert loaded.keyframe_before(3.9) == 2.0
+    assert loaded.keyframe_before(4.0) == 4.0
+    assert loaded.keyframe_before(-1.0) == 0.0
+    # A changed input invalidates the sidecar
+    media.write_bytes(b'other content')
+    assert KeyframeIndex.load(media) is None
+
+
+def test_remux_job_failure_ends_with_event_and_restores_output(media, monkeypatch):
+    def fail(self, **kwargs):
+        print("starting")
+        raise OSError('disk full')
+
+    monkeypatch.setattr(VideoRemuxer, 'remux', fail)
+    stdout, stderr = sys.stdout, sys.stderr
+    job = RemuxJob(str(media), output_format='mkv', backend='launch')
+    events = list(job.events())
+    assert [event['event'] for event in events] == ['end']
+    assert events[0]['success'] is False
+    assert 'disk full' in events[0]['error']
+    assert not job.result.success
+    assert 'starting' in job.result.log
+    assert (sys.stdout, sys.stderr) == (stdout, stderr)
+
+
+def test_concurrent_jobs_keep_separate_logs(media, monkeypatch):
+    barrier = threading.Barrier(4)
+
+    def remux(self, **kwargs):
+        barrier.wait()
+        print(f"job {self.output_file.name}")
+        return False
+
+    monkeypatch.setattr(VideoRemuxer, 'remux', remux)
+    jobs = [RemuxJob(str(media), output_file=str(media.with_name(f'{i}.mkv')), backend='launch') for i in range(4)]
+    threads = [threading.Thread(target=job.run) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i, job in enumerate(jobs):
+        assert job.result.log == f"job {i}.mkv\n"
+    assert not isinstance(sys.stdout, video_remux_gstlaunch._ThreadOutput)
+
+
+def test_progress_json_on_stdout_carries_only_events(media, tmp_path, monkeypatch, capsys):
+    def run(self, pipeline, verbose, env, reporter):
+        print("pipeline running")
+        for position in (2.5, 5.0, 7.5):
+            reporter.update(position)
+        return True, None
+
+    monkeypatch.setattr(VideoRemuxer, '_resolve_backend', lambda self: 'launch')
+    monkeypatch.setattr(VideoRemuxer, 'check_gstreamer', lambda self: True)
+    monkeypatch.setattr(VideoRemuxer, '_check_elements', lambda self: True)
+    monkeypatch.setattr(VideoRemuxer, 'get_video_info', lambda self: _remuxer(media).info)
+    monkeypatch.setattr(VideoRemuxer, '_run_gst_launch', run)
+    output = tmp_path / 'output.mkv'
+    output.write_bytes(b'remuxed')
+    monkeypatch.setattr(sys, 'argv', ['video_remux_gstlaunch.py', str(media), '-o', str(output), '--overwrite',
+                                      '--no-probe-cache', '--no-encoder-selection', '--progress-json', '-'])
+    with pytest.raises(SystemExit) as exit_info:
+        video_remux_gstlaunch.main()
+    assert exit_info.value.code == 0
+
+    out, err = capsys.readouterr()
+    events = [json.loads(line) for line in out.splitlines()]
+    assert [event['event'] for event in events] == ['start', 'progress', 'end']
+    assert events[-1]['success'] is True
+    assert 'pipeline running' in err and '\r' not in err
+
+
+# GST_TRACER records of the stats, latency and rusage tracers (GStreamer 1.22) and of the
+# GstShark proctime and queuelevel tracers
+TRACER_LOG = """\
+0:00:00.029379427 48211 0x5581c2a3e0a0 TRACE GST_TRACER :0:: new-element, thread-id=(guint64)140166862378560, ts=(guint64)29379427, ix=(uint)1, parent-ix=(uint)0, name=(string)x264enc0, type=(string)GstX264Enc, is-bin=(boolean)0;
+0:00:00.029412301 48211 0x5581c2a3e0a0 TRACE GST_TRACER :0:: new-element, thread-id=(guint64)140166862378560, ts=(guint64)29412301, ix=(uint)2, parent-ix=(uint)0, name=(string)queue0, type=(string)GstQueue, is-bin=(boolean)0;
+0:00:00.500000000 48211 0x7f7b3c0016a0 TRACE GST_TRACER :0:: buffer, thread-id=(guint64)140166795327040, ts=(guint64)500000000, index=(uint)0, pad-ix=(uint)7, element-ix=(uint)1, peer-pad-ix=(uint)9, peer-element-ix=(uint)2, buffer-size=(uint)4413, buffer-pts=(guint64)0, buffer-dts=(guint64)18446744073709551615, buffer-duration=(guint64)33333333, buffer-flags=(GstBufferFlags)discont, buffer-offset=(guint64)18446744073709551615, buffer-offset-end=(guint64)18446744073709551615;
+0:00:00.533333333 48211 0x7f7b3c0016a0 TRACE GST_TRACER :0:: buffer, thread-id=(guint64)140166795327040, ts=(guint64)533333333, index=(uint)1, pad-ix=(uint)7, element-ix=(uint)1, peer-pad-ix=(uint)9, peer-element-ix=(uint)2, buffer-size=(uint)1877, buffer-pts=(guint64)33333333, buffer-dts=(guint64)18446744073709551615, buffer-duration=(guint64)33333333, buffer-flags=(GstBufferFlags)delta-unit, buffer-offset=(guint64)18446744073709551615, buffer-offset-end=(guint64)18446744073709551615;
+0:00:00.500100000 48211 0x7f7b3c0016a0 TRACE GST_TRACER :0:: proctime, element=(string)x264enc0, time=(string)0:00:00.006000000;
+0:00:00.533400000 48211 0x7f7b3c0016a0 TRACE GST_TRACER :0:: proctime, element=(string)x264enc0, time=(string)0:00:00.004000000;
+0:00:00.500200000 48211 0x7f7b3c0016a0 TRACE GST_TRACER :0:: element-latency, element-id=(string)0x5581c2b0a120, element=(string)x264enc0, src=(string)src, time=(guint64)12000000, ts=(guint64)500200000;
+0:00:00.510000000 48211 0x7f7b3c001720 TRACE GST_TRACER :0:: queuelevel, queue=(string)queue0, size_bytes=(uint)0, max_size_bytes=(uint)10485760, size_buffers=(uint)50, max_size_buffers=(uint)200, size_time=(guint64)0, max_size_time=(guint64)1000000000;
+0:00:00.520000000 48211 0x7f7b3c001720 TRACE GST_TRACER :0:: queuelevel, queue=(string)queue0, size_bytes=(uint)0, max_size_bytes=(uint)10485760, size_buffers=(uint)150, max_size_buffers=(uint)200, size_time=(guint64)0, max_size_time=(guint64)1000000000;
+0:00:01.000000000 48211 0x7f7b3c0016a0 TRACE GST_TRACER :0:: thread-rusage, thread-id=(guint64)140166795327040, ts=(guint64)1000000000, average-cpuload=(uint)873, current-cpuload=(uint)901, time=(guint64)873000000;
+0:00:01.000000000 48211 0x7f7b3c0016a0 TRACE GST_TRACER :0:: proc-rusage, thread-id=(guint64)140166795327040, ts=(guint64)1000000000, average-cpuload=(uint)1520, current-cpuload=(uint)1610, time=(guint64)1520000000;
+"""
+
+
+def test_pipeline_profile_report(tmp_path):
+    log = tmp_path / 'trace.log'
+    log.write_text(TRACER_LOG)
+    report = PipelineProfile().parse(log).report()
+    assert report['duration'] == pytest.approx(0.970620573, abs=1e-3)
+    assert report['process_cpu'] == 152.0
+
+    encoder = report['elements'][0]
+    assert encoder['element'] == 'x264enc0'
+    assert encoder['buffers'] == 2
+    assert encoder['proctime'] == 0.01
+    assert encoder['proctime_per_buffer_ms'] == 5.0
+    assert encoder['latency_ms'] == 12.0
+    assert encoder['share'] == 100.0
+    assert encoder['thread'] == '140166795327040'
+
+    assert report['queues'] == [{'queue': 'queue0', 'average_fill': 50.0, 'max_fill': 75.0}]
+    assert report['threads'] == [{'thread': '140166795327040', 'cpu': 87.3, 'elements': ['x264enc0']}]
+    assert report['folded'] == ['140166795327040;x264enc0 10000']
+
+
+def test_pipeline_profile_env_leaves_out_missing_tracers(tmp_path):
+    env = PipelineProfile.env(tmp_path / 'trace.log', ['proctime', 'queuelevel'])
+    assert env['GST_TRACERS'] == 'latency(flags=element);rusage;stats'
+    assert 'proctime' in PipelineProfile.env(tmp_path / 'trace.log')['GST_TRACERS']
+
+
+def test_process_environ_is_shared_and_restored(monkeypatch):
+    monkeypatch.setenv('LIBVA_DRIVER_NAME', 'i965')
+    monkeypatch.delenv('GST_VAAPI_DRM_DEVICE', raising=False)
+    with video_remux_gstlaunch._process_environ({'LIBVA_DRIVER_NAME': 'iHD', 'GST_VAAPI_DRM_DEVICE': '/dev/dri/a'}):
+        with video_remux_gstlaunch._process_environ({'LIBVA_DRIVER_NAME': 'iHD'}):
+            assert os.environ['LIBVA_DRIVER_NAME'] == 'iHD'
+        assert os.environ['LIBVA_DRIVER_NAME'] == 'iHD'
+        assert os.environ['GST_VAAPI_DRM_DEVICE'] == '/dev/dri/a'
+    assert os.environ['LIBVA_DRIVER_NAME'] == 'i965'
+    assert 'GST_VAAPI_DRM_DEVICE' not in os.environ
+
+
+def test_process_environ_waits_for_conflicting_values(monkeypatch):
+    monkeypatch.delenv('LIBVA_DRIVER_NAME', raising=False)
+    seen = []
+    first_set = threading.Event()
+    release = threading.Event()
+
+    def job(value, hold):
+        with video_remux_gstlaunch._process_environ({'LIBVA_DRIVER_NAME': value}):
+            seen.append(os.environ['LIBVA_DRIVER_NAME'])
+            if hold:
+                first_set.set()
+                release.wait(5)
+
+    first = threading.Thread(target=job, args=('iHD', True))
+    first.start()
+    first_set.wait(5)
+    second = threading.Thread(target=job, args=('i965', False))
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+    release.set()
+    first.join()
+    second.join()
+    assert seen == ['iHD', 'i965']
+    assert 'LIBVA_DRIVER_NAME' not in os.environ
+
+
+def _fake_launch_backend(monkeypatch, media, backend='launch'):
+    monkeypatch.setattr(VideoRemuxer, '_resolve_backend', lambda self: backend)
+    monkeypatch.setattr(VideoRemuxer, 'check_gstreamer', lambda self: True)
+    monkeypatch.setattr(video_remux_gstlaunch.GstEngine, 'available', classmethod(lambda cls: True))
+    monkeypatch.setattr(VideoRemuxer, '_check_elements', lambda self: True)
+    monkeypatch.setattr(VideoRemuxer, 'get_video_info', lambda self: _remuxer(media).info)
+
+
+def test_stream_descriptor_closed_on_early_return(media, monkeypatch):
+    def fail(self, stream_types):
+        raise RuntimeError('no keyframe index')
+
+    _fake_launch_backend(monkeypatch, media, backend='gst')
+    monkeypatch.setattr(VideoRemuxer, '_trim_segment', fail)
+    remuxer = VideoRemuxer(str(media), output_format='mkv', stream='-', start=5.0, auto_copy=False)
+    descriptors = len(os.listdir('/proc/self/fd'))
+    assert not remuxer.remux()
+    assert remuxer._stream_fd is None
+    assert len(os.listdir('/proc/self/fd')) == descriptors
+
+
+def test_verbose_gst_launch_output_stays_off_the_stream(media, monkeypatch):
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append((cmd, kwargs))
+        return video_remux_gstlaunch.subprocess.CompletedProcess(cmd, 0)
+
+    _fake_launch_backend(monkeypatch, media)
+    monkeypatch.setattr(video_remux_gstlaunch.subprocess, 'run', run)
+    remuxer = VideoRemuxer(str(media), output_format='mkv', stream='-', auto_copy=False)
+    assert remuxer.remux(verbose=True)
+    cmd, kwargs = calls[-1]
+    assert 'fdsink fd=' in cmd
+    assert kwargs['stdout'] == sys.stderr.fileno()
+    assert remuxer._stream_fd is None
+
+
+def _branches(pipeline):
+    """Source part, video/audio branches and muxer part of a pipeline description."""
+    pipeline, _, muxer = pipeline.partition(' matroskamux name=mux')
+    source, *branches = pipeline.split(' dec. ! ')
+    return source, branches, 'matroskamux name=mux' + muxer
+
+
+def test_pipeline_copies_every_stream_without_decoding(media):
+    remuxer = _remuxer(media, output_file=str(media.with_name('out.mkv')), auto_tune=False)
+    pipeline = remuxer._build_pipeline({'video', 'audio'})
+    source, (video, audio), muxer = _branches(pipeline)
+    assert source == f'filesrc location="{media.resolve()}" ! parsebin name=dec'
+    assert video.startswith('capsfilter caps="video/x-h264;') and video.endswith('" ! queue ! mux.')
+    assert audio.startswith('capsfilter caps="audio/mpeg;') and audio.endswith('" ! queue ! mux.')
+    assert 'decodebin' not in pipeline
+    assert muxer == f'matroskamux name=mux mux. ! filesink location="{media.with_name("out.mkv")}"'
+
+
+def test_pipeline_decodes_only_re_encoded_streams(media):
+    pipeline = _remuxer(media, video_codec='x264enc', auto_tune=False)._build_pipeline({'video', 'audio'})
+    source, (video, audio), _ = _branches(pipeline)
+    assert 'parsebin' in source
+    assert video.split(' ! ')[1:4] == ['queue', 'decodebin', 'videoconvert']
+    assert 'x264enc speed-preset=medium' in video
+    assert 'decodebin' not in audio and 'audioconvert' not in audio
+
+
+def test_pipeline_decodes_everything_when_every_stream_is_re_encoded(media):
+    remuxer = _remuxer(media, video_codec='x264enc', audio_codec='opus', auto_tune=False)
+    source, (video, audio), _ = _branches(remuxer._build_pipeline({'video', 'audio'}))
+    assert source == f'uridecodebin uri="file://{media.resolve()}" name=dec'
+    assert video == 'videoconvert ! x264enc speed-preset=medium ! queue ! mux.'
+    assert audio == 'audioconvert ! audioresample ! opusenc ! queue ! mux.'
+
+
+def test_pipeline_leaves_out_missing_streams(media):
+    remuxer = _remuxer(media, auto_tune=False)
+    _, branches, _ = _branches(remuxer._build_pipeline({'audio'}))
+    assert len(branches) == 1 and branches[0].startswith('capsfilter caps="audio/')
+    _, branches, _ = _branches(remuxer._build_pipeline({'video'}, progress=True))
+    assert len(branches) == 1 and 'progressreport update-freq=1' in branches[0]
+
+
+def test_progress_reporter_events(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(video_remux_gstlaunch.time, 'time', lambda: clock[0])
+    events = []
+    reporter = video_remux_gstlaunch.ProgressReporter(duration=100.0, framerate=25.0, show=False,
+                                                      events=events.append)
+    reporter.start(input='in.mkv')
+    for position in (10.0, 20.0, 30.0):
+        clock[0] += 5.0
+        reporter.update(position)
+    reporter.finish(True)
+
+    assert [event['event'] for event in events] == ['start', 'progress', 'progress', 'progress', 'end']
+    assert events[0]['input'] == 'in.mkv' and events[0]['duration'] == 100.0
+    last = events[3]
+    assert (last['position'], last['percent'], last['elapsed']) == (30.0, 30.0, 15.0)
+    assert last['realtime_factor'] == pytest.approx(2.0, abs=0.1)
+    assert last['fps'] == pytest.approx(50.0, abs=2.5)
+    assert last['eta'] == pytest.approx(35.0, abs=2.0)
+    assert not last['stalled']
+    assert events[-1]['success'] is True and events[-1]['percent'] == 100.0
+
+
+def test_progress_reporter_flags_stalls_and_writes_json_lines(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(video_remux_gstlaunch.time, 'time', lambda: clock[0])
+    out = io.StringIO()
+    reporter = video_remux_gstlaunch.ProgressReporter(show=False, events=out, stall_timeout=10.0)
+    reporter.start()
+    clock[0] += 2.0
+    reporter.update(1.0)
+    clock[0] += 11.0
+    reporter.update(1.0)
+    reporter.finish(False, 'pipeline error')
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [event['event'] for event in events] == ['start', 'progress', 'progress', 'end']
+    assert events[1]['percent'] is None and not events[1]['stalled']
+    assert events[2]['stalled']
+    assert (events[3]['success'], events[3]['error']) == (False, 'pipeline error')
+
+
+def test_progress_reporter_renders_a_status_line(monkeypatch, capsys):
+    clock = [1000.0]
+    monkeypatch.setattr(video_remux_gstlaunch.time, 'time', lambda: clock[0])
+    reporter = video_remux_gstlaunch.ProgressReporter(duration=60.0)
+    reporter.start()
+    clock[0] += 10.0
+    reporter.update(30.0)
+    line = capsys.readouterr().out.split('\r')[-1]
+    assert '50.0%' in line and '00:00:30/00:01:00' in line and 'ETA 00:00:10' in line
+
+
+def test_rendition_spec(media, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rendition = VideoRemuxer.from_rendition_spec('1280x720:libx264:fast', str(media), output_format='mp4',
+                                                 backend='launch')
+    assert (rendition.resolution, rendition.video_codec, rendition.preset) == ('1280x720', 'libx264', 'fast')
+    assert rendition.output_file == tmp_path / 'input_720p.mp4'
+    explicit = VideoRemuxer.from_rendition_spec('640x360:vp9::small.webm', str(media), output_format='mp4',
+                                                backend='launch')
+    assert (explicit.preset, explicit.output_file, explicit.muxer) == ('medium', Path('small.webm'), 'webmmux')
+
+
+@pytest.mark.parametrize('spec', ['libx264', '1280:libx264', '1280x720:libx264:fastest'])
+def test_invalid_rendition_spec(media, spec):
+    with pytest.raises(ValueError):
+        VideoRemuxer.from_rendition_spec(spec, str(media), backend='launch')
+
+
+def test_ladder_pipeline_decodes_once(media, tmp_path):
+    source = _remuxer(media, audio_codec='aac', auto_tune=False)
+    specs = [f'1280x720:libx264:fast:{tmp_path}/720.mkv', f'640x360:libx264:fast:{tmp_path}/360.mkv']
+    renditions = [VideoRemuxer.from_rendition_spec(spec, str(media), backend='launch', auto_tune=False)
+                  for spec in specs]
+    pipeline = source._build_ladder_pipeline(renditions, {'video', 'audio'})
+    assert pipeline.count('decodebin') == 2
+    assert pipeline.count('avenc_aac') == 1
+    assert 'videoconvert ! tee name=vtee' in pipeline and 'tee name=atee' in pipeline
+    for i, (height, width) in enumerate([(720, 1280), (360, 640)]):
+        assert (f'vtee. ! queue ! videoconvert ! videoscale ! video/x-raw,width={width},height={height} ! '
+                f'x264enc speed-preset=veryfast ! queue ! mux{i}.') in pipeline
+        assert f'atee. ! queue ! mux{i}.' in pipeline
+        assert f'matroskamux name=mux{i} mux{i}. ! filesink location="{tmp_path}/{height}.mkv"' in pipeline
+
+
+def test_ladder_pipeline_without_audio(media, tmp_path):
+    renditions = [VideoRemuxer.from_rendition_spec(f'640x360:libx264:fast:{tmp_path}/360.mkv', str(media),
+                                                   backend='launch', auto_tune=False)]
+    pipeline = _remuxer(media, auto_tune=False)._build_ladder_pipeline(renditions, {'video'})
+    assert 'atee' not in pipeline and 'audio/' not in pipeline
+
+
+def _registry(tmp_path, monkeypatch, elements):
+    scans = []
+
+    def scan():
+        scans.append(1)
+        return {name: {'klass': '', 'rank': None} for name in elements}, []
+
+    monkeypatch.setattr(CapabilityRegistry, '_scan_inspect', staticmethod(scan))
+    registry = CapabilityRegistry(str(tmp_path / 'capabilities.json'), backend='launch')
+    return registry, scans
+
+
+def test_capability_registry_is_cached(tmp_path, monkeypatch):
+    monkeypatch.delenv('GST_PLUGIN_PATH', raising=False)
+    registry, scans = _registry(tmp_path, monkeypatch, ['x264enc', 'mp4mux'])
+    assert registry.available and registry.has('x264enc') and not registry.has('x265enc')
+    assert CapabilityRegistry(str(tmp_path / 'capabilities.json'), backend='launch').has('mp4mux')
+    assert len(scans) == 1
+    # A changed plugin path invalidates the cache
+    monkeypatch.setenv('GST_PLUGIN_PATH', str(tmp_path))
+    CapabilityRegistry(str(tmp_path / 'capabilities.json'), backend='launch')
+    assert len(scans) == 2
+
+
+def test_capability_registry_without_gstreamer(tmp_path, monkeypatch):
+    registry, _ = _registry(tmp_path, monkeypatch, [])
+    assert not registry.available
+    # Nothing is known, every element is assumed to be present
+    assert registry.has('x264enc') and registry.caps('mp4mux', 'sink') == []
+
+
+@pytest.mark.parametrize('codec, selected', [
+    ('h264', 'vah264enc'),      # Generic name: fastest implementation
+    ('libx264', 'x264enc'),     # Specific name, available
+    ('libx265', 'x265enc'),     # Specific name, no implementation installed: kept as is
+    ('vp9', 'vp9enc'),
+    ('libvpx', 'vavp8enc'),     # Specific name, missing: falls back to another implementation
+])
+def test_select_encoder(media, tmp_path, monkeypatch, codec, selected):
+    registry, _ = _registry(tmp_path, monkeypatch, ['vah264enc', 'x264enc', 'vp9enc', 'vavp8enc'])
+    remuxer = _remuxer(media, video_codec=codec, capabilities=registry)
+    assert remuxer._get_video_encoder_element() == selected
+
+
+def test_select_encoder_without_registry(media):
+    assert _remuxer(media, video_codec='h264')._get_video_encoder_element() == 'x264enc'
+
+
+@pytest.mark.parametrize('caps, family', [
+    ('video/x-h264, stream-format=(string)avc, alignment=(string)au', 'h264'),
+    ('audio/mpeg, mpegversion=(int)4, stream-format=(string)raw', 'aac'),
+    ('audio/mpeg, mpegversion=(int)1, layer=(int)3', 'mp3'),
+    ('audio/mpeg, mpegversion=(int)1, layer=(int)2', None),
+    ('video/x-theora', None),
+])
+def test_caps_family(caps, family):
+    assert VideoRemuxer._caps_family(caps) == family
+
+
+def _probed(media, output_format, **options):
+    remuxer = VideoRemuxer(str(media), output_format=output_format, backend='launch', **options)
+    remuxer.info = {'duration': 10.0, 'streams': [
+        {'codec_type': 'video', 'codec_name': 'h264', 'width': 1920, 'height': 1080,
+         'caps': 'video/x-h264, stream-format=(string)avc'},
+        {'codec_type': 'audio', 'codec_name': 'aac', 'caps': 'audio/mpeg, mpegversion=(int)4'},
+    ]}
+    return remuxer
+
+
+def test_plan_streams_copies_streams_already_in_the_requested_codec(media):
+    remuxer = _probed(media, 'mp4', video_codec='h264', audio_codec='opus')
+    assert remuxer.plan_streams() == {'video': 'copy', 'audio': 'opus'}
+    assert remuxer.video_codec is None and remuxer.audio_codec == 'opus'
+
+
+def test_plan_streams_re_encodes_scaled_video(media):
+    remuxer = _probed(media, 'mp4', video_codec='h264', resolution='1280x720')
+    assert remuxer.plan_streams() == {'video': 'h264', 'audio': 'copy'}
+    assert remuxer.video_codec == 'h264'
+
+
+def test_plan_streams_re_encodes_what_the_muxer_rejects(media):
+    remuxer = _probed(media, 'webm')
+    assert remuxer.plan_streams() == {'video': 'vp9', 'audio': 'opus'}
+    assert (remuxer.video_codec, remuxer.audio_codec) == ('vp9', 'opus')
+    # Matroska takes any stream
+    assert _probed(media, 'mkv').plan_streams() == {'video': 'copy', 'audio': 'copy'}
+
+
+def test_sink_element(media, tmp_path):
+    output = tmp_path / 'out.mkv'
+    assert _remuxer(media, output_file=str(output))._sink_element() == f'filesink location="{output}"'
+    stdout = _remuxer(media, stream='-')
+    assert stdout._sink_element() == 'fdsink fd=1 sync=false'
+    stdout._stream_fd = 7
+    assert stdout._sink_element() == 'fdsink fd=7 sync=false'
+    tcp = _remuxer(media, stream='tcp://localhost:9000')
+    assert tcp._sink_element() == 'tcpclientsink host=localhost port=9000 sync=false'
+    fifo = tmp_path / 'live.fifo'
+    assert (_remuxer(media, stream=str(fifo))._sink_element()
+            == f'filesink location="{fifo}" buffer-mode=unbuffered sync=false')
+
+
+@pytest.mark.parametrize('target', ['tcp://:9000', 'tcp://localhost', 'tcp://localhost:http'])
+def test_sink_element_rejects_invalid_tcp_targets(media, target):
+    with pytest.raises(ValueError, match='tcp://HOST:PORT'):
+        _remuxer(media, stream=target)._sink_element()
+
+
+def test_pipeline_tuning_shares_the_cores():
+    tuning = PipelineTuning(1920, 1080, 30.0, cores=8, concurrency=3)
+    assert tuning.encoder_threads == 2
+    assert PipelineTuning(1920, 1080, cores=2, concurrency=4).encoder_threads == 1
+
+
+def test_pipeline_tuning_queues():
+    tuning = PipelineTuning(1920, 1080, 30.0, bitrate=8000000, cores=4)
+    frame = 1920 * 1080 * 3 // 2
+    assert tuning.queue('raw') == f'queue max-size-buffers=8 max-size-bytes={8 * frame} max-size-time=0'
+    # 1.5 times the two seconds held, at least 2 MiB
+    assert tuning.queue('compressed') == 'queue max-size-buffers=0 max-size-bytes=3000000 max-size-time=2000000000'
+    assert 'max-size-bytes=2097152 ' in PipelineTuning(640, 360, 24.0, bitrate=500000).queue('compressed')
+    assert PipelineTuning(640, 360, 8.0).raw_queue_frames == 2
+
+
+def test_pipeline_tuning_memory_ceiling():
+    copy = PipelineTuning(1920, 1080, 30.0, bitrate=8000000, cores=4)
+    assert copy.memory_ceiling({'compressed': 2}) == 2 * 3000000
+    scaled = PipelineTuning(1920, 1080, 30.0, bitrate=8000000, output_width=1280, output_height=720,
+                            encoder='x264enc', cores=4)
+    frame, output_frame = 1920 * 1080 * 3 // 2, 1280 * 720 * 3 // 2
+    assert scaled.memory_ceiling({'raw': 1, 'compressed': 2}) == (
+        8 * frame + 2 * 3000000 + 16 * frame + (40 + 4) * output_frame)
+
+
+def test_tuned_pipeline(media, monkeypatch):
+    monkeypatch.setattr(video_remux_gstlaunch.os, 'cpu_count', lambda: 8)
+    remuxer = _remuxer(media, video_codec='x264enc', resolution='1280x720', concurrency=2)
+    tuning = remuxer.tuning
+    assert (tuning.encoder, tuning.output_frame_bytes, tuning.encoder_threads) == ('x264enc', 1280 * 720 * 3 // 2, 4)
+    _, (video, audio), _ = _branches(remuxer._build_pipeline({'video', 'audio'}))
+    assert tuning.queue('raw') in video and 'threads=4' in video
+    assert audio.endswith(f'{tuning.queue("compressed")} ! mux.')
+    assert _remuxer(media, auto_tune=False).tuning is None
@@ -0,0 +1,133 @@
+import http.client
+import json
+import multiprocessing
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import video_remux_service
+from video_remux_service import JobStore, RequestHandler, Scheduler
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(tmp_path / 'jobs.sqlite')
+
+
+@pytest.fixture
+def api(store, monkeypatch):
+    monkeypatch.setattr(RequestHandler, 'store', store)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RequestHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def request(method, path, body=None):
+        conn = http.client.HTTPConnection(*server.server_address)
+        conn.request(method, path, body=json.dumps(body) if body is not None else None)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+
+    yield request
+    server.shutdown()
+    server.server_close()
+
+
+def test_store_requeues_running_jobs_on_restart(tmp_path, store):
+    job_id = store.add({'input': '/media/in.mkv'})
+    store.update(job_id, status='running', started=1.0, progress={'percent': 50})
+    restarted = JobStore(tmp_path / 'jobs.sqlite')
+    job = restarted.get(job_id)
+    assert (job['status'], job['started'], job['progress']) == ('queued', None, None)
+    assert restarted.next_queued()['id'] == job_id
+
+
+def test_store_cancel_queued(store):
+    job_id = store.add({'input': '/media/in.mkv'})
+    assert store.cancel_queued(job_id)
+    assert not store.cancel_queued(job_id)
+    assert store.counts()['cancelled'] == 1
+
+
+def test_submit_and_list(api, tmp_path):
+    media = tmp_path / 'in.mkv'
+    media.write_bytes(b'media')
+    status, body = api('POST', '/jobs', {'input': str(media), 'output_format': 'mp4', 'start': 1.5})
+    assert status == 201
+    status, jobs = api('GET', '/jobs?limit=10')
+    assert status == 200
+    assert [job['id'] for job in jobs] == [body['id']]
+    assert jobs[0]['spec']['start'] == 1.5
+    assert api('GET', f"/jobs/{body['id']}")[1]['status'] == 'queued'
+
+
+@pytest.mark.parametrize('limit', ['abc', '-1', '0', ''])
+def test_list_rejects_invalid_limit(api, limit):
+    status, body = api('GET', f'/jobs?limit={limit}')
+    assert status == 400
+    assert 'limit' in body['error']
+
+
+@pytest.mark.parametrize('spec, error', [
+    ({'output_format': 'mp4'}, 'input is required'),
+    ({'input': '/nonexistent.mkv'}, 'input file not found'),
+    ({'input': '{media}', 'unknown': 1}, 'unknown fields'),
+    ({'input': '{media}', 'preset': 'fastest'}, 'preset'),
+    ({'input': '{media}', 'start': '10'}, 'start and end'),
+    ({'input': '{media}', 'output': 'out.mp4'}, 'absolute'),
+])
+def test_submit_validation(api, tmp_path, spec, error):
+    media = tmp_path / 'in.mkv'
+    media.write_bytes(b'media')
+    spec = {key: str(media) if value == '{media}' else value for key, value in spec.items()}
+    status, body = api('POST', '/jobs', spec)
+    assert status == 400
+    assert error in body['error']
+
+
+def test_output_defaults_to_the_input_directory(api, tmp_path):
+    media = tmp_path / 'in.mkv'
+    media.write_bytes(b'media')
+    for spec, output in [({'output_format': 'mp4'}, 'in.mp4'), ({}, 'in_copy.mkv')]:
+        job_id = api('POST', '/jobs', {'input': str(media), **spec})[1]['id']
+        assert api('GET', f'/jobs/{job_id}')[1]['spec']['output'] == str(tmp_path / output)
+
+
+def test_submit_keeps_a_zero_start(tmp_path, monkeypatch):
+    media = tmp_path / 'in.mkv'
+    media.write_bytes(b'media')
+    specs = []
+    monkeypatch.setattr(video_remux_service, 'request',
+                        lambda args, method, path, body=None: specs.append(body) or (201, {'id': 1}))
+    monkeypatch.setattr(sys, 'argv', ['video_remux_service.py', 'submit', str(media), '--start', '0'])
+    with pytest.raises(SystemExit):
+        video_remux_service.main()
+    assert specs[0]['start'] == 0.0
+
+
+class FakeWorker:
+    def __init__(self, conn, job_id):
+        self.conn = conn
+        self.job_id = job_id
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+
+def test_cancel_after_the_result_was_sent(store):
+    job_id = store.add({'input': '/media/in.mkv'})
+    store.update(job_id, status='running', started=1.0)
+    parent_conn, child_conn = multiprocessing.Pipe()
+    worker = FakeWorker(parent_conn, job_id)
+    scheduler = Scheduler.__new__(Scheduler)
+    scheduler.store, scheduler.workers, scheduler._lock = store, [worker], threading.Lock()
+
+    child_conn.send(('result', job_id, {'success': True, 'output': '/media/in.mp4'}, None))
+    assert not scheduler.cancel(job_id)
+    assert not worker.killed
+    assert store.get(job_id)['status'] == 'done'
+
+
+def test_unknown_job(api):
+    assert api('GET', '/jobs/42')[0] == 404
@@ -0,0 +1,60 @@
+import video_remux_thumbnails
+from video_remux_thumbnails import compose_sheet, run_job, write_vtt
+
+
+def frame(value, width, height):
+    """Packed RGB frame filled with one value, rows padded to the 4-byte GStreamer stride."""
+    stride = (width * 3 + 3) // 4 * 4
+    return (bytes([value]) * (width * 3) + b'\0' * (stride - width * 3)) * height
+
+
+def pixel(data, stride, x, y):
+    return data[y * stride + x * 3]
+
+
+def test_compose_sheet_lays_out_rows():
+    # 3 pixel wide frames: 9 bytes of pixels and 3 of padding per row
+    frames = [frame(value, 3, 2) for value in (10, 20, 30, 40, 50)]
+    data, width, height = compose_sheet(frames, 3, 2, columns=2)
+    assert (width, height) == (6, 6)
+    stride = 20
+    assert len(data) == stride * height
+    assert [pixel(data, stride, x, y) for y in (0, 2, 4) for x in (0, 3)] == [10, 20, 30, 40, 50, 0]
+    assert pixel(data, stride, 5, 1) == 20 and pixel(data, stride, 2, 5) == 50
+    # Row padding of the sheet stays empty
+    assert data[18:20] == b'\0\0'
+
+
+def test_compose_sheet_narrower_than_the_columns():
+    data, width, height = compose_sheet([frame(1, 4, 1), frame(2, 4, 1)], 4, 1, columns=5)
+    assert (width, height) == (8, 1)
+    assert data == bytes([1] * 12 + [2] * 12)
+
+
+def test_write_vtt(tmp_path):
+    path = tmp_path / 'index.vtt'
+    write_vtt(path, [(0.0, 10.0, 'sprite.jpg', 0, 0, 160, 90), (3600.0, 3605.25, 'sprite.jpg', 160, 0, 160, 90)])
+    assert path.read_text() == (
+        'WEBVTT\n\n'
+        '00:00:00.000 --> 00:00:10.000\nsprite.jpg#xywh=0,0,160,90\n\n'
+        '01:00:00.000 --> 01:00:05.250\nsprite.jpg#xywh=160,0,160,90\n')
+
+
+def test_run_job_splits_sheets_and_indexes_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_remux_thumbnails, 'grab_thumbnails',
+                        lambda *args, **kwargs: ([frame(i, 4, 2) for i in range(5)], 4, 2, 23.0, 5.0))
+    written = []
+    monkeypatch.setattr(video_remux_thumbnails, 'write_image',
+                        lambda path, data, width, height, *args: written.append((path.name, width, height)))
+    options = {'count': 5, 'interval': None, 'width': 4, 'columns': 2, 'rows': 1,
+               'format': 'jpg', 'quality': 85, 'overwrite': False}
+    result = run_job(str(tmp_path / 'clip.mkv'), str(tmp_path / 'out'), options)
+    assert result['success'] and result['thumbnails'] == 5
+    assert written == [('clip_sprite_000.jpg', 8, 2), ('clip_sprite_001.jpg', 8, 2), ('clip_sprite_002.jpg', 4, 2)]
+    cues = (tmp_path / 'out' / 'clip_thumbnails.vtt').read_text().split('\n\n')[1:]
+    assert cues[1] == '00:00:05.000 --> 00:00:10.000\nclip_sprite_000.jpg#xywh=4,0,4,2'
+    # The last cue ends with the file
+    assert cues[4] == '00:00:20.000 --> 00:00:23.000\nclip_sprite_002.jpg#xywh=0,0,4,2\n'
+    # An existing index is kept without --overwrite
+    result = run_job(str(tmp_path / 'clip.mkv'), str(tmp_path / 'out'), options)
+    assert not result['success'] and result['error'].startswith('FileExistsError')
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Batch Video Remuxing Tool
+Runs VideoRemuxer jobs for many files in parallel on a process pool.
+Inputs can be directories, glob patterns or a manifest file listing one input per line.
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from video_remux_gstlaunch import CapabilityRegistry, OutputCache, ProbeCache, VideoRemuxer, find_media_files
+
+
+def _glob_root(pattern: str) -> Path:
+    """Leading directories of a glob pattern that contain no wildcard."""
+    root = Path()
+    for part in Path(pattern).parent.parts:
+        if re.search(r'[*?[]', part):
+            break
+        root /= part
+    return root
+
+
+def collect_inputs(sources: list, manifest: str = None, recursive: bool = False) -> list:
+    """
+    Expand directories, glob patterns and manifest entries into a list of input jobs.
+
+    Returns:
+        List of (input_path, relative_path) tuples, relative_path being used to lay out
+        the outputs below the output directory: relative to the directory, or to the
+        directories of a glob pattern before its first wildcard. Files given directly
+        keep only their name, see find_collisions().
+    """
+    inputs = []
+
+    def add_directory(directory: Path):
+        for path in find_media_files(directory, recursive=recursive):
+            inputs.append((path, path.relative_to(directory)))
+
+    entries = list(sources)
+    if manifest:
+        with open(manifest) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    entries.append(line)
+
+    for entry in entries:
+        path = Path(entry)
+        if path.is_dir():
+            add_directory(path)
+        elif path.is_file():
+            inputs.append((path, Path(path.name)))
+        else:
+            matches = sorted(glob.glob(entry, recursive=recursive))
+            root = _glob_root(entry)
+            if not matches:
+                print(f"Warning: No input matches '{entry}'", file=sys.stderr)
+            for match in matches:
+                if Path(match).is_file():
+                    inputs.append((Path(match), Path(match).relative_to(root)))
+
+    # Drop duplicates while keeping order
+    seen = set()
+    unique = []
+    for path, rel in inputs:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append((path, rel))
+    return unique
+
+
+def output_path_for(input_path: Path, relative: Path, output_dir: Path, output_format: str = None) -> Path:
+    """Compute the output file path of one job, never overwriting the input itself."""
+    suffix = f'.{output_format.lstrip(".")}' if output_format else input_path.suffix
+    output = output_dir / relative.with_suffix(suffix)
+    if output.resolve() == input_path.resolve():
+        output = output.with_name(f'{output.stem}_copy{suffix}')
+    return output
+
+
+def find_collisions(jobs: list) -> dict:
+    """Outputs claimed by more than one input of (input_path, output_path) jobs, as {output: [inputs]}."""
+    claimed = {}
+    for input_path, output_path in jobs:
+        claimed.setdefault(output_path.resolve(), []).append(input_path)
+    return {output: paths for output, paths in claimed.items() if len(paths) > 1}
+
+
+def report_collisions(collisions: dict):
+    """Print the inputs that would overwrite each other's outputs."""
+    for output, paths in collisions.items():
+        print(f"Error: {', '.join(str(path) for path in paths)} would be written to the same output {output}",
+              file=sys.stderr)
+    print("Pass their common parent directory or a glob instead, so the outputs keep the "
+          "relative layout of the inputs", file=sys.stderr)
+
+
+# Probe cache, capability registry and output cache of the worker process, opened on its first job
+_probe_cache = None
+_capabilities = None
+_output_cache = None
+
+
+def _get_probe_cache(options: dict):
+    global _probe_cache
+    if options['probe_cache'] is False:
+        return None
+    if _probe_cache is None:
+        _probe_cache = ProbeCache(options['probe_cache'])
+    return _probe_cache
+
+
+def _get_capabilities(options: dict):
+    global _capabilities
+    if not options['encoder_selection']:
+        return None
+    if _capabilities is None:
+        _capabilities = CapabilityRegistry(backend=options['remuxer']['backend'])
+    return _capabilities
+
+
+def _get_output_cache(options: dict):
+    global _output_cache
+    if options['output_cache'] is None:
+        return None
+    if _output_cache is None:
+        _output_cache = OutputCache(options['output_cache'] or None, max_size=options['output_cache_size'])
+    return _output_cache
+
+
+def run_job(input_file: str, output_file: str, options: dict) -> dict:
+    """
+    Run a single remux job. Executed in a worker process.
+
+    The remuxer output is captured so that concurrent jobs do not interleave on the
+    terminal; it is only returned when the job fails.
+    """
+    result = {
+        'input': input_file,
+        'output': output_file,
+        'success': False,
+        'elapsed': 0.0,
+        'input_size': 0,
+        'output_size': 0,
+        'duration': 0.0,
+        'error': None,
+    }
+    log = io.StringIO()
+    start_time = time.time()
+    try:
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            remuxer = VideoRemuxer(input_file, output_file=output_file,
+                                   probe_cache=_get_probe_cache(options),
+                                   capabilities=_get_capabilities(options),
+                                   output_cache=_get_output_cache(options), **options['remuxer'])
+            result['success'] = remuxer.remux(overwrite=options['overwrite'], show_progress=False)
+        result['duration'] = remuxer.info.get('duration', 0.0)
+        result['input_size'] = Path(input_file).stat().st_size
+        if result['success']:
+            result['output_size'] = Path(output_file).stat().st_size
+        else:
+            result['error'] = log.getvalue().strip() or 'remux failed'
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}\n{log.getvalue()}".strip()
+    result['elapsed'] = time.time() - start_time
+    return result
+
+
+def _init_worker():
+    """Let the parent process handle Ctrl+C and cancel the remaining jobs."""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_batch(jobs: list, options: dict, workers: int) -> tuple:
+    """
+    Fan jobs out over a process pool.
+
+    Returns:
+        Tuple (results, wall_time)
+    """
+    results = []
+    start_time = time.time()
+    total = len(jobs)
+
+    # Spawn fresh workers: the parent may already have started GStreamer (the capability
+    # scan), and a fork copies its GLib threads' locks mid-use
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {
+            executor.submit(run_job, str(input_path), str(output_path), options): input_path
+            for input_path, output_path in jobs
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Worker crashed (e.g. killed by the OOM killer), only this job is lost
+                    result = {
+                        'input': str(futures[future]), 'output': None, 'success': False,
+                        'elapsed': 0.0, 'input_size': 0, 'output_size': 0, 'duration': 0.0,
+                        'error': f"Worker failed: {e}",
+                    }
+                results.append(result)
+                status = '✓' if result['success'] else '✗'
+                print(f"[{len(results)}/{total}] {status} {result['input']} ({result['elapsed']:.1f}s)")
+                if not result['success']:
+                    print(f"    {result['error'].splitlines()[-1] if result['error'] else 'failed'}", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("\nOperation cancelled by user, waiting for running jobs...", file=sys.stderr)
+            for future in futures:
+                future.cancel()
+            raise
+
+    return results, time.time() - start_time
+
+
+def summarize(results: list, wall_time: float) -> dict:
+    """Compute aggregate throughput figures for a finished batch."""
+    succeeded = [r for r in results if r['success']]
+    input_bytes = sum(r['input_size'] for r in succeeded)
+    media_seconds = sum(r['duration'] for r in succeeded)
+    wall_time = max(wall_time, 1e-6)
+    return {
+        'files': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'wall_time': wall_time,
+        'files_per_second': len(succeeded) / wall_time,
+        'mb_per_second': input_bytes / (1024 * 1024) / wall_time,
+        'realtime_factor': media_seconds / wall_time,
+        'input_bytes': input_bytes,
+        'output_bytes': sum(r['output_size'] for r in succeeded),
+        'media_seconds': media_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Remux/transcode many video files in parallel using VideoRemuxer',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Remux every file of a directory to MKV using all cores
+  %(prog)s /media/incoming -f mkv -O /media/mkv
+
+  # Transcode a glob to H.264 with 4 concurrent jobs of 4 encoder threads each
+  %(prog)s '/media/masters/*.mov' -f mp4 --video-codec libx264 -j 4 --threads-per-job 4 -O out
+
+  # Process the files listed in a manifest and write a JSON report
+  %(prog)s --manifest files.txt -f webm --video-codec vp9 --audio-codec opus -O out --report report.json
+
+Note:
+  - By default the number of jobs is the number of CPU cores and each job gets an equal
+    share of the cores as encoder thread budget
+  - A failed job does not stop the batch; the exit code is 1 if any job failed
+        """
+    )
+
+    parser.add_argument('inputs', nargs='*', help='Input files, directories or glob patterns')
+    parser.add_argument('--manifest', help='File listing one input (file, directory or glob) per line')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='Scan directories recursively and let ** match subdirectories in globs')
+    parser.add_argument('-O', '--output-dir', default='.',
+                        help='Directory receiving the outputs (default: current directory)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Number of concurrent jobs (default: number of CPU cores)')
+    parser.add_argument('--threads-per-job', type=int,
+                        help='Encoder thread budget of each job (default: CPU cores / jobs)')
+    parser.add_argument('--report', help='Write per-job results and aggregate throughput as JSON to this file')
+
+    parser.add_argument('-f', '--format', dest='output_format', help='Output container format (e.g., mp4, mkv, webm)')
+    parser.add_argument('--video-codec', help='Video codec to use, "copy" or unset to copy the video stream')
+    parser.add_argument('--audio-codec', help='Audio codec to use, "copy" or unset to copy the audio stream')
+    parser.add_argument('--vaapi-device', help='VAAPI device path for Intel hardware acceleration')
+    parser.add_argument('--preset', choices=['fast', 'medium', 'slow'], default='medium',
+                        help='Encoding speed/quality preset (default: medium)')
+    parser.add_argument('--resolution', help='Output resolution in WIDTHxHEIGHT format')
+    parser.add_argument('--backend', choices=VideoRemuxer.BACKENDS, default='auto',
+                        help='Pipeline backend (default: auto)')
+    parser.add_argument('--force-encode', action='store_true',
+                        help='Re-encode even if the source streams already use the requested codecs')
+    parser.add_argument('--overwrite', action='store_true', help='Overwrite output files if they exist')
+    parser.add_argument('--probe-cache', help='Path of the persistent probe cache (default: shared user cache)')
+    parser.add_argument('--no-probe-cache', action='store_true', help='Do not use the probe cache')
+    parser.add_argument('--output-cache', nargs='?', const='', metavar='DIR',
+                        help='Reuse outputs of identical earlier jobs from the content-addressed output cache '
+                             '(default DIR: shared user cache)')
+    parser.add_argument('--output-cache-size', type=float, default=20.0,
+                        help='Maximum output cache size in GB (default: 20)')
+    parser.add_argument('--no-encoder-selection', action='store_true',
+                        help='Do not pick encoders from the cached GStreamer capability registry')
+
+    args = parser.parse_args()
+
+    if not args.inputs and not args.manifest:
+        parser.error('no input given, pass files, directories, globs or --manifest')
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    inputs = collect_inputs(args.inputs, manifest=args.manifest, recursive=args.recursive)
+    if not inputs:
+        print("Error: No input files found", file=sys.stderr)
+        sys.exit(1)
+
+    output_dir = Path(args.output_dir)
+    jobs = [(path, output_path_for(path, rel, output_dir, args.output_format)) for path, rel in inputs]
+    collisions = find_collisions(jobs)
+    if collisions:
+        # Parallel workers would overwrite each other's outputs
+        report_collisions(collisions)
+        sys.exit(1)
+
+    workers = min(args.jobs, len(jobs))
+    threads = args.threads_per_job or max(1, (os.cpu_count() or 1) // workers)
+
+    options = {
+        'overwrite': args.overwrite,
+        'probe_cache': False if args.no_probe_cache else args.probe_cache,
+        'encoder_selection': not args.no_encoder_selection,
+        'output_cache': args.output_cache,
+        'output_cache_size': int(args.output_cache_size * 1024 ** 3),
+        'remuxer': {
+            'output_format': args.output_format,
+            'video_codec': args.video_codec,
+            'audio_codec': args.audio_codec,
+            'vaapi_device': args.vaapi_device,
+            'preset': args.preset,
+            'resolution': args.resolution,
+            'backend': args.backend,
+            'threads': threads,
+            'auto_copy': not args.force_encode,
+            'concurrency': workers,
+        },
+    }
+
+    if options['encoder_selection']:
+        # Scan the registry once up front, the workers then only load the cached result
+        CapabilityRegistry(backend=args.backend)
+
+    print(f"Processing {len(jobs)} files with {workers} workers ({threads} encoder threads per job)")
+
+    try:
+        results, wall_time = run_batch(jobs, options, workers)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    summary = summarize(results, wall_time)
+    print()
+    print(f"Done: {summary['succeeded']}/{summary['files']} succeeded in {summary['wall_time']:.1f}s")
+    print(f"  Throughput: {summary['files_per_second']:.2f} files/s, {summary['mb_per_second']:.2f} MB/s, "
+          f"{summary['realtime_factor']:.1f}x realtime")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'summary': summary, 'jobs': results}, f, indent=2)
+
+    sys.exit(0 if summary['failed'] == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
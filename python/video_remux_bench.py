@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Video Remuxing Benchmark
+Measures encoding throughput of the VideoRemuxer presets on synthetic inputs.
+Runs every codec x preset x container combination through gst-launch-1.0 and records
+fps, CPU time, peak RSS and output size as JSON, and compares results against a baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from video_remux_gstlaunch import VideoRemuxer
+
+
+# Audio codec used for each container, the benchmark focuses on video encoders
+CONTAINER_AUDIO_CODECS = {
+    'mp4': 'aac',
+    'mov': 'aac',
+    'ts': 'aac',
+    'mkv': 'opus',
+    'webm': 'opus',
+    'ogv': 'vorbis',
+}
+
+FRAMERATE = 30
+
+
+def gst_version() -> str:
+    """Version string of the installed GStreamer."""
+    try:
+        result = subprocess.run(['gst-launch-1.0', '--version'], capture_output=True, text=True, check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return 'unknown'
+    for line in result.stdout.split('\n'):
+        if line.startswith('GStreamer'):
+            return line.strip()
+    return result.stdout.split('\n')[0].strip()
+
+
+def generate_input(work_dir: Path, resolution: str, duration: int) -> Path:
+    """
+    Generate a deterministic synthetic input, reusing it if it already exists.
+
+    The video is a moving SMPTE pattern stored as high quality MJPEG so that decoding
+    the input costs little next to the encoders being measured; audio is a sine wave.
+    """
+    path = work_dir / f'synthetic_{resolution}_{duration}s.mkv'
+    if path.exists():
+        return path
+
+    width, height = resolution.split('x')
+    frames = duration * FRAMERATE
+    audio_buffers = duration * 48000 // 1024
+    tmp = path.with_suffix('.tmp.mkv')
+    pipeline = (
+        f'videotestsrc num-buffers={frames} pattern=smpte horizontal-speed=4 ! '
+        f'video/x-raw,width={width},height={height},framerate={FRAMERATE}/1 ! '
+        f'jpegenc quality=95 ! queue ! matroskamux name=mux ! filesink location={shlex.quote(str(tmp))} '
+        f'audiotestsrc num-buffers={audio_buffers} samplesperbuffer=1024 wave=sine freq=440 ! '
+        f'audio/x-raw,rate=48000,channels=2 ! audioconvert ! flacenc ! queue ! mux.'
+    )
+    subprocess.run(['gst-launch-1.0', '-q'] + shlex.split(pipeline), check=True)
+    os.replace(tmp, path)
+    return path
+
+
+def measure(pipeline: str) -> dict:
+    """Run a pipeline in its own gst-launch-1.0 process and collect its resource usage."""
+    # stderr goes to a file rather than a pipe nobody reads while waiting, which a chatty
+    # pipeline could fill and block on
+    with tempfile.TemporaryFile() as stderr_file:
+        start_time = time.time()
+        process = subprocess.Popen(['gst-launch-1.0', '-q'] + shlex.split(pipeline),
+                                   stdout=subprocess.DEVNULL, stderr=stderr_file)
+        # wait4() returns the resource usage of this very process
+        _, status, rusage = os.wait4(process.pid, 0)
+        wall = time.time() - start_time
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors='replace')
+    return {
+        'success': process.returncode == 0,
+        'error': stderr.strip() if process.returncode != 0 else None,
+        'wall': wall,
+        'cpu_user': rusage.ru_utime,
+        'cpu_system': rusage.ru_stime,
+        'peak_rss_kb': rusage.ru_maxrss,
+    }
+
+
+def run_case(input_file: Path, output_dir: Path, resolution: str, duration: int,
+             codec: str, preset: str, container: str, repeat: int) -> dict:
+    """Benchmark one codec x preset x container combination."""
+    output_file = output_dir / f'{input_file.stem}_{codec}_{preset}.{container}'
+    remuxer = VideoRemuxer(str(input_file), output_file=str(output_file), output_format=container,
+                           video_codec=codec, audio_codec=CONTAINER_AUDIO_CODECS.get(container),
+                           preset=preset, backend='launch')
+    pipeline = remuxer._build_pipeline({'video', 'audio'})
+
+    result = {
+        'resolution': resolution,
+        'duration': duration,
+        'codec': codec,
+        'encoder': remuxer._get_video_encoder_element(),
+        'encoder_properties': remuxer._get_encoder_properties(remuxer._get_video_encoder_element()),
+        'preset': preset,
+        'container': container,
+    }
+
+    runs = []
+    for _ in range(repeat):
+        run = measure(pipeline)
+        if not run['success']:
+            result.update(success=False, error=run['error'])
+            return result
+        runs.append(run)
+
+    wall = statistics.median(run['wall'] for run in runs)
+    cpu_time = statistics.median(run['cpu_user'] + run['cpu_system'] for run in runs)
+    result.update(
+        success=True,
+        error=None,
+        wall=round(wall, 3),
+        fps=round(duration * FRAMERATE / wall, 2),
+        realtime_factor=round(duration / wall, 3),
+        cpu_time=round(cpu_time, 3),
+        cpu_user=round(statistics.median(run['cpu_user'] for run in runs), 3),
+        cpu_system=round(statistics.median(run['cpu_system'] for run in runs), 3),
+        peak_rss_kb=max(run['peak_rss_kb'] for run in runs),
+        output_size=output_file.stat().st_size,
+    )
+    output_file.unlink()
+    return result
+
+
+def case_key(result: dict) -> tuple:
+    return (result['resolution'], result['duration'], result['codec'], result['preset'], result['container'])
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """
+    Print the differences between two benchmark results.
+
+    Returns:
+        True if no combination got slower (fps), more CPU hungry or bigger by more than
+        `threshold` percent, False otherwise
+    """
+    baseline_results = {case_key(r): r for r in baseline['results'] if r.get('success')}
+    ok = True
+
+    print(f"Baseline: {baseline['meta'].get('gstreamer')} ({baseline['meta'].get('date')})")
+    print(f"Current:  {current['meta'].get('gstreamer')} ({current['meta'].get('date')})")
+    print()
+    print(f"{'case':<48} {'fps':>20} {'cpu time':>20} {'size':>20}")
+
+    def change(old, new):
+        return (new - old) / old * 100 if old else 0.0
+
+    for result in current['results']:
+        key = case_key(result)
+        name = f"{key[0]} {key[1]}s {key[2]} {key[3]} {key[4]}"
+        old = baseline_results.get(key)
+        if not result.get('success'):
+            if old:
+                print(f"{name:<48} FAILED (passed in baseline)")
+                ok = False
+            continue
+        if not old:
+            print(f"{name:<48} new")
+            continue
+
+        fps_change = change(old['fps'], result['fps'])
+        cpu_change = change(old['cpu_time'], result['cpu_time'])
+        size_change = change(old['output_size'], result['output_size'])
+        regressed = fps_change < -threshold or cpu_change > threshold or size_change > threshold
+        ok = ok and not regressed
+        print(f"{name:<48} {result['fps']:>9.1f} ({fps_change:+6.1f}%) "
+              f"{result['cpu_time']:>8.1f}s ({cpu_change:+6.1f}%) "
+              f"{result['output_size'] / 1024:>8.0f}K ({size_change:+6.1f}%)"
+              f"{'  REGRESSION' if regressed else ''}")
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark VideoRemuxer encoders and presets on synthetic inputs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Run the default matrix and save the results as the baseline
+  %(prog)s -o baseline.json
+
+  # Benchmark x264 presets at 1080p only
+  %(prog)s --codecs libx264 --resolutions 1920x1080 -o x264.json
+
+  # After upgrading GStreamer, run again and compare with the baseline
+  %(prog)s -o current.json --compare baseline.json
+
+  # Compare two saved results without running anything
+  %(prog)s --results current.json --compare baseline.json --threshold 5
+
+Note:
+  - Synthetic inputs are generated once into the work directory and reused
+  - Every combination runs in its own gst-launch-1.0 process; CPU time and peak RSS are
+    the resource usage of that process
+  - The exit code is 1 if a comparison finds a regression or a combination fails
+        """
+    )
+
+    parser.add_argument('--codecs', default='libx264,libx265,libvpx-vp9,libvpx',
+                        help='Comma separated video codecs (default: libx264,libx265,libvpx-vp9,libvpx)')
+    parser.add_argument('--presets', default='fast,medium,slow',
+                        help='Comma separated presets (default: fast,medium,slow)')
+    parser.add_argument('--containers', default='mkv',
+                        help='Comma separated output containers (default: mkv)')
+    parser.add_argument('--resolutions', default='1280x720,1920x1080',
+                        help='Comma separated input resolutions (default: 1280x720,1920x1080)')
+    parser.add_argument('--durations', default='10',
+                        help='Comma separated input durations in seconds (default: 10)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per combination, the median is recorded (default: 1)')
+    parser.add_argument('--work-dir', default='bench-work',
+                        help='Directory for the synthetic inputs and outputs (default: bench-work)')
+    parser.add_argument('-o', '--output', help='Write the results as JSON to this file')
+    parser.add_argument('--results', help='Load results from this file instead of running the benchmark')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare the results with a saved baseline')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Regression threshold in percent for --compare (default: 10)')
+
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        work_dir = Path(args.work_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+        codecs = args.codecs.split(',')
+        presets = args.presets.split(',')
+        containers = args.containers.split(',')
+        resolutions = args.resolutions.split(',')
+        durations = [int(d) for d in args.durations.split(',')]
+
+        current = {
+            'meta': {
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'gstreamer': gst_version(),
+                'host': platform.node(),
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'python': platform.python_version(),
+            },
+            'results': [],
+        }
+
+        total = len(codecs) * len(presets) * len(containers) * len(resolutions) * len(durations)
+        done = 0
+        try:
+            for resolution in resolutions:
+                for duration in durations:
+                    print(f"Generating {resolution} {duration}s input...")
+                    input_file = generate_input(work_dir, resolution, duration)
+                    for codec in codecs:
+                        for preset in presets:
+                            for container in containers:
+                                done += 1
+                                print(f"[{done}/{total}] {resolution} {duration}s {codec} {preset} {container}: ",
+                                      end='', flush=True)
+                                result = run_case(input_file, work_dir, resolution, duration,
+                                                  codec, preset, container, args.repeat)
+                                current['results'].append(result)
+                                if result['success']:
+                                    print(f"{result['fps']:.1f} fps, {result['cpu_time']:.1f}s CPU, "
+                                          f"{result['peak_rss_kb'] / 1024:.0f} MB RSS, "
+                                          f"{VideoRemuxer._format_size(result['output_size'])}")
+                                else:
+                                    print("FAILED")
+        except subprocess.CalledProcessError as e:
+            print(f"Error: Could not generate the synthetic input: {e}", file=sys.stderr)
+            sys.exit(1)
+        except KeyboardInterrupt:
+            print("\nOperation cancelled by user", file=sys.stderr)
+            sys.exit(130)
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+
+    ok = all(result.get('success') for result in current['results'])
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        ok = compare(baseline, current, args.threshold) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
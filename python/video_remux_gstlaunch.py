@@ -2,20 +2,1338 @@
 """
 Video Remuxing Tool - GStreamer gst-launch Version
 Converts video files between different container formats while copying codecs (no re-encoding).
-Uses gst-launch-1.0 command-line tool to perform fast remuxing operations.
+Uses gst-launch-1.0 command-line tool to perform fast remuxing operations, or runs the same
+pipeline in-process through the GStreamer Python bindings when they are available.
+Can be embedded as a library through RemuxJob, remux_async() and remux_many().
 """
 
 import argparse
+import asyncio
+import bisect
+import contextlib
+import glob
+import hashlib
+import io
+import queue
 import subprocess
 import sys
 import os
 import re
 import json
+import multiprocessing
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 
+# File extensions picked up when scanning directories
+VIDEO_EXTENSIONS = {
+    'mp4', 'm4v', 'mkv', 'webm', 'avi', 'mov', 'ogv', 'ogg', 'flv', 'ts', 'mts', 'm2ts',
+    '3gp', 'mpg', 'mpeg', 'wmv',
+}
+
+
+# GStreamer Python bindings, imported and initialised lazily so that the
+# gst-launch backend keeps working on hosts without PyGObject.
+_gst_modules = None
+_shared_engine_lock = threading.Lock()
+
+
+def load_gst():
+    """Import the GStreamer bindings and call Gst.init() once per process."""
+    global _gst_modules
+    if _gst_modules is None:
+        import gi
+        gi.require_version('Gst', '1.0')
+        from gi.repository import Gst, GLib
+        Gst.init(None)
+        _gst_modules = (Gst, GLib)
+    return _gst_modules
+
+
+# Environment variables in-process pipelines set on this process: name -> [value, users, previous value]
+_environ_overrides = {}
+_environ_changed = threading.Condition()
+
+
+@contextlib.contextmanager
+def _process_environ(env: dict):
+    """
+    Set environment variables of this process while an in-process pipeline runs.
+
+    Elements read settings such as LIBVA_DRIVER_NAME from the process environment, which
+    all threads share. Jobs needing the same value share it; a job needing another value
+    waits for them to finish. The previous value is restored when the last user is done.
+    """
+    with _environ_changed:
+        _environ_changed.wait_for(lambda: all(_environ_overrides.get(key, [value])[0] == value
+                                              for key, value in env.items()))
+        for key, value in env.items():
+            override = _environ_overrides.setdefault(key, [value, 0, os.environ.get(key)])
+            override[1] += 1
+            os.environ[key] = value
+    try:
+        yield
+    finally:
+        with _environ_changed:
+            for key in env:
+                override = _environ_overrides[key]
+                override[1] -= 1
+                if override[1] == 0:
+                    del _environ_overrides[key]
+                    if override[2] is None:
+                        os.environ.pop(key, None)
+                    else:
+                        os.environ[key] = override[2]
+            _environ_changed.notify_all()
+
+
+def run_pipeline(description: str, backend: str = 'auto', env: dict = None) -> tuple:
+    """
+    Run a pipeline quietly until EOS or error.
+
+    Args:
+        description: gst-launch-1.0 style pipeline description
+        backend: 'gst' runs it with the shared GstEngine, 'launch' with gst-launch-1.0,
+                 'auto' picks 'gst' when the Python bindings are available
+        env: Optional extra environment variables for the pipeline
+
+    Returns:
+        Tuple (success, error_message)
+    """
+    if backend == 'gst' or (backend == 'auto' and GstEngine.available()):
+        with _process_environ(env or {}):
+            return GstEngine.shared().run(description)
+
+    result = subprocess.run(
+        f'gst-launch-1.0 -q {description}',
+        env={**os.environ, **(env or {})},
+        shell=True,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return False, result.stderr.strip() or f"gst-launch exited with code {result.returncode}"
+    return True, None
+
+
+def _run_segment_pipeline(description: str, backend: str, env: dict) -> tuple:
+    """Process pool entry point of the segmented encoder, returns (success, error_message, elapsed)."""
+    start_time = time.time()
+    success, error = run_pipeline(description, backend=backend, env=env)
+    return success, error, time.time() - start_time
+
+
+def load_gst_pbutils():
+    """Import the GStreamer bindings together with GstPbutils (Discoverer)."""
+    Gst, GLib = load_gst()
+    import gi
+    gi.require_version('GstPbutils', '1.0')
+    from gi.repository import GstPbutils
+    return Gst, GLib, GstPbutils
+
+
+class GstEngine:
+    """
+    In-process pipeline runner built on Gst.parse_launch() and the pipeline bus.
+
+    The plugin registry is loaded only once per process, and every run parses a fresh
+    pipeline: the delayed links parse_launch() sets up for sometimes pads (decodebin,
+    parsebin, demuxers) only fire once, so a pipeline cannot be run a second time.
+    Pipelines can be run from several threads at once.
+    """
+
+    _shared = None
+
+    def __init__(self):
+        self.Gst, self.GLib = load_gst()
+
+    @classmethod
+    def available(cls) -> bool:
+        """Check if the GStreamer Python bindings can be loaded."""
+        try:
+            load_gst()
+            return True
+        except (ImportError, ValueError):
+            return False
+
+    @classmethod
+    def shared(cls) -> 'GstEngine':
+        """Return the process-wide engine instance."""
+        with _shared_engine_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+        return cls._shared
+
+    def run(self, description: str, on_tick=None, interval: float = 0.1, segment: tuple = None,
+            accurate: bool = False):
+        """
+        Run a pipeline until EOS or error.
+
+        Args:
+            description: gst-launch-1.0 style pipeline description
+            on_tick: Optional callable(pipeline) invoked every `interval` seconds while running
+            interval: Bus polling interval in seconds
+            segment: Optional (start, stop) range in seconds to play instead of the whole input,
+                     stop may be None. The pipeline is seeked before any data reaches the muxer.
+            accurate: Seek to the exact start (decoding from the previous keyframe) instead of
+                      letting the demuxer start at a keyframe
+
+        Returns:
+            Tuple (success, error_message)
+        """
+        Gst = self.Gst
+        try:
+            pipeline = Gst.parse_launch(description)
+        except self.GLib.Error as e:
+            return False, f"Failed to create pipeline: {e.message}"
+
+        bus = pipeline.get_bus()
+        wanted = Gst.MessageType.EOS | Gst.MessageType.ERROR
+        error = None
+        try:
+            if segment is not None:
+                error = self._seek(pipeline, segment, accurate, on_tick, interval)
+                if error:
+                    return False, error
+
+            if pipeline.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
+                msg = bus.pop_filtered(Gst.MessageType.ERROR)
+                if msg:
+                    err, debug = msg.parse_error()
+                    return False, f"{err.message}\n{debug}" if debug else err.message
+                return False, "Failed to set pipeline to PLAYING"
+
+            while True:
+                msg = bus.timed_pop_filtered(int(interval * Gst.SECOND), wanted)
+                if msg is None:
+                    if on_tick:
+                        on_tick(pipeline)
+                    continue
+                if msg.type == Gst.MessageType.ERROR:
+                    err, debug = msg.parse_error()
+                    error = f"{err.message}\n{debug}" if debug else err.message
+                break
+        finally:
+            pipeline.set_state(Gst.State.NULL)
+
+        return error is None, error
+
+    def _seek(self, pipeline, segment: tuple, accurate: bool, on_tick=None, interval: float = 0.1):
+        """
+        Seek the pipeline to the segment before any data reaches the muxer.
+
+        Buffers are dropped at the inputs of the muxers (of the sinks if there is none) until
+        the flushing seek went through them, so the muxer never writes headers or timestamps
+        for data outside the segment. The seek is sent as soon as a first buffer shows that
+        the demuxers are running. Returns an error message or None.
+        """
+        Gst = self.Gst
+        running = threading.Event()
+        seeked = threading.Event()
+
+        def on_data(pad, probe_info):
+            if probe_info.type & Gst.PadProbeType.EVENT_FLUSH:
+                if probe_info.get_event().type == Gst.EventType.FLUSH_STOP and running.is_set():
+                    # Everything after the seek's flush belongs to the segment
+                    return Gst.PadProbeReturn.REMOVE
+                return Gst.PadProbeReturn.OK
+            if seeked.is_set():
+                return Gst.PadProbeReturn.REMOVE
+            running.set()
+            return Gst.PadProbeReturn.DROP
+
+        def hold(pad):
+            if pad.get_direction() == Gst.PadDirection.SINK:
+                pad.add_probe(Gst.PadProbeType.BUFFER | Gst.PadProbeType.BUFFER_LIST
+                              | Gst.PadProbeType.EVENT_FLUSH, on_data)
+
+        targets = [element for element in pipeline.iterate_recurse()
+                   if element.get_factory() is not None
+                   and 'Muxer' in (element.get_factory().get_metadata(Gst.ELEMENT_METADATA_KLASS) or '')]
+        for element in targets or list(pipeline.iterate_sinks()):
+            for pad in element.sinkpads:
+                hold(pad)
+            # Request pads of the muxer are only added when their branch links
+            element.connect('pad-added', lambda element, pad: hold(pad))
+
+        bus = pipeline.get_bus()
+        msg = None
+        if pipeline.set_state(Gst.State.PAUSED) != Gst.StateChangeReturn.FAILURE:
+            deadline = time.monotonic() + 30
+            while not running.wait(interval) and time.monotonic() < deadline:
+                msg = bus.pop_filtered(Gst.MessageType.ERROR | Gst.MessageType.EOS)
+                if msg is not None:
+                    break
+                if on_tick:
+                    on_tick(pipeline)
+        if not running.is_set():
+            msg = msg or bus.pop_filtered(Gst.MessageType.ERROR)
+        if msg is not None and msg.type == Gst.MessageType.ERROR:
+            err, debug = msg.parse_error()
+            return f"{err.message}\n{debug}" if debug else err.message
+        if not running.is_set():
+            return "The input produced no data to seek in"
+
+        start, stop = segment
+        flags = Gst.SeekFlags.FLUSH | (Gst.SeekFlags.ACCURATE if accurate else Gst.SeekFlags.KEY_UNIT)
+        ok = pipeline.seek(1.0, Gst.Format.TIME, flags,
+                           Gst.SeekType.SET, int(start * Gst.SECOND),
+                           Gst.SeekType.SET if stop is not None else Gst.SeekType.NONE,
+                           int(stop * Gst.SECOND) if stop is not None else -1)
+        seeked.set()
+        if not ok:
+            return "The input does not support seeking"
+        return None
+
+
+class MediaProber:
+    """
+    In-process media prober built on GstPbutils.Discoverer.
+
+    Discoverers handle one URI at a time, so `jobs` discoverers are run side by side on
+    a private main loop and each one is handed the next pending file as soon as it is
+    done, keeping at most `jobs` probes in flight.
+    """
+
+    def __init__(self, jobs: int = 8, timeout: float = 10.0):
+        self.Gst, self.GLib, self.GstPbutils = load_gst_pbutils()
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+
+    @classmethod
+    def available(cls) -> bool:
+        """Check if GstPbutils can be loaded."""
+        try:
+            load_gst_pbutils()
+            return True
+        except (ImportError, ValueError):
+            return False
+
+    def probe(self, paths: list) -> dict:
+        """
+        Probe files concurrently.
+
+        Returns:
+            Dict mapping each path to its info (same layout as VideoRemuxer.get_video_info()),
+            or to an empty dict if the file could not be probed.
+        """
+        Gst, GLib, GstPbutils = self.Gst, self.GLib, self.GstPbutils
+        pending = deque(dict.fromkeys(paths))
+        results = {}
+        in_flight = {}
+        if not pending:
+            return results
+
+        context = GLib.MainContext.new()
+        loop = GLib.MainLoop.new(context, False)
+        discoverers = []
+
+        def submit(discoverer):
+            while pending:
+                path = pending.popleft()
+                uri = Path(path).resolve().as_uri()
+                if discoverer.discover_uri_async(uri):
+                    in_flight[uri] = path
+                    return
+                results[path] = {}
+
+        def on_discovered(discoverer, info, error):
+            path = in_flight.pop(info.get_uri(), None)
+            if path is not None:
+                ok = info.get_result() in (GstPbutils.DiscovererResult.OK,
+                                           GstPbutils.DiscovererResult.MISSING_PLUGINS)
+                results[path] = self._info_to_dict(info) if ok else {}
+            submit(discoverer)
+            if not in_flight and not pending:
+                loop.quit()
+
+        # Discoverer.start() attaches to the thread-default main context
+        context.push_thread_default()
+        try:
+            for _ in range(min(self.jobs, len(pending))):
+                discoverer = GstPbutils.Discoverer.new(int(self.timeout * Gst.SECOND))
+                discoverer.connect('discovered', on_discovered)
+                discoverer.start()
+                discoverers.append(discoverer)
+                submit(discoverer)
+            if in_flight:
+                loop.run()
+        finally:
+            for discoverer in discoverers:
+                discoverer.stop()
+            context.pop_thread_default()
+
+        return results
+
+    def _info_to_dict(self, info) -> dict:
+        """Convert a DiscovererInfo into the structured info layout."""
+        Gst, GstPbutils = self.Gst, self.GstPbutils
+        result = {'streams': []}
+
+        duration = info.get_duration()
+        if duration != Gst.CLOCK_TIME_NONE:
+            result['duration'] = duration / Gst.SECOND
+
+        for stream in info.get_stream_list():
+            caps = stream.get_caps()
+            description = GstPbutils.pb_utils_get_codec_description(caps) if caps else 'unknown'
+
+            if isinstance(stream, GstPbutils.DiscovererContainerInfo):
+                result.setdefault('container', description)
+                continue
+
+            if isinstance(stream, GstPbutils.DiscovererVideoInfo):
+                entry = {'codec_type': 'video', 'codec_name': description}
+                entry['width'] = stream.get_width()
+                entry['height'] = stream.get_height()
+                if stream.get_framerate_denom():
+                    entry['framerate'] = round(stream.get_framerate_num() / stream.get_framerate_denom(), 3)
+                entry['bitrate'] = stream.get_bitrate()
+            elif isinstance(stream, GstPbutils.DiscovererAudioInfo):
+                entry = {'codec_type': 'audio', 'codec_name': description}
+                entry['channels'] = stream.get_channels()
+                entry['sample_rate'] = stream.get_sample_rate()
+                entry['bitrate'] = stream.get_bitrate()
+            elif isinstance(stream, GstPbutils.DiscovererSubtitleInfo):
+                entry = {'codec_type': 'subtitle', 'codec_name': description}
+            else:
+                continue
+
+            entry['caps'] = caps.to_string() if caps else ''
+            result['streams'].append(entry)
+
+        return result
+
+
+class ProgressReporter:
+    """
+    Turns pipeline position samples into progress telemetry.
+
+    Computes percentage, encoding speed in frames per second, output bitrate, realtime
+    factor and ETA, renders them as a single terminal status line and/or writes them as
+    JSON lines events ('start', 'progress', 'end') to a file for job schedulers. A job whose
+    position does not advance for `stall_timeout` seconds is flagged as stalled.
+    """
+
+    SPINNER = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
+
+    def __init__(self, duration: float = 0.0, framerate: float = None, output_file: Path = None,
+                 show: bool = True, events=None, event_interval: float = 1.0, stall_timeout: float = 10.0):
+        """
+        Args:
+            duration: Media duration in seconds, 0 if unknown
+            framerate: Source framerate, used to convert media time into frames
+            output_file: Output file whose growth gives the output bitrate
+            show: Render the terminal status line
+            events: Optional writable text file receiving JSON lines events, or a callable
+                    receiving each event as a dict
+            event_interval: Minimum number of seconds between two 'progress' events
+            stall_timeout: Seconds without position change after which the job is flagged as stalled
+        """
+        self.duration = duration or 0.0
+        self.framerate = framerate
+        self.output_file = output_file
+        self.show = show
+        self.events = events
+        self.event_interval = event_interval
+        self.stall_timeout = stall_timeout
+
+        self.start_time = None
+        self.position = 0.0
+        self._ticks = 0
+        self._last_event = 0.0
+        self._last_sample = None
+        self._last_advance = None
+        self._speed = None
+
+    def _emit(self, event: str, **fields):
+        if not self.events:
+            return
+        record = {'event': event, 'time': time.time(), **fields}
+        if callable(self.events):
+            self.events(record)
+            return
+        self.events.write(json.dumps(record) + '\n')
+        self.events.flush()
+
+    def start(self, **fields):
+        """Start the clock and emit the 'start' event with the given job description fields."""
+        self.start_time = time.time()
+        self._last_advance = self.start_time
+        self._emit('start', duration=self.duration, **fields)
+        if self.show:
+            print()  # New line before progress
+
+    def update(self, position: float = None, duration: float = None):
+        """Record a new position sample (seconds) and refresh the display and event stream."""
+        now = time.time()
+        if duration:
+            self.duration = duration
+        if position is not None and position > self.position:
+            self.position = position
+            self._last_advance = now
+
+        # Speed in media seconds per wall second, sampled every half second and smoothed
+        if self._last_sample is None:
+            self._last_sample = (self.start_time, 0.0)
+        if now - self._last_sample[0] >= 0.5:
+            speed = (self.position - self._last_sample[1]) / (now - self._last_sample[0])
+            self._speed = speed if self._speed is None else 0.7 * self._speed + 0.3 * speed
+            self._last_sample = (now, self.position)
+
+        stats = self.stats(now)
+        if self.show:
+            self._render(stats)
+        if now - self._last_event >= self.event_interval:
+            self._last_event = now
+            self._emit('progress', **stats)
+
+    def stats(self, now: float = None) -> dict:
+        """Current telemetry values."""
+        now = now or time.time()
+        elapsed = now - self.start_time
+        speed = self._speed if self._speed is not None else (self.position / elapsed if elapsed else 0.0)
+        stats = {
+            'position': round(self.position, 3),
+            'duration': round(self.duration, 3),
+            'elapsed': round(elapsed, 3),
+            'percent': round(min(100.0, self.position / self.duration * 100), 2) if self.duration else None,
+            'realtime_factor': round(speed, 3),
+            'fps': round(speed * self.framerate, 2) if self.framerate else None,
+            'bitrate': None,
+            'eta': round((self.duration - self.position) / speed, 1) if self.duration and speed > 0 else None,
+            'stalled': now - self._last_advance > self.stall_timeout,
+        }
+        if self.output_file and self.position > 0:
+            try:
+                stats['bitrate'] = int(self.output_file.stat().st_size * 8 / self.position)
+            except OSError:
+                pass
+        return stats
+
+    @staticmethod
+    def _format_time(seconds: float) -> str:
+        seconds = int(seconds)
+        return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+    def _render(self, stats: dict):
+        parts = []
+        if stats['percent'] is not None:
+            bar_width = 30
+            filled = int(bar_width * stats['percent'] / 100)
+            parts.append(f"[{'█' * filled}{'░' * (bar_width - filled)}] {stats['percent']:5.1f}%")
+            parts.append(f"{self._format_time(stats['position'])}/{self._format_time(stats['duration'])}")
+        else:
+            parts.append(f"{self.SPINNER[self._ticks % len(self.SPINNER)]} Processing... "
+                         f"({stats['elapsed']:.1f}s elapsed)")
+            self._ticks += 1
+        if stats['fps'] is not None:
+            parts.append(f"{stats['fps']:.1f} fps")
+        if stats['bitrate']:
+            parts.append(f"{stats['bitrate'] / 1e6:.2f} Mb/s")
+        if self.position > 0:
+            parts.append(f"{stats['realtime_factor']:.2f}x")
+        if stats['eta'] is not None:
+            parts.append(f"ETA {self._format_time(stats['eta'])}")
+        if stats['stalled']:
+            parts.append("STALLED")
+        print(f"\r{' '.join(parts)}\033[K", end='', flush=True)
+
+    def finish(self, success: bool, error: str = None):
+        """Emit the 'end' event."""
+        if success and self.duration:
+            self.position = self.duration
+        if self.show:
+            print()  # New line after progress
+        stats = self.stats() if self.start_time else {}
+        self._emit('end', success=success, error=error, **stats)
+
+
+class PipelineProfile:
+    """
+    Per-element profile of a pipeline run, built from the log of the GStreamer tracers.
+
+    The pipeline runs with the latency (per element), proctime, queuelevel, rusage and
+    stats tracers logging to a file; proctime and queuelevel come from GstShark and are
+    left out, along with processing times and queue levels, when it is not installed.
+    The log is then reduced to, per element, the number of buffers pushed, buffers per
+    second, processing time and latency; per queue, the average and peak fill level; per
+    streaming thread, its CPU load and the elements it runs. A flame-style summary shows the share of the processing time of each element,
+    also available as folded stacks (thread;element microseconds) for flamegraph tools.
+    """
+
+    TRACERS = ['latency(flags=element)', 'proctime', 'queuelevel', 'rusage', 'stats']
+
+    # Tracers of TRACERS provided by GstShark rather than GStreamer itself
+    GSTSHARK_TRACERS = ['proctime', 'queuelevel']
+
+    # "0:00:01.2 1234 0x55 TRACE GST_TRACER :0:: proctime, element=(string)x264enc0, time=(string)0:00:00.000042;"
+    LINE_RE = re.compile(r'GST_TRACER :0:: ([\w-]+), (.*?);?\s*$')
+    FIELD_RE = re.compile(r'([\w-]+)=\(\w+\)("(?:[^"\\]|\\.)*"|[^,]*)')
+
+    def __init__(self):
+        self.elements = {}
+        self.element_names = {}
+        self.element_threads = {}
+        self.queues = {}
+        self.threads = {}
+        self.process_cpu = None
+        self.first_ts = None
+        self.last_ts = None
+
+    @classmethod
+    def missing_tracers(cls) -> list:
+        """GstShark tracers gst-inspect-1.0 does not know, empty if it cannot tell."""
+        missing = []
+        for name in cls.GSTSHARK_TRACERS:
+            try:
+                result = subprocess.run(['gst-inspect-1.0', name], capture_output=True)
+            except FileNotFoundError:
+                return []
+            if result.returncode != 0:
+                missing.append(name)
+        return missing
+
+    @classmethod
+    def env(cls, log_file: Path, missing: list = ()) -> dict:
+        """Environment enabling the tracers but the missing ones, writing their log to log_file."""
+        debug = os.environ.get('GST_DEBUG')
+        return {
+            'GST_TRACERS': ';'.join(tracer for tracer in cls.TRACERS if tracer not in missing),
+            'GST_DEBUG': f'{debug},GST_TRACER:7' if debug else 'GST_TRACER:7',
+            'GST_DEBUG_FILE': str(log_file),
+            'GST_DEBUG_NO_COLOR': '1',
+        }
+
+    def _element(self, name: str) -> dict:
+        return self.elements.setdefault(name, {'buffers': 0, 'proctime': 0, 'proctime_count': 0,
+                                               'latency': 0, 'latency_count': 0})
+
+    def parse(self, path: Path) -> 'PipelineProfile':
+        """Accumulate the tracer records of a log file."""
+        with open(path, errors='replace') as f:
+            for line in f:
+                match = self.LINE_RE.search(line)
+                if match:
+                    fields = {key: value.strip('"') for key, value in self.FIELD_RE.findall(match.group(2))}
+                    self._record(match.group(1), fields)
+        return self
+
+    def _record(self, kind: str, fields: dict):
+        if 'ts' in fields:
+            ts = int(fields['ts'])
+            self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+            self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+
+        if kind == 'new-element':
+            self.element_names[fields.get('ix')] = fields.get('name')
+        elif kind == 'buffer':
+            name = self.element_names.get(fields.get('element-ix'))
+            if name:
+                self._element(name)['buffers'] += 1
+                threads = self.element_threads.setdefault(name, {})
+                thread = fields.get('thread-id')
+                threads[thread] = threads.get(thread, 0) + 1
+        elif kind == 'proctime':
+            # GstShark logs the time as a string in the H:MM:SS.nnnnnnnnn format
+            try:
+                time_ns = int(fields['time']) if fields['time'].isdigit() else \
+                    round(parse_timestamp(fields['time']) * 1e9)
+            except ValueError:
+                return
+            element = self._element(fields['element'])
+            element['proctime'] += time_ns
+            element['proctime_count'] += 1
+        elif kind == 'element-latency':
+            element = self._element(fields['element'])
+            element['latency'] += int(fields['time'])
+            element['latency_count'] += 1
+        elif kind == 'queuelevel':
+            ratios = [int(fields[f'size_{unit}']) / int(fields[f'max_size_{unit}'])
+                      for unit in ('buffers', 'bytes', 'time') if int(fields.get(f'max_size_{unit}', 0) or 0)]
+            fill = max(ratios) if ratios else 0.0
+            queue = self.queues.setdefault(fields['queue'], {'total': 0.0, 'count': 0, 'max': 0.0})
+            queue['total'] += fill
+            queue['count'] += 1
+            queue['max'] = max(queue['max'], fill)
+        elif kind == 'thread-rusage':
+            self.threads[fields['thread-id']] = int(fields['average-cpuload']) / 10
+        elif kind == 'proc-rusage':
+            self.process_cpu = int(fields['average-cpuload']) / 10
+
+    def report(self) -> dict:
+        """Profile as a dict, elements sorted by processing time."""
+        duration = (self.last_ts - self.first_ts) / 1e9 if self.first_ts is not None else 0.0
+        total_proctime = sum(element['proctime'] for element in self.elements.values()) or 1
+
+        def main_thread(name):
+            threads = self.element_threads.get(name)
+            return max(threads, key=threads.get) if threads else None
+
+        elements = []
+        for name, element in self.elements.items():
+            elements.append({
+                'element': name,
+                'thread': main_thread(name),
+                'buffers': element['buffers'],
+                'buffers_per_second': round(element['buffers'] / duration, 1) if duration else None,
+                'proctime': round(element['proctime'] / 1e9, 3),
+                'proctime_per_buffer_ms': (round(element['proctime'] / element['proctime_count'] / 1e6, 3)
+                                           if element['proctime_count'] else None),
+                'latency_ms': (round(element['latency'] / element['latency_count'] / 1e6, 3)
+                               if element['latency_count'] else None),
+                'share': round(element['proctime'] / total_proctime * 100, 1),
+            })
+        elements.sort(key=lambda element: (element['proctime'], element['buffers']), reverse=True)
+
+        queues = [{'queue': name, 'average_fill': round(queue['total'] / queue['count'] * 100, 1),
+                   'max_fill': round(queue['max'] * 100, 1)}
+                  for name, queue in sorted(self.queues.items()) if queue['count']]
+
+        threads = [{'thread': thread, 'cpu': cpu,
+                    'elements': sorted(e['element'] for e in elements if e['thread'] == thread)}
+                   for thread, cpu in sorted(self.threads.items(), key=lambda item: -item[1])]
+
+        folded = [f"{element['thread'] or 'unknown'};{element['element']} {int(element['proctime'] * 1e6)}"
+                  for element in elements if element['proctime']]
+
+        return {'duration': round(duration, 3), 'process_cpu': self.process_cpu, 'elements': elements,
+                'queues': queues, 'threads': threads, 'folded': folded}
+
+    @staticmethod
+    def print_report(report: dict):
+        """Print the profile as tables followed by the flame-style summary."""
+        cpu = f", process CPU {report['process_cpu']:.1f}%" if report['process_cpu'] is not None else ''
+        print(f"\nProfile ({report['duration']:.1f}s{cpu}):")
+
+        def value(number, width, digits):
+            return f"{number:>{width}.{digits}f}" if number is not None else f"{'-':>{width}}"
+
+        print(f"  {'Element':<28} {'Buffers':>8} {'Buf/s':>8} {'Time (s)':>9} {'ms/buf':>8} {'Latency ms':>11}")
+        for element in report['elements']:
+            print(f"  {element['element']:<28} {element['buffers']:>8} "
+                  f"{value(element['buffers_per_second'], 8, 1)} {element['proctime']:>9.3f} "
+                  f"{value(element['proctime_per_buffer_ms'], 8, 3)} {value(element['latency_ms'], 11, 3)}")
+
+        if report['queues']:
+            print(f"\n  {'Queue':<28} {'Avg fill':>9} {'Max fill':>9}")
+            for queue in report['queues']:
+                print(f"  {queue['queue']:<28} {queue['average_fill']:>8.1f}% {queue['max_fill']:>8.1f}%")
+
+        if report['threads']:
+            print(f"\n  {'Thread':<20} {'CPU':>7}  Elements")
+            for thread in report['threads']:
+                print(f"  {thread['thread']:<20} {thread['cpu']:>6.1f}%  {', '.join(thread['elements']) or '-'}")
+
+        timed = [element for element in report['elements'] if element['proctime']]
+        if timed:
+            print("\n  Processing time by element:")
+            for element in timed:
+                bar = '█' * max(1, round(element['share'] * 40 / 100))
+                print(f"  {element['element']:<28} {bar:<40} {element['share']:5.1f}%")
+
+
+def default_cache_dir() -> Path:
+    """Directory holding the on-disk caches of the remux tools."""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'gstreamer-toolkit'
+
+
+class ProbeCache:
+    """
+    Persistent cache of media probe results.
+
+    Entries are stored in a SQLite database keyed by the resolved file path and are only
+    returned while the file size, mtime and inode still match, so edited or replaced
+    files are probed again. The least recently used entries are evicted once the cache
+    holds more than `max_entries` files or more than `max_size` bytes of stored info.
+    """
+
+    # Bump when the layout of the stored info changes to invalidate older entries
+    FORMAT_VERSION = 2
+
+    DEFAULT_MAX_ENTRIES = 100000
+    DEFAULT_MAX_SIZE = 64 * 1024 ** 2
+
+    def __init__(self, path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES, max_size: int = DEFAULT_MAX_SIZE):
+        self.path = Path(path) if path else default_cache_dir() / 'probe-cache.sqlite'
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Batch workers share the database, wait for each other's writes. Jobs of one
+        # process (RemuxJob, remux_many()) may share the cache from several threads
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS probe ('
+            ' path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,'
+            ' version INTEGER, last_used REAL, info TEXT)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS probe_last_used ON probe (last_used)')
+        self._db.commit()
+
+    @staticmethod
+    def _file_key(path: Path) -> tuple:
+        st = path.stat()
+        return str(path.resolve()), st.st_size, st.st_mtime_ns, st.st_ino
+
+    def get(self, path: Path) -> dict:
+        """Return the cached info of a file, or None if missing or stale."""
+        key, size, mtime_ns, inode = self._file_key(path)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT size, mtime_ns, inode, version, info FROM probe WHERE path = ?', (key,)
+            ).fetchone()
+            if row is None or row[:4] != (size, mtime_ns, inode, self.FORMAT_VERSION):
+                return None
+            self._db.execute('UPDATE probe SET last_used = ? WHERE path = ?', (time.time(), key))
+            self._db.commit()
+        return json.loads(row[4])
+
+    def put(self, path: Path, info: dict):
+        """Store the info of a file and evict the least recently used entries over the caps."""
+        key, size, mtime_ns, inode = self._file_key(path)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO probe VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, size, mtime_ns, inode, self.FORMAT_VERSION, time.time(),
+                 json.dumps(info, separators=(',', ':')))
+            )
+            self._db.execute(
+                'DELETE FROM probe WHERE path IN ('
+                ' SELECT path FROM probe ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+            self._db.execute(
+                'DELETE FROM probe WHERE path IN ('
+                ' SELECT path FROM (SELECT path, SUM(LENGTH(info)) OVER (ORDER BY last_used DESC, path) AS total'
+                '  FROM probe) WHERE total > ?)',
+                (self.max_size,)
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def content_fingerprint(path: Path, blocks: int = 16, block_size: int = 64 * 1024) -> str:
+    """
+    Fast fingerprint of the content of a file.
+
+    Hashes the file size and `blocks` evenly spaced blocks including the first and the
+    last one, so at most blocks * block_size bytes are read whatever the file size.
+    Files smaller than that are hashed entirely.
+    """
+    size = path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=20)
+    with open(path, 'rb') as f:
+        if size <= blocks * block_size:
+            digest.update(f.read())
+        else:
+            step = (size - block_size) // (blocks - 1)
+            for i in range(blocks):
+                f.seek(i * step)
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    Content-addressed cache of remux outputs.
+
+    Outputs are keyed by the content fingerprint of the input (content_fingerprint()) and
+    the settings that determine the output (streams, codecs and encoder settings, container,
+    trim range), so an identical input remuxed with identical settings is served by
+    hardlinking the stored output (copying it across file systems) instead of running the
+    pipeline again. The size and content fingerprint of a stored
+    output are checked on every hit and entries failing the check are dropped. The least
+    recently used outputs are evicted once the cache holds more than `max_size` bytes.
+    Served outputs share their inode with the cache: replace them rather than editing them
+    in place (remux() unlinks an existing output before writing a new one).
+    """
+
+    # Bump when the key derivation changes to invalidate older entries
+    FORMAT_VERSION = 2
+
+    DEFAULT_MAX_SIZE = 20 * 1024 ** 3
+
+    def __init__(self, path: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        self.path = Path(path) if path else default_cache_dir() / 'output-cache'
+        self.max_size = max_size
+        (self.path / 'objects').mkdir(parents=True, exist_ok=True)
+        # Jobs of one process may share the cache from several threads
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path / 'index.sqlite'), timeout=30, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS output ('
+            ' key TEXT PRIMARY KEY, size INTEGER, fingerprint TEXT, last_used REAL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS output_last_used ON output (last_used)')
+        self._db.commit()
+
+    def key(self, input_file: Path, settings: str) -> str:
+        """Cache key of an input file remuxed with the given serialized output settings."""
+        material = f'{self.FORMAT_VERSION}\0{content_fingerprint(input_file)}\0{settings}'
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _object(self, key: str) -> Path:
+        return self.path / 'objects' / key[:2] / key
+
+    def _remove(self, key: str):
+        self._object(key).unlink(missing_ok=True)
+        self._db.execute('DELETE FROM output WHERE key = ?', (key,))
+        self._db.commit()
+
+    @staticmethod
+    def _link(source: Path, target: Path):
+        """Atomically place a hardlink (or copy) of source at target."""
+        tmp = target.with_name(f'.{target.name}.tmp')
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+
+    def fetch(self, key: str, output_file: Path) -> bool:
+        """
+        Place the cached output of a key at output_file.
+
+        Returns:
+            True on a hit, False if the key is not cached or its output failed the integrity check
+        """
+        with self._lock:
+            row = self._db.execute('SELECT size, fingerprint FROM output WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return False
+            stored = self._object(key)
+            try:
+                valid = stored.stat().st_size == row[0] and content_fingerprint(stored) == row[1]
+            except OSError:
+                valid = False
+            if not valid:
+                print(f"Warning: Dropping corrupted output cache entry {key}", file=sys.stderr)
+                self._remove(key)
+                return False
+            self._link(stored, output_file)
+            self._db.execute('UPDATE output SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+            return True
+
+    def store(self, key: str, output_file: Path):
+        """Add an output to the cache and evict the least recently used outputs over the size cap."""
+        with self._lock:
+            stored = self._object(key)
+            stored.parent.mkdir(exist_ok=True)
+            self._link(output_file, stored)
+            self._db.execute(
+                'INSERT OR REPLACE INTO output VALUES (?, ?, ?, ?)',
+                (key, stored.stat().st_size, content_fingerprint(stored), time.time())
+            )
+            self._db.commit()
+
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM output').fetchone()[0]
+            for old_key, size in self._db.execute('SELECT key, size FROM output ORDER BY last_used').fetchall():
+                if total <= self.max_size:
+                    break
+                self._remove(old_key)
+                total -= size
+
+    def close(self):
+        self._db.close()
+
+
+class KeyframeIndex:
+    """
+    Keyframe (GOP) index of a media file: the PTS of every video keyframe.
+
+    The index is built with a single demux + parse pass over the input (nothing is
+    decoded) and kept as a JSON sidecar, '.<input name>.keyframes.json' next to the
+    input, or in the cache directory when the input directory is not writable. The
+    sidecar records the size and mtime of the input it was built from and is rebuilt
+    when they change, so repeated cuts of the same master only pay for the scan once.
+    """
+
+    # Bump when the sidecar layout changes to invalidate older sidecars
+    FORMAT_VERSION = 2
+
+    def __init__(self, keyframes: list, duration: float = None):
+        """
+        Args:
+            keyframes: Sorted list of keyframe PTS in seconds
+            duration: Duration of the video stream in seconds
+        """
+        self.keyframes = keyframes
+        self.duration = duration
+
+    @staticmethod
+    def sidecar_paths(input_file: Path) -> list:
+        """Candidate sidecar locations, next to the input first."""
+        input_file = input_file.resolve()
+        digest = hashlib.blake2b(str(input_file).encode(), digest_size=16).hexdigest()
+        return [input_file.with_name(f'.{input_file.name}.keyframes.json'),
+                default_cache_dir() / 'keyframes' / f'{digest}.json']
+
+    @classmethod
+    def load(cls, input_file: Path):
+        """Return the index stored in a sidecar of the input, or None if missing or stale."""
+        st = input_file.stat()
+        for path in cls.sidecar_paths(input_file):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if (data.get('version'), data.get('size'), data.get('mtime_ns')) == \
+                    (cls.FORMAT_VERSION, st.st_size, st.st_mtime_ns):
+                return cls(data['keyframes'], data.get('duration'))
+        return None
+
+    def save(self, input_file: Path) -> Path:
+        """Write the sidecar of the input atomically, returns its path or None if no location is writable."""
+        st = input_file.stat()
+        data = {
+            'version': self.FORMAT_VERSION,
+            'input': str(input_file.resolve()),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'duration': self.duration,
+            'keyframes': self.keyframes,
+        }
+        for path in self.sidecar_paths(input_file):
+            tmp = path.with_name(path.name + '.tmp')
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp, 'w') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp, path)
+                return path
+            except OSError:
+                with contextlib.suppress(OSError):
+                    tmp.unlink()
+        return None
+
+    # Seconds the scan may go without a buffer before it is given up
+    STALL_TIMEOUT = 30.0
+
+    @classmethod
+    def build(cls, input_file: Path, cancel_token: 'CancellationToken' = None,
+              stall_timeout: float = STALL_TIMEOUT) -> 'KeyframeIndex':
+        """
+        Scan the input with the GStreamer Python bindings and index its video keyframes.
+
+        Raises:
+            RuntimeError: If the input could not be demuxed or no data flowed for stall_timeout seconds
+            RemuxCancelled: If cancel_token was cancelled during the scan
+        """
+        Gst, _ = load_gst()
+        video_caps = ';'.join(VideoRemuxer.VIDEO_STREAM_CAPS)
+        audio_caps = ';'.join(VideoRemuxer.AUDIO_STREAM_CAPS)
+        # Audio is parsed too so parsebin has no unlinked pad, only the video is indexed
+        pipeline = Gst.parse_launch(
+            f'filesrc location="{input_file.resolve()}" ! parsebin name=dec '
+            f'dec. ! capsfilter caps="{video_caps}" ! fakesink name=video sync=false '
+            f'dec. ! capsfilter caps="{audio_caps}" ! fakesink sync=false'
+        )
+        keyframes = []
+        last_end = [None]
+        last_buffer = [time.monotonic()]
+
+        def on_buffer(pad, probe_info):
+            last_buffer[0] = time.monotonic()
+            buffer = probe_info.get_buffer()
+            if buffer.pts != Gst.CLOCK_TIME_NONE:
+                if not buffer.has_flags(Gst.BufferFlags.DELTA_UNIT):
+                    keyframes.append(buffer.pts / Gst.SECOND)
+                if buffer.duration != Gst.CLOCK_TIME_NONE:
+                    end = (buffer.pts + buffer.duration) / Gst.SECOND
+                    last_end[0] = max(last_end[0] or 0.0, end)
+            return Gst.PadProbeReturn.OK
+
+        pipeline.get_by_name('video').get_static_pad('sink').add_probe(Gst.PadProbeType.BUFFER, on_buffer)
+        bus = pipeline.get_bus()
+        try:
+            pipeline.set_state(Gst.State.PLAYING)
+            msg = None
+            while msg is None:
+                msg = bus.timed_pop_filtered(Gst.SECOND // 10, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                if msg is None and time.monotonic() - last_buffer[0] > stall_timeout:
+                    raise RuntimeError(f"Could not index {input_file}: no data for {stall_timeout:g}s")
+            if msg.type == Gst.MessageType.ERROR:
+                err, _ = msg.parse_error()
+                raise RuntimeError(f"Could not index {input_file}: {err.message}")
+        finally:
+            pipeline.set_state(Gst.State.NULL)
+
+        keyframes.sort()
+        return cls(keyframes, last_end[0])
+
+    @classmethod
+    def for_file(cls, input_file: Path, cancel_token: 'CancellationToken' = None) -> 'KeyframeIndex':
+        """Return the index of the input from its sidecar, building and saving it if needed."""
+        index = cls.load(input_file)
+        if index is None:
+            index = cls.build(input_file, cancel_token)
+            if index.save(input_file) is None:
+                print(f"Warning: Could not write the keyframe index of {input_file}", file=sys.stderr)
+        return index
+
+    def keyframe_before(self, position: float) -> float:
+        """PTS of the last keyframe at or before `position` seconds, the first one if none."""
+        i = bisect.bisect_right(self.keyframes, position + 1e-6)
+        return self.keyframes[max(0, i - 1)]
+
+
+class CapabilityRegistry:
+    """
+    On-disk cache of the elements available in the GStreamer registry.
+
+    The registry is scanned once (through the Python bindings, or gst-inspect-1.0 as a
+    fallback) and the element names, ranks and, for encoders and muxers, pad template
+    caps are stored as JSON. The cache is rebuilt when the GStreamer registry file,
+    the plugin directories or the plugin path environment variables change.
+    """
+
+    # Bump when the layout of the cache changes
+    FORMAT_VERSION = 1
+
+    PLUGIN_PATH_VARIABLES = ('GST_PLUGIN_PATH', 'GST_PLUGIN_PATH_1_0',
+                             'GST_PLUGIN_SYSTEM_PATH', 'GST_PLUGIN_SYSTEM_PATH_1_0')
+
+    def __init__(self, path: str = None, backend: str = 'auto'):
+        self.path = Path(path) if path else default_cache_dir() / 'capabilities.json'
+        self.backend = backend
+        self.elements = None
+        self._load() or self._scan()
+
+    @classmethod
+    def _fingerprint(cls, plugin_dirs: list) -> dict:
+        """Describe the registry state; any change invalidates the cache."""
+        paths = [os.environ[var] for var in ('GST_REGISTRY_1_0', 'GST_REGISTRY') if os.environ.get(var)]
+        gst_cache = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'gstreamer-1.0'
+        paths += sorted(glob.glob(str(gst_cache / 'registry.*.bin')))
+        paths += plugin_dirs
+
+        files = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                files.append([path, st.st_mtime_ns, st.st_size])
+            except OSError:
+                files.append([path, None, None])
+        return {'files': files, 'env': {var: os.environ.get(var) for var in cls.PLUGIN_PATH_VARIABLES}}
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != self.FORMAT_VERSION:
+            return False
+        if data.get('fingerprint') != self._fingerprint(data.get('plugin_dirs', [])):
+            return False
+        self.elements = data['elements']
+        return True
+
+    def _scan(self) -> bool:
+        if self.backend == 'gst' or (self.backend == 'auto' and GstEngine.available()):
+            elements, plugin_dirs = self._scan_gst()
+        else:
+            elements, plugin_dirs = self._scan_inspect()
+        if not elements:
+            return False
+
+        self.elements = elements
+        data = {
+            'version': self.FORMAT_VERSION,
+            'plugin_dirs': plugin_dirs,
+            'fingerprint': self._fingerprint(plugin_dirs),
+            'elements': elements,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: Could not write capability cache {self.path}: {e}", file=sys.stderr)
+        return True
+
+    @staticmethod
+    def _scan_gst() -> tuple:
+        """Scan the registry through the Python bindings."""
+        Gst, _ = load_gst()
+        registry = Gst.Registry.get()
+
+        plugin_dirs = set()
+        for plugin in registry.get_plugin_list():
+            filename = plugin.get_filename()
+            if filename:
+                plugin_dirs.add(str(Path(filename).parent))
+
+        elements = {}
+        for factory in registry.get_feature_list(Gst.ElementFactory):
+            klass = factory.get_metadata('klass') or ''
+            entry = {'klass': klass, 'rank': factory.get_rank()}
+            if 'Encoder' in klass or 'Muxer' in klass:
+                caps = {'sink': [], 'src': []}
+                for template in factory.get_static_pad_templates():
+                    direction = 'sink' if template.direction == Gst.PadDirection.SINK else 'src'
+                    caps[direction].append(template.get_caps().to_string())
+                entry['caps'] = caps
+            elements[factory.get_name()] = entry
+        return elements, sorted(plugin_dirs)
+
+    @staticmethod
+    def _scan_inspect() -> tuple:
+        """Scan the registry with gst-inspect-1.0 (element names only)."""
+        try:
+            result = subprocess.run(['gst-inspect-1.0'], capture_output=True, text=True, check=True)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return {}, []
+
+        elements = {}
+        for line in result.stdout.split('\n'):
+            match = re.match(r'^[\w.-]+:\s+([\w-]+):\s+(.*)$', line)
+            if match:
+                elements[match.group(1)] = {'klass': '', 'rank': None}
+        return elements, []
+
+    @property
+    def available(self) -> bool:
+        """True if the registry could be scanned."""
+        return self.elements is not None
+
+    def has(self, element: str) -> bool:
+        """Check if an element exists. Unknown registries report every element as present."""
+        return self.elements is None or element in self.elements
+
+    def caps(self, element: str, direction: str) -> list:
+        """Pad template caps ('sink' or 'src') of an encoder or muxer, empty if unknown."""
+        entry = (self.elements or {}).get(element, {})
+        return entry.get('caps', {}).get(direction, [])
+
+
+class RemuxCancelled(KeyboardInterrupt):
+    """
+    Raised inside a running job when its CancellationToken is cancelled.
+
+    It derives from KeyboardInterrupt so that a cancelled job goes through the same
+    cleanup as Ctrl+C: the gst-launch-1.0 process is terminated, the in-process pipeline
+    is stopped, a resumable checkpoint is kept and the 'end' event reports 'cancelled'.
+    """
+
+
+class CancellationToken:
+    """Thread-safe flag used to cancel running jobs from another thread or an event loop."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise RemuxCancelled()
+
+
+class PipelineTuning:
+    """
+    Queue limits and encoder thread budget of one job, sized from the input and the node.
+
+    The cores of the node are shared evenly by `concurrency` jobs. Decoded (raw) video is
+    only held for a handful of frames between the decoder and the encoder, while
+    compressed streams are bounded by time so the muxer can still interleave them. The
+    memory ceiling adds the queue limits to the frames held by the decoder and by the
+    encoder lookahead, it is an estimate of the media buffers a job can pin, not of the RSS
+    of the libraries themselves.
+    """
+
+    # Frames buffered inside the encoders at the default settings (lookahead, lag-in-frames)
+    ENCODER_BUFFERED_FRAMES = {'x264enc': 40, 'x265enc': 25, 'vp9enc': 25, 'vp8enc': 25}
+    DEFAULT_ENCODER_BUFFERED_FRAMES = 8
+
+    # Reference frames a decoder may hold (H.264/HEVC DPB)
+    DECODER_BUFFERED_FRAMES = 16
+
+    # Seconds of compressed data a demuxer or muxer queue may hold
+    COMPRESSED_QUEUE_TIME = 2.0
+
+    def __init__(self, width: int, height: int, framerate: float = None, bitrate: int = None,
+                 output_width: int = None, output_height: int = None, encoder: str = None,
+                 cores: int = None, concurrency: int = 1):
+        """
+        Args:
+            width, height: Decoded video size
+            framerate: Video framerate, 30 if unknown
+            bitrate: Bitrate of the compressed video in bits/s, estimated if unknown
+            output_width, output_height: Encoded video size if scaled
+            encoder: Video encoder element, None when the video is copied
+            cores: CPU cores of the node. Default: os.cpu_count()
+            concurrency: Number of jobs sharing the node
+        """
+        self.framerate = framerate or 30.0
+        self.concurrency = max(1, concurrency)
+        self.cores = cores or os.cpu_count() or 1
+        self.encoder = encoder
+
+        # I420: 12 bits per pixel
+        self.frame_bytes = width * height * 3 // 2
+        self.output_frame_bytes = (output_width or width) * (output_height or height) * 3 // 2
+        # Without a probed bitrate assume a generous 0.15 bits per pixel
+        self.bitrate = bitrate or int(width * height * self.framerate * 0.15)
+
+        self.encoder_threads = max(1, self.cores // self.concurrency)
+        self.raw_queue_frames = max(2, min(8, round(self.framerate / 4)))
+        self.compressed_queue_bytes = max(2 * 1024 * 1024,
+                                          int(self.bitrate / 8 * self.COMPRESSED_QUEUE_TIME * 1.5))
+
+    def queue(self, kind: str) -> str:
+        """queue element limited for 'raw' video or 'compressed' streams."""
+        if kind == 'raw':
+            return (f'queue max-size-buffers={self.raw_queue_frames} '
+                    f'max-size-bytes={self.raw_queue_frames * self.frame_bytes} max-size-time=0')
+        return (f'queue max-size-buffers=0 max-size-bytes={self.compressed_queue_bytes} '
+                f'max-size-time={int(self.COMPRESSED_QUEUE_TIME * 1e9)}')
+
+    def memory_ceiling(self, queues: dict) -> int:
+        """
+        Estimated upper bound of the media buffers of a job, in bytes.
+
+        Args:
+            queues: Number of queues of each kind in the pipeline, e.g. {'raw': 1, 'compressed': 3}
+        """
+        ceiling = queues.get('raw', 0) * self.raw_queue_frames * self.frame_bytes
+        ceiling += queues.get('compressed', 0) * self.compressed_queue_bytes
+        if self.encoder:
+            ceiling += self.DECODER_BUFFERED_FRAMES * self.frame_bytes
+            buffered = self.ENCODER_BUFFERED_FRAMES.get(self.encoder, self.DEFAULT_ENCODER_BUFFERED_FRAMES)
+            ceiling += (buffered + self.encoder_threads) * self.output_frame_bytes
+        return ceiling
+
+
 class VideoRemuxer:
-    """Handles video remuxing operations using gst-launch-1.0."""
+    """Handles video remuxing operations using gst-launch-1.0 or the in-process GstEngine."""
+
+    # Available pipeline backends: 'gst' runs in-process, 'launch' spawns gst-launch-1.0,
+    # 'auto' prefers 'gst' and falls back to 'launch' when the Python bindings are missing.
+    BACKENDS = ('auto', 'gst', 'launch')
 
     # Common container formats and their GStreamer muxers
     MUXER_MAP = {
@@ -62,9 +1380,104 @@ class VideoRemuxer:
         'ac3': 'avenc_ac3',
     }
 
+    # Codec family of each codec name accepted on the command line
+    CODEC_FAMILY_MAP = {
+        'libx264': 'h264', 'h264': 'h264', 'h264_vaapi': 'h264',
+        'libx265': 'h265', 'h265': 'h265', 'hevc': 'h265', 'hevc_vaapi': 'h265',
+        'libvpx-vp9': 'vp9', 'vp9': 'vp9', 'vp9_vaapi': 'vp9',
+        'libvpx': 'vp8', 'vp8': 'vp8', 'vp8_vaapi': 'vp8',
+        'av1': 'av1',
+        'aac': 'aac',
+        'libopus': 'opus', 'opus': 'opus',
+        'libvorbis': 'vorbis', 'vorbis': 'vorbis',
+        'libmp3lame': 'mp3', 'mp3': 'mp3',
+        'ac3': 'ac3',
+    }
+
+    # Codec families each muxer accepts. Muxers that are missing from the matrix, or map
+    # to None (any codec), never trigger an automatic copy or re-encode decision.
+    MUXER_CODECS = {
+        'mp4mux': {'h264', 'h265', 'vp9', 'av1', 'aac', 'mp3', 'opus', 'ac3'},
+        'qtmux': {'h264', 'h265', 'aac', 'mp3', 'ac3'},
+        'matroskamux': None,
+        'webmmux': {'vp8', 'vp9', 'av1', 'opus', 'vorbis'},
+        'avimux': {'h264', 'aac', 'mp3', 'ac3'},
+        'oggmux': {'vp8', 'opus', 'vorbis'},
+        'flvmux': {'h264', 'aac', 'mp3'},
+        'mpegtsmux': {'h264', 'h265', 'aac', 'mp3', 'ac3'},
+        '3gppmux': {'h264', 'aac'},
+    }
+
+    # Codecs used when a copied stream is not valid for the target muxer
+    MUXER_DEFAULT_CODECS = {
+        'mp4mux': {'video': 'h264', 'audio': 'aac'},
+        'qtmux': {'video': 'h264', 'audio': 'aac'},
+        'webmmux': {'video': 'vp9', 'audio': 'opus'},
+        'avimux': {'video': 'h264', 'audio': 'mp3'},
+        'oggmux': {'video': 'vp8', 'audio': 'vorbis'},
+        'flvmux': {'video': 'h264', 'audio': 'aac'},
+        'mpegtsmux': {'video': 'h264', 'audio': 'aac'},
+        '3gppmux': {'video': 'h264', 'audio': 'aac'},
+    }
+
+    # Codec family of the probed stream caps (audio/mpeg is resolved by its mpegversion)
+    CAPS_FAMILY_MAP = {
+        'video/x-h264': 'h264', 'video/x-h265': 'h265', 'video/x-vp8': 'vp8',
+        'video/x-vp9': 'vp9', 'video/x-av1': 'av1', 'audio/x-opus': 'opus',
+        'audio/x-vorbis': 'vorbis', 'audio/x-ac3': 'ac3',
+    }
+
+    # Encoder implementations of each codec family, fastest first (hardware before software).
+    # Generic codec names (e.g. 'h264') pick the first available one; implementation specific
+    # names (e.g. 'libx264') only fall back to another implementation when theirs is missing.
+    ENCODER_IMPLEMENTATIONS = {
+        'h264': ['vah264enc', 'vah264lpenc', 'nvh264enc', 'qsvh264enc', 'x264enc', 'openh264enc'],
+        'h265': ['vah265enc', 'vah265lpenc', 'vahevcenc', 'nvh265enc', 'qsvh265enc', 'x265enc'],
+        'vp9': ['vavp9enc', 'vavp9lpenc', 'qsvvp9enc', 'vp9enc'],
+        'vp8': ['vavp8enc', 'vp8enc'],
+        'av1': ['vaav1enc', 'vaav1lpenc', 'nvav1enc', 'qsvav1enc', 'svtav1enc', 'av1enc', 'rav1enc'],
+        'aac': ['fdkaacenc', 'avenc_aac', 'voaacenc', 'faac'],
+        'opus': ['opusenc'],
+        'vorbis': ['vorbisenc'],
+        'mp3': ['lamemp3enc'],
+        'ac3': ['avenc_ac3'],
+    }
+
+    # Compressed caps parsebin can expose, used to route copied streams to the right branch
+    VIDEO_STREAM_CAPS = (
+        'video/x-h264', 'video/x-h265', 'video/x-vp8', 'video/x-vp9', 'video/x-av1',
+        'video/mpeg', 'video/x-theora', 'video/x-h263', 'video/x-divx', 'video/x-xvid',
+        'video/x-msmpeg', 'video/x-wmv', 'video/x-prores', 'video/x-dirac', 'image/jpeg',
+        'video/x-raw',
+    )
+    AUDIO_STREAM_CAPS = (
+        'audio/mpeg', 'audio/x-opus', 'audio/x-vorbis', 'audio/x-flac', 'audio/x-ac3',
+        'audio/x-eac3', 'audio/x-dts', 'audio/x-alaw', 'audio/x-mulaw', 'audio/x-speex',
+        'audio/x-wma', 'audio/AMR', 'audio/AMR-WB', 'audio/x-raw',
+    )
+
+    # Muxer properties of the streaming output mode, {fragment} is the fragment duration in ms
+    STREAMING_MUXER_PROPERTIES = {
+        'mp4mux': 'fragment-duration={fragment} streamable=true',
+        'qtmux': 'fragment-duration={fragment} streamable=true',
+        'matroskamux': 'streamable=true',
+        'webmmux': 'streamable=true',
+        'flvmux': 'streamable=true',
+        'mpegtsmux': 'alignment=7',
+    }
+
+    # Manifest of the committed segments in the checkpoint directory of a resumable encode
+    CHECKPOINT_MANIFEST = 'checkpoint.json'
+    CHECKPOINT_VERSION = 1
+
     def __init__(self, input_file: str, output_file: str = None, output_format: str = None,
                  video_codec: str = None, audio_codec: str = None, vaapi_device: str = None,
-                 preset: str = 'medium', resolution: str = None):
+                 preset: str = 'medium', resolution: str = None, backend: str = 'auto',
+                 threads: int = None, probe_cache: ProbeCache = None,
+                 capabilities: CapabilityRegistry = None, auto_copy: bool = True,
+                 stream: str = None, fragment_duration: float = 1.0,
+                 cancel_token: CancellationToken = None, output_cache: OutputCache = None,
+                 auto_tune: bool = True, concurrency: int = 1, start: float = None, end: float = None):
         """
         Initialize the remuxer.
 
@@ -72,18 +1485,63 @@ class VideoRemuxer:
             input_file: Path to input video file
             output_file: Optional custom output filename
             output_format: Optional target container format (e.g., 'webm', 'mp4', 'mkv', 'matroska')
-            video_codec: Optional video codec (e.g., 'libx264', 'libvpx-vp9'). If None, copies video stream.
-            audio_codec: Optional audio codec (e.g., 'aac', 'libopus'). If None, copies audio stream.
+            video_codec: Optional video codec (e.g., 'libx264', 'libvpx-vp9'). If None or 'copy', copies video stream.
+            audio_codec: Optional audio codec (e.g., 'aac', 'libopus'). If None or 'copy', copies audio stream.
             vaapi_device: Optional VAAPI device path (e.g., '/dev/dri/renderD129') for Intel hardware acceleration.
             preset: Encoding speed/quality preset ('fast', 'medium', 'slow'). Default: 'medium'.
             resolution: Optional output resolution in WIDTHxHEIGHT format (e.g., '1920x1080').
+            backend: Pipeline backend ('auto', 'gst' or 'launch'). Default: 'auto'.
+            threads: Optional number of threads software encoders may use. If None, encoders pick their own.
+            probe_cache: Optional ProbeCache used by get_video_info() to skip probing unchanged files.
+            capabilities: Optional CapabilityRegistry used to pick the fastest available encoder
+                          and to detect missing elements before running the pipeline.
+            auto_copy: Let remux() copy streams whose codec already is the requested one and
+                       re-encode copied streams the target container does not accept.
+            stream: Optional streaming target replacing the output file: '-' for stdout,
+                    'tcp://HOST:PORT' to connect to a listening consumer, or the path of a
+                    named pipe. The container is written as it is produced (fragmented MP4).
+            fragment_duration: Fragment (and keyframe interval) duration in seconds when streaming.
+            cancel_token: Optional CancellationToken stopping the running job when cancelled.
+            output_cache: Optional OutputCache letting remux() reuse the output of an identical
+                          earlier job instead of running the pipeline.
+            auto_tune: Size the queues and the encoder thread budget from the probed input and
+                       the node (see PipelineTuning). Only applies once the input was probed.
+            concurrency: Number of jobs sharing the CPU cores of the node, for auto_tune.
+            start, end: Optional range in seconds to cut from the input. Copied video starts at
+                        the keyframe at or before `start` (found in the KeyframeIndex of the
+                        input), re-encoded video at `start` exactly. Requires the gst backend.
         """
         self.input_file = Path(input_file)
-        self.video_codec = video_codec
-        self.audio_codec = audio_codec
+        # 'copy' selects stream copy explicitly, same as leaving the codec unset
+        self.video_codec = None if video_codec and video_codec.lower() == 'copy' else video_codec
+        self.audio_codec = None if audio_codec and audio_codec.lower() == 'copy' else audio_codec
         self.vaapi_device = vaapi_device
         self.preset = preset
         self.resolution = resolution
+        self.threads = threads
+        self.probe_cache = probe_cache
+        self.capabilities = capabilities
+        self.auto_copy = auto_copy
+        self.stream = stream
+        self.fragment_duration = fragment_duration
+        self._stream_fd = None
+        self.cancel_token = cancel_token
+        self.output_cache = output_cache
+        # Per-element profile of the last remux(profile=True) run
+        self.profile = None
+        self.auto_tune = auto_tune
+        self.concurrency = concurrency
+        self.start = start
+        self.end = end
+        # Queue counts of the last pipeline built, for the memory ceiling
+        self._queues = {}
+        self._selected_encoders = {}
+        # Probe result, filled by the first get_video_info() call and reused afterwards
+        self.info = {}
+
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of: {', '.join(self.BACKENDS)}")
+        self.backend = backend
 
         if not self.input_file.exists():
             raise FileNotFoundError(f"Input file not found: {input_file}")
@@ -116,6 +1574,15 @@ class VideoRemuxer:
             # Try to use format name directly as muxer
             self.muxer = f'{self.output_format}mux'
 
+        if self.stream and self.muxer not in self.STREAMING_MUXER_PROPERTIES:
+            raise ValueError(f"Format '{self.output_format}' cannot be streamed, use one of: mp4, mov, mkv, webm, flv, ts")
+        if self.stream:
+            # Validate the streaming target before any work is done
+            self._sink_element()
+
+        if (start is not None and start < 0) or (end is not None and end <= (start or 0)):
+            raise ValueError(f"Invalid trim range: start {start}, end {end}")
+
     def check_gstreamer(self) -> bool:
         """Check if gst-launch-1.0 is available in the system."""
         try:
@@ -129,34 +1596,104 @@ class VideoRemuxer:
         except (subprocess.CalledProcessError, FileNotFoundError):
             return False
 
+    def _resolve_backend(self) -> str:
+        """Resolve the 'auto' backend to 'gst' or 'launch'."""
+        if self.backend != 'auto':
+            return self.backend
+        return 'gst' if GstEngine.available() else 'launch'
+
     def get_video_info(self) -> dict:
-        """Get information about the input video using gst-discoverer-1.0."""
+        """
+        Get information about the input video.
+
+        Probing runs in-process through GstPbutils.Discoverer with the 'gst' backend and
+        through gst-discoverer-1.0 otherwise. The result is kept on the instance and, if a
+        probe cache is set, on disk so that unchanged files are never probed twice.
+
+        Returns:
+            Dict with 'duration' (seconds), 'container' and a 'streams' list; each stream has
+            'codec_type', 'codec_name', 'caps' and, when known, 'width', 'height', 'framerate',
+            'bitrate', 'channels' and 'sample_rate'. Empty dict if probing failed.
+        """
+        if not self.info:
+            self.info = probe_files([self.input_file], jobs=1, probe_cache=self.probe_cache,
+                                    backend=self.backend)[self.input_file]
+        return self.info
+
+    @staticmethod
+    def _probe_with_discoverer_cli(path: Path) -> dict:
+        """Probe a file with gst-discoverer-1.0 and parse its output."""
         try:
             result = subprocess.run(
-                ['gst-discoverer-1.0', '-v', str(self.input_file)],
+                ['gst-discoverer-1.0', '-v', str(path)],
                 capture_output=True,
                 text=True,
                 check=True
             )
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return {}
 
-            info = {'streams': []}
-
-            # Parse duration
-            duration_match = re.search(r'Duration: (\d+):(\d+):(\d+)\.(\d+)', result.stdout)
-            if duration_match:
-                hours, minutes, seconds, fraction = duration_match.groups()
-                info['duration'] = int(hours) * 3600 + int(minutes) * 60 + int(seconds) + float(f"0.{fraction}")
+        return VideoRemuxer._parse_discoverer_output(result.stdout)
 
-            # Parse streams
-            for line in result.stdout.split('\n'):
-                if 'video' in line.lower() and 'Stream' in line:
-                    info['streams'].append({'codec_type': 'video', 'codec_name': line.strip()})
-                elif 'audio' in line.lower() and 'Stream' in line:
-                    info['streams'].append({'codec_type': 'audio', 'codec_name': line.strip()})
+    @staticmethod
+    def _parse_discoverer_output(output: str) -> dict:
+        """Parse the text output of gst-discoverer-1.0 -v into structured stream info."""
+        info = {'streams': []}
+
+        # Parse duration
+        duration_match = re.search(r'Duration: (\d+):(\d+):(\d+)\.(\d+)', output)
+        if duration_match:
+            hours, minutes, seconds, fraction = duration_match.groups()
+            info['duration'] = int(hours) * 3600 + int(minutes) * 60 + int(seconds) + float(f"0.{fraction}")
+
+        # Parse streams: a "<type> #N: <description>" header followed by indented "Key: value"
+        # lines. With -v the description is the caps of the stream, which are printed again
+        # on the line after "Codec:"
+        stream = None
+        codec_block = False
+        for line in output.split('\n'):
+            if codec_block:
+                codec_block = False
+                if stream is not None and line.strip():
+                    stream['caps'] = line.strip()
+                    continue
+
+            header = re.match(r'\s*(container|video|audio|subtitles?)(?: #\d+)?: (.*)$', line)
+            if header:
+                kind, description = header.groups()
+                description = description.strip()
+                if kind == 'container':
+                    info['container'] = description
+                    stream = None
+                else:
+                    stream = {'codec_type': 'subtitle' if kind.startswith('subtitle') else kind,
+                              'codec_name': description}
+                    if re.match(r'[a-z]+/[\w.+-]+(?:,|$)', description):
+                        # Name the codec by the media type rather than the whole caps string
+                        stream['caps'] = description
+                        stream['codec_name'] = description.split(',')[0]
+                    info['streams'].append(stream)
+                continue
+
+            if re.match(r'\s*Codec:\s*$', line):
+                codec_block = True
+                continue
+
+            field = re.match(r'\s*(Width|Height|Frame rate|Bitrate|Channels|Sample rate): (.*)$', line)
+            if not field or stream is None:
+                continue
+            key, value = field.groups()
+            value = value.strip()
+            if key == 'Frame rate':
+                num, _, den = value.partition('/')
+                if num.isdigit() and den.isdigit() and int(den):
+                    stream['framerate'] = round(int(num) / int(den), 3)
+            else:
+                number = re.match(r'\d+', value)
+                if number:
+                    stream[key.lower().replace(' ', '_')] = int(number.group())
 
-            return info
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return {}
+        return info
 
     def _get_video_encoder_element(self) -> str:
         """Get GStreamer video encoder element name."""
@@ -168,7 +1705,7 @@ class VideoRemuxer:
             # Try to use codec name directly
             encoder = self.video_codec
 
-        return encoder
+        return self._select_encoder(self.video_codec, encoder)
 
     def _get_audio_encoder_element(self) -> str:
         """Get GStreamer audio encoder element name."""
@@ -180,11 +1717,157 @@ class VideoRemuxer:
             # Try to use codec name directly
             encoder = self.audio_codec
 
-        return encoder
+        return self._select_encoder(self.audio_codec, encoder)
+
+    def _select_encoder(self, codec: str, encoder: str) -> str:
+        """Pick the fastest available implementation of a codec from the capability registry."""
+        if not self.capabilities or not self.capabilities.available:
+            return encoder
+        if codec in self._selected_encoders:
+            return self._selected_encoders[codec]
+
+        selected = encoder
+        family = self.CODEC_FAMILY_MAP.get(codec.lower())
+        if family:
+            generic = codec.lower() in (family, 'hevc')
+            if generic or not self.capabilities.has(encoder):
+                available = [name for name in self.ENCODER_IMPLEMENTATIONS[family] if self.capabilities.has(name)]
+                if available:
+                    selected = available[0]
+                    if not generic:
+                        print(f"Warning: {encoder} is not available, using {selected} for {codec}", file=sys.stderr)
+
+        self._selected_encoders[codec] = selected
+        return selected
+
+    @classmethod
+    def _caps_family(cls, caps: str):
+        """Codec family of a caps string, None if it is not one of the known families."""
+        fields = [field.strip() for field in caps.split(',')]
+        media_type = fields[0]
+        if media_type == 'audio/mpeg':
+            if 'mpegversion=(int)1' in fields:
+                return 'mp3' if 'layer=(int)3' in fields else None
+            return 'aac'
+        return cls.CAPS_FAMILY_MAP.get(media_type)
+
+    def _muxer_accepts(self, family: str, caps: str):
+        """
+        Whether the target muxer accepts a stream.
+
+        Returns:
+            True or False, or None when the muxer is unknown and no decision can be made
+        """
+        if self.muxer in self.MUXER_CODECS:
+            accepted = self.MUXER_CODECS[self.muxer]
+            return accepted is None or family in accepted
+        if self.capabilities and self.capabilities.available:
+            sink_caps = self.capabilities.caps(self.muxer, 'sink')
+            if sink_caps:
+                media_type = caps.split(',')[0].strip()
+                return any(media_type in template for template in sink_caps)
+        return None
+
+    def plan_streams(self) -> dict:
+        """
+        Decide per stream between copy and re-encode from the compatibility matrix.
+
+        A stream whose source codec already is the requested one is copied instead of being
+        re-encoded (unless it is scaled), and a stream to be copied that the target muxer does
+        not accept is re-encoded with the default codec of the container. Every decision is
+        logged. The decisions update video_codec and audio_codec.
+
+        Returns:
+            Dict mapping 'video' and 'audio' to 'copy' or the codec used to re-encode them
+        """
+        info = self.get_video_info()
+        plan = {}
+        for stream_type in ('video', 'audio'):
+            stream = next((s for s in info.get('streams', []) if s.get('codec_type') == stream_type), None)
+            attribute = f'{stream_type}_codec'
+            codec = getattr(self, attribute)
+            if stream is None or not stream.get('caps'):
+                continue
+            source_family = self._caps_family(stream['caps'])
+            source_name = stream.get('codec_name') or stream['caps'].split(',')[0]
+
+            if codec:
+                plan[stream_type] = codec
+                family = self.CODEC_FAMILY_MAP.get(codec.lower())
+                if not family or family != source_family:
+                    continue
+                if stream_type == 'video' and self.resolution:
+                    print(f"{stream_type.capitalize()}: source is already {source_name}, "
+                          f"re-encoding with {codec} to scale it to {self.resolution}")
+                    continue
+                if self._muxer_accepts(family, stream['caps']):
+                    print(f"{stream_type.capitalize()}: source is already {source_name}, "
+                          f"copying it instead of re-encoding with {codec}")
+                    setattr(self, attribute, None)
+                    plan[stream_type] = 'copy'
+            else:
+                plan[stream_type] = 'copy'
+                if self._muxer_accepts(source_family, stream['caps']) is not False:
+                    continue
+                default = self.MUXER_DEFAULT_CODECS.get(self.muxer, {}).get(stream_type)
+                if default:
+                    print(f"{stream_type.capitalize()}: {self.muxer} does not accept {source_name}, "
+                          f"re-encoding it with {default}")
+                    setattr(self, attribute, default)
+                    plan[stream_type] = default
+        return plan
+
+    def missing_elements(self) -> list:
+        """Elements of the pipeline the capability registry does not know about."""
+        if not self.capabilities or not self.capabilities.available:
+            return []
+        needed = [self.muxer, self._get_video_encoder_element(), self._get_audio_encoder_element()]
+        return [element for element in needed if element and not self.capabilities.has(element)]
+
+    def _check_elements(self) -> bool:
+        """Fail early when the pipeline needs elements that are not installed."""
+        missing = self.missing_elements()
+        if missing:
+            print(f"Error: GStreamer element(s) not available: {', '.join(missing)}", file=sys.stderr)
+            return False
+        return True
+
+    @property
+    def tuning(self):
+        """PipelineTuning of this job, None if auto-tuning is off or the input was not probed yet."""
+        if not self.auto_tune:
+            return None
+        video = next((stream for stream in self.info.get('streams', [])
+                      if stream.get('codec_type') == 'video' and stream.get('width')), None)
+        if video is None:
+            return None
+        output_width = output_height = None
+        if self.resolution and 'x' in self.resolution:
+            output_width, output_height = (int(value) for value in self.resolution.split('x'))
+        return PipelineTuning(video['width'], video['height'], video.get('framerate'),
+                              bitrate=video.get('bitrate') or None,
+                              output_width=output_width, output_height=output_height,
+                              encoder=self._get_video_encoder_element(), concurrency=self.concurrency)
+
+    def _queue(self, kind: str, tuning) -> str:
+        """queue element of the given kind ('raw' or 'compressed'), tuned if possible."""
+        self._queues[kind] = self._queues.get(kind, 0) + 1
+        return tuning.queue(kind) if tuning else 'queue'
+
+    def _encoder_threads(self):
+        """Thread count of software encoders: explicit, or the job's share of the cores when packed."""
+        if self.threads:
+            return self.threads
+        tuning = self.tuning
+        if tuning and self.concurrency > 1:
+            return tuning.encoder_threads
+        # A single job lets the encoder pick its own thread count
+        return None
 
     def _get_encoder_properties(self, encoder_name: str) -> str:
         """Get encoder-specific properties based on preset."""
         props = []
+        threads = self._encoder_threads()
 
         # VAAPI encoders
         if encoder_name.startswith('va'):
@@ -195,6 +1878,8 @@ class VideoRemuxer:
                 'slow': 7
             }
             props.append(f'target-usage={quality_map[self.preset]}')
+            if self.stream:
+                props.append(f'key-int-max={self._keyframe_interval()}')
 
         # x264enc
         elif encoder_name == 'x264enc':
@@ -204,6 +1889,10 @@ class VideoRemuxer:
                 'slow': 'slow'
             }
             props.append(f'speed-preset={preset_map[self.preset]}')
+            if threads:
+                props.append(f'threads={threads}')
+            if self.stream:
+                props.append(f'key-int-max={self._keyframe_interval()}')
 
         # x265enc
         elif encoder_name == 'x265enc':
@@ -213,6 +1902,13 @@ class VideoRemuxer:
                 'slow': 'slow'
             }
             props.append(f'speed-preset={preset_map[self.preset]}')
+            options = []
+            if threads:
+                options.append(f'pools={threads}:frame-threads={min(threads, 4)}')
+            if self.stream:
+                options.append(f'keyint={self._keyframe_interval()}')
+            if options:
+                props.append(f'option-string="{":".join(options)}"')
 
         # vp9enc
         elif encoder_name == 'vp9enc':
@@ -224,6 +1920,10 @@ class VideoRemuxer:
             }
             props.append(f'cpu-used={cpu_used_map[self.preset]}')
             props.append('deadline=1')  # 1 = good quality
+            if threads:
+                props.append(f'threads={threads}')
+            if self.stream:
+                props.append(f'keyframe-max-dist={self._keyframe_interval()}')
 
         # vp8enc
         elif encoder_name == 'vp8enc':
@@ -233,95 +1933,253 @@ class VideoRemuxer:
                 'slow': 0
             }
             props.append(f'cpu-used={cpu_used_map[self.preset]}')
+            if threads:
+                props.append(f'threads={threads}')
+            if self.stream:
+                props.append(f'keyframe-max-dist={self._keyframe_interval()}')
 
         return ' '.join(props) if props else ''
 
-    def _build_pipeline(self) -> str:
-        """Build gst-launch-1.0 pipeline string."""
-        pipeline_parts = []
+    def _keyframe_interval(self) -> int:
+        """Frames per fragment, so that every streamed fragment can start with a keyframe."""
+        framerate = next((stream.get('framerate') for stream in self.info.get('streams', [])
+                          if stream.get('codec_type') == 'video' and stream.get('framerate')), 30.0)
+        return max(1, round(framerate * self.fragment_duration))
+
+    def _video_encode_elements(self, video_encoder: str) -> list:
+        """Elements turning decoded video into the encoded target video."""
+        # Video encoding pipeline
+        video_elements = ['videoconvert']
+
+        # Resolution scaling
+        if self.resolution:
+            try:
+                width, height = self.resolution.split('x')
+                video_elements.append('videoscale')
+                video_elements.append(f'video/x-raw,width={width},height={height}')
+            except ValueError:
+                print(f"Warning: Invalid resolution format '{self.resolution}', expected WIDTHxHEIGHT", file=sys.stderr)
+
+        # Video encoder with properties
+        encoder_props = self._get_encoder_properties(video_encoder)
+        if encoder_props:
+            video_elements.append(f'{video_encoder} {encoder_props}')
+        else:
+            video_elements.append(video_encoder)
+
+        return video_elements
+
+    def _audio_encode_elements(self, audio_encoder: str) -> list:
+        """Elements turning decoded audio into the encoded target audio."""
+        # Audio encoding pipeline
+        return ['audioconvert', 'audioresample', audio_encoder]
+
+    def _pipeline_env(self) -> dict:
+        """Extra environment variables the pipeline needs."""
+        env = {}
+        video_encoder = self._get_video_encoder_element()
+        if video_encoder and video_encoder.startswith('va') and self.vaapi_device:
+            env['LIBVA_DRIVER_NAME'] = 'iHD'  # or 'i965' for older Intel GPUs
+            # Note: VAAPI device path is typically set via GST_VAAPI_DRM_DEVICE or element property
+            # For simplicity, we'll use the default device selection
+        return env
+
+    def _build_pipeline(self, stream_types: set = None, progress: bool = False) -> str:
+        """
+        Build gst-launch-1.0 pipeline string.
+
+        When every stream is re-encoded the input goes through uridecodebin. As soon as one
+        stream is copied the input is demuxed and parsed with parsebin instead, so copied
+        streams reach the muxer as compressed buffers and only re-encoded streams are decoded.
+
+        Args:
+            stream_types: Optional set of stream types ('video', 'audio') present in the input.
+                          Branches for missing stream types are left out so the muxer does not
+                          wait for data that never comes. If None, both branches are built.
+            progress: Insert a progressreport element printing the position once per second,
+                      for the gst-launch backend which cannot be queried directly.
+        """
+        if stream_types is None:
+            stream_types = {'video', 'audio'}
+
+        video_encoder = self._get_video_encoder_element()
+        audio_encoder = self._get_audio_encoder_element()
+        copy_mode = not video_encoder or not audio_encoder
+        tuning = self.tuning
+        self._queues = {}
 
-        # Use uridecodebin for automatic decoding
         uri = f"file://{self.input_file.resolve()}"
-        pipeline_parts.append(f'uridecodebin uri="{uri}" name=dec')
+        if copy_mode:
+            # Demux + parse only, decoding happens per re-encoded branch
+            source_part = f'filesrc location="{self.input_file.resolve()}" ! parsebin name=dec'
+        else:
+            # Use uridecodebin for automatic decoding
+            source_part = f'uridecodebin uri="{uri}" name=dec'
+
+        branches = []
 
         # Video branch
-        video_elements = []
+        if 'video' in stream_types:
+            video_elements = []
 
-        video_encoder = self._get_video_encoder_element()
-        using_vaapi = video_encoder and video_encoder.startswith('va')
+            if copy_mode:
+                video_elements.append(f'capsfilter caps="{";".join(self.VIDEO_STREAM_CAPS)}"')
 
-        # Video processing
-        if video_encoder:
-            # Video encoding pipeline
-            video_elements.append('videoconvert')
+            if progress:
+                video_elements.append('progressreport update-freq=1')
 
-            # Resolution scaling
-            if self.resolution:
-                try:
-                    width, height = self.resolution.split('x')
-                    video_elements.append('videoscale')
-                    video_elements.append(f'video/x-raw,width={width},height={height}')
-                except ValueError:
-                    print(f"Warning: Invalid resolution format '{self.resolution}', expected WIDTHxHEIGHT", file=sys.stderr)
-
-            # Video encoder with properties
-            encoder_props = self._get_encoder_properties(video_encoder)
-            if encoder_props:
-                video_elements.append(f'{video_encoder} {encoder_props}')
-            else:
-                video_elements.append(video_encoder)
+            if video_encoder:
+                if copy_mode:
+                    video_elements.append(self._queue('compressed', tuning))
+                    video_elements.append('decodebin')
 
-        video_elements.append('queue')
-        video_branch = 'dec. ! ' + ' ! '.join(video_elements) + ' ! mux.'
+                if tuning:
+                    # Decode and encode in separate threads, holding only a few raw frames
+                    video_elements.append(self._queue('raw', tuning))
+                video_elements.extend(self._video_encode_elements(video_encoder))
+
+            video_elements.append(self._queue('compressed', tuning))
+            branches.append('dec. ! ' + ' ! '.join(video_elements) + ' ! mux.')
 
         # Audio branch
-        audio_elements = []
+        if 'audio' in stream_types:
+            audio_elements = []
 
-        audio_encoder = self._get_audio_encoder_element()
+            if copy_mode:
+                audio_elements.append(f'capsfilter caps="{";".join(self.AUDIO_STREAM_CAPS)}"')
 
-        if audio_encoder:
-            # Audio encoding pipeline
-            audio_elements.append('audioconvert')
-            audio_elements.append('audioresample')
-            audio_elements.append(audio_encoder)
+            if progress and 'video' not in stream_types:
+                audio_elements.append('progressreport update-freq=1')
+
+            if audio_encoder:
+                if copy_mode:
+                    audio_elements.append(self._queue('compressed', tuning))
+                    audio_elements.append('decodebin')
 
-        audio_elements.append('queue')
-        audio_branch = 'dec. ! ' + ' ! '.join(audio_elements) + ' ! mux.'
+                audio_elements.extend(self._audio_encode_elements(audio_encoder))
+
+            audio_elements.append(self._queue('compressed', tuning))
+            branches.append('dec. ! ' + ' ! '.join(audio_elements) + ' ! mux.')
 
         # Muxer
         muxer_part = f'{self.muxer} name=mux'
+        if self.stream:
+            fragment = int(self.fragment_duration * 1000)
+            muxer_part += ' ' + self.STREAMING_MUXER_PROPERTIES[self.muxer].format(fragment=fragment)
 
         # Sink
-        sink_part = f'mux. ! filesink location="{self.output_file}"'
+        sink_part = f'mux. ! {self._sink_element()}'
 
         # Combine all parts
         pipeline = ' '.join([
-            ' '.join(pipeline_parts),
-            video_branch,
-            audio_branch,
+            source_part,
+            *branches,
             muxer_part,
             sink_part
         ])
 
         return pipeline
 
-    def remux(self, verbose: bool = False, overwrite: bool = False) -> bool:
+    def _cache_settings(self, stream_types: set) -> str:
+        """
+        Settings that determine the output, for cache keys.
+
+        The rendered pipeline is not used: its queue sizes follow the tuning, which changes
+        how fast the output is produced but not what it is. Encoder thread counts are kept,
+        x264 and x265 frame threading produces a different output for each thread count.
+        """
+        video_encoder = self._get_video_encoder_element()
+        audio_encoder = self._get_audio_encoder_element()
+        settings = {
+            'streams': sorted(stream_types or {'video', 'audio'}),
+            'muxer': self.muxer,
+            'video': [video_encoder, self._get_encoder_properties(video_encoder),
+                      self.resolution] if video_encoder else 'copy',
+            'audio': audio_encoder or 'copy',
+            'trim': [self.start, self.end] if self.trimming else None,
+        }
+        return json.dumps(settings, sort_keys=True, separators=(',', ':'))
+
+    @property
+    def trimming(self) -> bool:
+        """True if only a range of the input is remuxed (start or end set)."""
+        return self.start is not None or self.end is not None
+
+    def _trim_segment(self, stream_types: set) -> tuple:
+        """
+        Range to seek the pipeline to for a trim, as ((start, stop), accurate).
+
+        Copied video can only start at a keyframe, so the range starts at the keyframe at or
+        before the requested start, taken from the keyframe index of the input. Re-encoded
+        streams start exactly at the requested start.
+        """
+        start = self.start or 0.0
+        if 'video' in stream_types and not self._get_video_encoder_element():
+            index = KeyframeIndex.for_file(self.input_file, self.cancel_token)
+            if index.keyframes:
+                keyframe = index.keyframe_before(start)
+                print(f"Trim: {start:.3f}s starts at the keyframe at {keyframe:.3f}s")
+                return (keyframe, self.end), False
+        return (start, self.end), True
+
+    def _sink_element(self) -> str:
+        """Sink writing the muxed output, either the output file or the streaming target."""
+        if not self.stream:
+            return f'filesink location="{self.output_file}"'
+        if self.stream == '-':
+            # Descriptor duplicated from stdout by remux(), inherited by gst-launch-1.0
+            return f'fdsink fd={self._stream_fd if self._stream_fd is not None else 1} sync=false'
+        if self.stream.startswith('tcp://'):
+            host, _, port = self.stream[len('tcp://'):].rpartition(':')
+            if not host or not port.isdigit():
+                raise ValueError(f"Invalid stream target '{self.stream}', expected tcp://HOST:PORT")
+            return f'tcpclientsink host={host} port={port} sync=false'
+        # Named pipe: write every buffer through so the reader sees each fragment immediately
+        return f'filesink location="{self.stream}" buffer-mode=unbuffered sync=false'
+
+    def remux(self, verbose: bool = False, overwrite: bool = False, progress_events=None,
+              show_progress: bool = True, profile: bool = False) -> bool:
         """
         Perform the remuxing operation.
 
         Args:
             verbose: Show detailed gst-launch output
             overwrite: Overwrite output file if it exists
+            progress_events: Optional writable text file receiving progress telemetry as JSON lines
+            show_progress: Render the terminal progress line (ignored in verbose mode)
+            profile: Run the pipeline with the GStreamer tracers and print a per-element
+                     profile, also stored as self.profile (see PipelineProfile)
 
         Returns:
             True if successful, False otherwise
         """
-        if not self.check_gstreamer():
+        backend = self._resolve_backend()
+        if profile and backend == 'gst':
+            # Tracers are set up by Gst.init(), which already ran in this process
+            print("Warning: profiling runs the pipeline through gst-launch-1.0 instead of the gst backend",
+                  file=sys.stderr)
+            backend = 'launch'
+        if self.trimming and backend != 'gst':
+            # gst-launch-1.0 cannot seek, the range is cut by seeking the in-process pipeline
+            print("Error: --start/--end need the in-process gst backend (GStreamer Python bindings)",
+                  file=sys.stderr)
+            return False
+        if backend == 'gst':
+            if not GstEngine.available():
+                print("Error: GStreamer Python bindings (PyGObject) are not available", file=sys.stderr)
+                return False
+        elif not self.check_gstreamer():
             print("Error: gst-launch-1.0 is not installed or not in PATH", file=sys.stderr)
             return False
 
+        if self.auto_copy:
+            self.plan_streams()
+
+        if not self._check_elements():
+            return False
+
         # Check if output file exists
-        if self.output_file.exists() and not overwrite:
+        if not self.stream and self.output_file.exists() and not overwrite:
             print(f"Error: Output file already exists: {self.output_file}", file=sys.stderr)
             print("Use --overwrite flag to overwrite existing files", file=sys.stderr)
             return False
@@ -336,8 +2194,13 @@ class VideoRemuxer:
         audio_encoder = self._get_audio_encoder_element()
         using_vaapi = video_encoder and video_encoder.startswith('va')
 
-        print(f"Remuxing: {self.input_file.name} -> {self.output_file.name}")
-        print(f"Format: {self.input_file.suffix} -> .{self.output_format} (muxer: {self.muxer})")
+        if self.stream:
+            print(f"Streaming: {self.input_file.name} -> {'stdout' if self.stream == '-' else self.stream}")
+            print(f"Format: {self.input_file.suffix} -> .{self.output_format} (muxer: {self.muxer}, "
+                  f"{self.fragment_duration:g}s fragments)")
+        else:
+            print(f"Remuxing: {self.input_file.name} -> {self.output_file.name}")
+            print(f"Format: {self.input_file.suffix} -> .{self.output_format} (muxer: {self.muxer})")
 
         if video_encoder:
             print(f"Video codec: {video_encoder} (preset: {self.preset})")
@@ -353,105 +2216,679 @@ class VideoRemuxer:
         else:
             print("Audio codec: copy (no re-encoding)")
 
-        # Build pipeline
-        pipeline = self._build_pipeline()
+        try:
+            if self.stream == '-':
+                # Write the stream to a duplicate of the process stdout, so that messages printed
+                # while sys.stdout is redirected elsewhere never mix with it
+                self._stream_fd = os.dup(1)
 
-        # Build command
-        quiet_flag = '-q' if not verbose else ''
-        cmd = f'gst-launch-1.0 {quiet_flag} {pipeline}'.strip()
+            # Build pipeline, leaving out branches for stream types the input does not have
+            stream_types = {stream['codec_type'] for stream in info.get('streams', [])} if info else set()
+            pipeline = self._build_pipeline(stream_types or None, progress=(backend == 'launch' and not verbose))
 
-        # Add VAAPI device environment variable if needed
-        env = os.environ.copy()
-        if using_vaapi and self.vaapi_device:
-            env['LIBVA_DRIVER_NAME'] = 'iHD'  # or 'i965' for older Intel GPUs
-            # Note: VAAPI device path is typically set via GST_VAAPI_DRM_DEVICE or element property
-            # For simplicity, we'll use the default device selection
+            segment, accurate = None, False
+            if self.trimming:
+                try:
+                    segment, accurate = self._trim_segment(stream_types)
+                except RuntimeError as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    return False
+                end = segment[1] if segment[1] is not None else duration_seconds
+                duration_seconds = max(0.0, (end or 0.0) - segment[0])
+
+            memory_ceiling = None
+            tuning = self.tuning
+            if tuning:
+                memory_ceiling = tuning.memory_ceiling(self._queues)
+                threads = self._encoder_threads()
+                print(f"Tuning: encoder threads {threads or 'auto'} ({self.concurrency} concurrent job(s) on "
+                      f"{tuning.cores} cores), raw queue {tuning.raw_queue_frames} frames, "
+                      f"memory ceiling ~{self._format_size(memory_ceiling)}")
+
+            cache_key = None
+            if self.output_cache and not self.stream and not profile:
+                cache_key = self.output_cache.key(self.input_file, self._cache_settings(stream_types))
+                if self.output_cache.fetch(cache_key, self.output_file):
+                    print(f"✓ Reused cached output: {self.output_file}")
+                    return True
+                if self.output_file.exists():
+                    # The old output may be a hardlink into the cache, never write through it
+                    self.output_file.unlink()
+
+            # Add VAAPI device environment variable if needed
+            env = os.environ.copy()
+            env.update(self._pipeline_env())
+
+            trace_log = None
+            if profile:
+                fd, trace_log = tempfile.mkstemp(prefix='remux-trace-', suffix='.log')
+                os.close(fd)
+                missing = PipelineProfile.missing_tracers()
+                if missing:
+                    print(f"Warning: GstShark tracer(s) {', '.join(missing)} not installed, the profile has no "
+                          f"processing times or queue levels", file=sys.stderr)
+                env.update(PipelineProfile.env(trace_log, missing))
+
+            framerate = next((stream.get('framerate') for stream in info.get('streams', [])
+                              if stream.get('codec_type') == 'video'), None) if info else None
+            reporter = ProgressReporter(duration=duration_seconds, framerate=framerate,
+                                        output_file=None if self.stream else self.output_file,
+                                        show=show_progress and not verbose, events=progress_events)
+            reporter.start(input=str(self.input_file), output=self.stream or str(self.output_file),
+                           backend=backend, memory_ceiling=memory_ceiling)
+
+            try:
+                if backend == 'gst':
+                    success, error = self._run_in_process(pipeline, verbose, env, reporter, segment, accurate)
+                else:
+                    success, error = self._run_gst_launch(pipeline, verbose, env, reporter)
+                reporter.finish(success, error)
+                if trace_log:
+                    self.profile = PipelineProfile().parse(trace_log).report()
+                    PipelineProfile.print_report(self.profile)
+                if not success:
+                    return False
 
-        if verbose:
-            print(f"\nCommand: {cmd}\n")
+                if self.stream:
+                    print(f"✓ Finished streaming to {'stdout' if self.stream == '-' else self.stream}")
+                    return True
+
+                print(f"✓ Successfully created: {self.output_file}")
+
+                # Show file sizes
+                if self.output_file.exists():
+                    input_size = self.input_file.stat().st_size
+                    output_size = self.output_file.stat().st_size
+                    print(f"  Input size:  {self._format_size(input_size)}")
+                    print(f"  Output size: {self._format_size(output_size)}")
+                else:
+                    print("Warning: Output file was not created", file=sys.stderr)
+                    return False
+
+                if cache_key:
+                    try:
+                        self.output_cache.store(cache_key, self.output_file)
+                    except OSError as e:
+                        print(f"Warning: Could not store the output in the output cache: {e}", file=sys.stderr)
+
+                return True
+
+            except KeyboardInterrupt:
+                reporter.finish(False, 'cancelled')
+                print("\nOperation cancelled by user", file=sys.stderr)
+                return False
+            finally:
+                if trace_log:
+                    os.unlink(trace_log)
+        finally:
+            if self._stream_fd is not None:
+                os.close(self._stream_fd)
+                self._stream_fd = None
+
+    def remux_segmented(self, jobs: int = None, segment_duration: float = None,
+                        verbose: bool = False, overwrite: bool = False, resumable: bool = False) -> bool:
+        """
+        Re-encode the video in parallel keyframe-aligned segments.
 
+        The video stream is first stream-copied into segments cut at keyframes
+        (splitmuxsink), the segments are encoded concurrently on a process pool, and the
+        encoded segments are joined back without re-encoding (splitmuxsrc) and muxed with
+        the audio of the input into the target container. Segment and output durations are
+        checked against the source to make sure the joined video is continuous.
+
+        In resumable mode the segments are kept in a checkpoint directory next to the
+        output, and every encoded segment is committed (renamed into place and recorded in
+        the checkpoint manifest) as soon as it is done. Running the same job again after an
+        interruption skips the committed segments and resumes with the next one, which
+        starts at a keyframe of the input.
+
+        Args:
+            jobs: Number of segments encoded concurrently. Default: number of CPU cores.
+            segment_duration: Minimum segment length in seconds; segments end at the first
+                              keyframe after it. Default: derived from the input duration.
+            verbose: Show the pipelines being run
+            overwrite: Overwrite output file if it exists
+            resumable: Keep a checkpoint of the committed segments across runs
+
+        Returns:
+            True if successful, False otherwise
+        """
+        video_encoder = self._get_video_encoder_element()
+        if not video_encoder:
+            print("Error: Segmented encoding requires a video codec (--video-codec)", file=sys.stderr)
+            return False
+
+        backend = self._resolve_backend()
+        if backend == 'launch' and not self.check_gstreamer():
+            print("Error: gst-launch-1.0 is not installed or not in PATH", file=sys.stderr)
+            return False
+
+        if not self._check_elements():
+            return False
+
+        if self.output_file.exists() and not overwrite:
+            print(f"Error: Output file already exists: {self.output_file}", file=sys.stderr)
+            print("Use --overwrite flag to overwrite existing files", file=sys.stderr)
+            return False
+
+        jobs = jobs or os.cpu_count() or 1
+        if self.threads is None:
+            # Share the cores between the concurrent encoders
+            self.threads = max(1, (os.cpu_count() or 1) // jobs)
+
+        info = self.get_video_info()
+        duration = info.get('duration', 0.0) if info else 0.0
+        stream_types = {stream['codec_type'] for stream in info.get('streams', [])} if info else set()
+
+        if resumable:
+            work = self._checkpoint_dir()
+            checkpoint = self._load_checkpoint(work)
+            if checkpoint and checkpoint['split']:
+                # Resuming: the existing segments were cut with the original duration
+                segment_duration = checkpoint['segment_duration']
+        else:
+            work = Path(tempfile.mkdtemp(prefix='.remux-segments-', dir=self.output_file.resolve().parent))
+            checkpoint = None
+        if not segment_duration:
+            segment_duration = min(300.0, max(10.0, duration / (jobs * 4))) if duration else 60.0
+        if checkpoint is None:
+            checkpoint = {'segment_duration': segment_duration, 'split': False, 'committed': []}
+
+        env = self._pipeline_env()
+        video_caps = ';'.join(self.VIDEO_STREAM_CAPS)
+        source = f'filesrc location="{self.input_file.resolve()}" ! parsebin name=dec'
+
+        print(f"Segmented encoding: {self.input_file.name} -> {self.output_file.name}")
+        print(f"Video codec: {video_encoder} (preset: {self.preset}), {jobs} parallel jobs "
+              f"of {self.threads} threads, segments of at least {segment_duration:.0f}s")
+
+        success = False
         try:
-            # Run gst-launch
-            if verbose:
-                # Verbose mode - show all output
-                result = subprocess.run(cmd, env=env, shell=True, check=True)
+            # 1. Stream-copy the video into keyframe-aligned segments
+            if checkpoint['split']:
+                print(f"Resuming from checkpoint {work}: "
+                      f"{len(checkpoint['committed'])} segments already encoded")
             else:
-                # Run with progress monitoring
-                process = subprocess.Popen(
-                    cmd,
-                    env=env,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    universal_newlines=True
-                )
-
-                # GStreamer progress is harder to parse from gst-launch, so we'll use a simpler approach
-                # Monitor stderr for any output and show a simple spinner or status
-                stderr_output = []
-                import time
+                for stale in work.glob('*_*.mkv*'):
+                    stale.unlink()
                 start_time = time.time()
-
-                print()  # New line before progress
-
-                # Simple progress indicator
-                spinner = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-                spinner_idx = 0
-
-                while True:
-                    # Check if process is still running
-                    retcode = process.poll()
-                    if retcode is not None:
-                        break
-
-                    # Read any available stderr (non-blocking would be better, but this works)
-                    # We'll just show a spinner for now
-                    elapsed = time.time() - start_time
-                    print(f"\r{spinner[spinner_idx % len(spinner)]} Processing... ({elapsed:.1f}s elapsed)", end='', flush=True)
-                    spinner_idx += 1
-                    time.sleep(0.1)
-
-                # Capture any remaining output
-                stdout, stderr = process.communicate()
-                if stderr:
-                    stderr_output.append(stderr)
-
-                print()  # New line after progress
-
-                if process.returncode != 0:
-                    print(f"\nError: gst-launch exited with code {process.returncode}", file=sys.stderr)
-                    if stderr_output:
-                        print("\n--- GStreamer Error Output ---", file=sys.stderr)
-                        print(''.join(stderr_output), file=sys.stderr)
-                        print("--- End of Error Output ---\n", file=sys.stderr)
+                split = (f'{source} dec. ! capsfilter caps="{video_caps}" ! queue ! '
+                         f'splitmuxsink location="{work / "src_%05d.mkv"}" muxer-factory=matroskamux '
+                         f'max-size-time={int(segment_duration * 1e9)}')
+                if verbose:
+                    print(f"\nSplit pipeline: {split}\n")
+                ok, error = run_pipeline(split, backend=backend)
+                if not ok:
+                    print(f"Error: Splitting the input failed:\n{error}", file=sys.stderr)
                     return False
+                checkpoint['split'] = True
+                if resumable:
+                    self._save_checkpoint(work, checkpoint)
+                print(f"Split into {len(list(work.glob('src_*.mkv')))} segments in {time.time() - start_time:.1f}s")
+            sources = sorted(work.glob('src_*.mkv'))
+            if not sources:
+                print("Error: Splitting the input produced no segments", file=sys.stderr)
+                return False
 
-            print(f"✓ Successfully created: {self.output_file}")
+            # 2. Encode the segments concurrently, skipping the committed ones
+            start_time = time.time()
+            encode_chain = ' ! '.join(self._video_encode_elements(video_encoder))
+            committed = set(checkpoint['committed'])
+            tasks = {}
+            for i, segment in enumerate(sources):
+                encoded = work / segment.name.replace('src_', 'enc_')
+                if encoded.name in committed and encoded.exists():
+                    continue
+                # Encode into a .part file which the splitmuxsrc pattern does not match,
+                # so that an interrupted segment is never mistaken for a finished one
+                tasks[i] = (
+                    f'filesrc location="{segment}" ! decodebin ! {encode_chain} ! queue ! '
+                    f'matroskamux ! filesink location="{encoded}.part"',
+                    encoded,
+                )
 
-            # Show file sizes
-            if self.output_file.exists():
-                input_size = self.input_file.stat().st_size
-                output_size = self.output_file.stat().st_size
-                print(f"  Input size:  {self._format_size(input_size)}")
-                print(f"  Output size: {self._format_size(output_size)}")
-            else:
-                print("Warning: Output file was not created", file=sys.stderr)
+            failed = 0
+            if tasks:
+                # Spawn, not fork: this process already runs GStreamer (probe, split), and
+                # forked children would inherit its GLib threads' locks mid-use
+                with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)),
+                                         mp_context=multiprocessing.get_context('spawn')) as executor:
+                    futures = {executor.submit(_run_segment_pipeline, task, backend, env): i
+                               for i, (task, _) in tasks.items()}
+                    for done, future in enumerate(as_completed(futures)):
+                        if self.cancel_token and self.cancel_token.cancelled:
+                            # Drop the queued segments, the running ones finish and are committed
+                            for pending in futures:
+                                pending.cancel()
+                        if future.cancelled():
+                            continue
+                        i = futures[future]
+                        ok, error, elapsed = future.result()
+                        status = '✓' if ok else '✗'
+                        print(f"\r  [{done + 1}/{len(tasks)}] {status} segment {i} ({elapsed:.1f}s)", end='', flush=True)
+                        if not ok:
+                            failed += 1
+                            print(f"\nError: Encoding segment {i} failed:\n{error}", file=sys.stderr)
+                            continue
+                        encoded = tasks[i][1]
+                        os.replace(f'{encoded}.part', encoded)
+                        if resumable:
+                            checkpoint['committed'].append(encoded.name)
+                            self._save_checkpoint(work, checkpoint)
+                print()
+            self._check_cancelled()
+            if failed:
+                return False
+            print(f"Encoded {len(tasks)} segments in {time.time() - start_time:.1f}s")
+
+            # 3. Check every encoded segment covers the same time span as its source
+            encoded_segments = sorted(work.glob('enc_*.mkv'))
+            if not self._check_segments(sources, encoded_segments, backend):
+                if resumable:
+                    # Do not resume from segments that failed the check
+                    checkpoint['committed'] = []
+                    self._save_checkpoint(work, checkpoint)
                 return False
 
-            return True
+            # 4. Join the encoded segments and mux them with the audio of the input
+            self._check_cancelled()
+            branches = [f'splitmuxsrc location="{work / "enc_*.mkv"}" name=seg seg. ! queue ! mux.']
+            if 'audio' in stream_types or not stream_types:
+                audio_elements = [f'capsfilter caps="{";".join(self.AUDIO_STREAM_CAPS)}"']
+                audio_encoder = self._get_audio_encoder_element()
+                if audio_encoder:
+                    audio_elements.append('queue')
+                    audio_elements.append('decodebin')
+                    audio_elements.extend(self._audio_encode_elements(audio_encoder))
+                audio_elements.append('queue')
+                branches.append(source)
+                branches.append('dec. ! ' + ' ! '.join(audio_elements) + ' ! mux.')
+            join = ' '.join([*branches, f'{self.muxer} name=mux', f'mux. ! filesink location="{self.output_file}"'])
+            if verbose:
+                print(f"\nJoin pipeline: {join}\n")
+            ok, error = run_pipeline(join, backend=backend, env=env)
+            if not ok:
+                print(f"Error: Joining the segments failed:\n{error}", file=sys.stderr)
+                return False
+            success = True
+        except KeyboardInterrupt:
+            print("\nOperation cancelled by user", file=sys.stderr)
+            return False
+        finally:
+            if success or not resumable:
+                shutil.rmtree(work, ignore_errors=True)
+            else:
+                print(f"Checkpoint kept in {work}, run the same command again to resume", file=sys.stderr)
+
+        # The joined output has to cover the whole input
+        output_info = probe_files([self.output_file], backend=backend)[self.output_file]
+        output_duration = output_info.get('duration', 0.0)
+        if duration and abs(output_duration - duration) > max(0.5, segment_duration * 0.01):
+            print(f"Error: Output duration {output_duration:.2f}s does not match input duration "
+                  f"{duration:.2f}s, the joined output is not continuous", file=sys.stderr)
+            return False
+
+        print(f"✓ Successfully created: {self.output_file}")
+        print(f"  Input size:  {self._format_size(self.input_file.stat().st_size)}")
+        print(f"  Output size: {self._format_size(self.output_file.stat().st_size)}")
+        return True
+
+    @classmethod
+    def from_rendition_spec(cls, spec: str, input_file: str, output_format: str = None, **options) -> 'VideoRemuxer':
+        """
+        Create the remuxer of one ladder rendition.
+
+        Args:
+            spec: 'RESOLUTION:CODEC[:PRESET[:OUTPUT]]', e.g. '1280x720:libx264:fast:out_720p.mp4'
+            input_file: Input video file shared by the ladder
+            output_format: Container used when the spec has no output file. Default: input format.
+            options: Further VideoRemuxer options (audio codec, backend, threads, ...)
+        """
+        fields = spec.split(':', 3)
+        if len(fields) < 2 or 'x' not in fields[0]:
+            raise ValueError(f"Invalid rendition '{spec}', expected RESOLUTION:CODEC[:PRESET[:OUTPUT]]")
+        resolution, codec = fields[0], fields[1]
+        preset = fields[2] if len(fields) > 2 and fields[2] else 'medium'
+        if preset not in ('fast', 'medium', 'slow'):
+            raise ValueError(f"Invalid preset '{preset}' in rendition '{spec}', expected fast, medium or slow")
+        output_file = fields[3] if len(fields) > 3 and fields[3] else None
+        if output_file:
+            # An explicit output file carries its own container format
+            output_format = None
+        else:
+            height = resolution.split('x')[1]
+            extension = (output_format or Path(input_file).suffix).lstrip('.')
+            output_file = str(Path.cwd() / f'{Path(input_file).stem}_{height}p.{extension}')
+        return cls(input_file, output_file=output_file, output_format=output_format, video_codec=codec,
+                   preset=preset, resolution=resolution, **options)
 
-        except subprocess.CalledProcessError as e:
-            print(f"Error during remuxing: {e}", file=sys.stderr)
-            if hasattr(e, 'stderr') and e.stderr:
-                print(e.stderr.decode() if isinstance(e.stderr, bytes) else e.stderr, file=sys.stderr)
+    def _build_ladder_pipeline(self, renditions: list, stream_types: set, progress: bool = False) -> str:
+        """
+        Build a pipeline decoding the input once and feeding every rendition from it.
+
+        The decoded video is converted once and split with a tee into one scale + encode
+        branch per rendition. tee pushes the same buffer to all branches, so the decoded
+        frames are shared by reference and never copied. Audio is copied, or encoded once,
+        and teed to every muxer the same way.
+        """
+        source = f'filesrc location="{self.input_file.resolve()}" ! parsebin name=dec'
+        parts = [source]
+
+        video_elements = [f'capsfilter caps="{";".join(self.VIDEO_STREAM_CAPS)}"']
+        if progress:
+            video_elements.append('progressreport update-freq=1')
+        video_elements += ['queue', 'decodebin', 'videoconvert', 'tee name=vtee']
+        parts.append('dec. ! ' + ' ! '.join(video_elements))
+
+        with_audio = 'audio' in stream_types
+        if with_audio:
+            audio_elements = [f'capsfilter caps="{";".join(self.AUDIO_STREAM_CAPS)}"', 'queue']
+            audio_encoder = self._get_audio_encoder_element()
+            if audio_encoder:
+                audio_elements.append('decodebin')
+                audio_elements.extend(self._audio_encode_elements(audio_encoder))
+            audio_elements.append('tee name=atee')
+            parts.append('dec. ! ' + ' ! '.join(audio_elements))
+
+        for i, rendition in enumerate(renditions):
+            encoder = rendition._get_video_encoder_element()
+            branch = ['vtee.', 'queue'] + rendition._video_encode_elements(encoder) + ['queue', f'mux{i}.']
+            parts.append(' ! '.join(branch))
+            if with_audio:
+                parts.append(f'atee. ! queue ! mux{i}.')
+            parts.append(f'{rendition.muxer} name=mux{i} mux{i}. ! filesink location="{rendition.output_file}"')
+
+        return ' '.join(parts)
+
+    def remux_ladder(self, renditions: list, verbose: bool = False, overwrite: bool = False,
+                     progress_events=None) -> bool:
+        """
+        Produce several renditions of the input with a single decode.
+
+        Args:
+            renditions: VideoRemuxer instances describing each rendition (codec, preset,
+                        resolution, output file), see from_rendition_spec()
+            verbose: Show detailed pipeline output
+            overwrite: Overwrite output files if they exist
+            progress_events: Optional writable text file receiving progress telemetry as JSON lines
+
+        Returns:
+            True if successful, False otherwise
+        """
+        backend = self._resolve_backend()
+        if backend == 'gst':
+            if not GstEngine.available():
+                print("Error: GStreamer Python bindings (PyGObject) are not available", file=sys.stderr)
+                return False
+        elif not self.check_gstreamer():
+            print("Error: gst-launch-1.0 is not installed or not in PATH", file=sys.stderr)
             return False
+
+        if not self._check_elements():
+            return False
+
+        for rendition in renditions:
+            if not rendition._check_elements():
+                return False
+            if rendition.output_file.exists() and not overwrite:
+                print(f"Error: Output file already exists: {rendition.output_file}", file=sys.stderr)
+                print("Use --overwrite flag to overwrite existing files", file=sys.stderr)
+                return False
+
+        info = self.get_video_info()
+        stream_types = {stream['codec_type'] for stream in info.get('streams', [])} if info else set()
+        if not stream_types:
+            stream_types = {'video', 'audio'}
+        audio_encoder = self._get_audio_encoder_element()
+
+        print(f"Ladder: {self.input_file.name} -> {len(renditions)} renditions (single decode)")
+        for rendition in renditions:
+            print(f"  {rendition.resolution}: {rendition._get_video_encoder_element()} "
+                  f"(preset: {rendition.preset}) -> {rendition.output_file.name}")
+        print(f"Audio codec: {audio_encoder or 'copy (no re-encoding)'}")
+
+        pipeline = self._build_ladder_pipeline(renditions, stream_types, progress=(backend == 'launch' and not verbose))
+
+        env = os.environ.copy()
+        for rendition in renditions:
+            env.update(rendition._pipeline_env())
+
+        framerate = next((stream.get('framerate') for stream in info.get('streams', [])
+                          if stream.get('codec_type') == 'video'), None) if info else None
+        reporter = ProgressReporter(duration=info.get('duration', 0.0) if info else 0.0, framerate=framerate,
+                                    show=not verbose, events=progress_events)
+        reporter.start(input=str(self.input_file), outputs=[str(r.output_file) for r in renditions], backend=backend)
+
+        try:
+            if backend == 'gst':
+                success, error = self._run_in_process(pipeline, verbose, env, reporter)
+            else:
+                success, error = self._run_gst_launch(pipeline, verbose, env, reporter)
+            reporter.finish(success, error)
         except KeyboardInterrupt:
+            reporter.finish(False, 'cancelled')
             print("\nOperation cancelled by user", file=sys.stderr)
+            return False
+
+        if not success:
+            return False
+
+        for rendition in renditions:
+            if not rendition.output_file.exists():
+                print(f"Warning: Output file was not created: {rendition.output_file}", file=sys.stderr)
+                return False
+            print(f"✓ Successfully created: {rendition.output_file} "
+                  f"({self._format_size(rendition.output_file.stat().st_size)})")
+        return True
+
+    def _checkpoint_dir(self) -> Path:
+        """Checkpoint directory of a resumable segmented encode, next to the output."""
+        work = self.output_file.resolve().parent / f'.{self.output_file.name}.checkpoint'
+        work.mkdir(exist_ok=True)
+        return work
+
+    def _checkpoint_key(self) -> dict:
+        """Identify the input and the encoding settings a checkpoint was made with."""
+        stat = self.input_file.stat()
+        return {
+            'input': str(self.input_file.resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'encoder': self._get_video_encoder_element(),
+            'preset': self.preset,
+            'resolution': self.resolution,
+        }
+
+    def _load_checkpoint(self, work: Path):
+        """
+        Load the checkpoint manifest of a previous run.
+
+        Returns:
+            The manifest, or None if there is none or it was made for another input or
+            other encoding settings (the stale segments are then discarded)
+        """
+        try:
+            with open(work / self.CHECKPOINT_MANIFEST) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get('version') != self.CHECKPOINT_VERSION or checkpoint.get('key') != self._checkpoint_key():
+            print(f"Warning: Discarding checkpoint {work}, it was made for another input or settings",
+                  file=sys.stderr)
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, work: Path, checkpoint: dict):
+        """Atomically write the checkpoint manifest."""
+        checkpoint['version'] = self.CHECKPOINT_VERSION
+        checkpoint['key'] = self._checkpoint_key()
+        tmp = work / f'{self.CHECKPOINT_MANIFEST}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, work / self.CHECKPOINT_MANIFEST)
+
+    def _check_segments(self, sources: list, encoded: list, backend: str) -> bool:
+        """Verify each encoded segment has the duration of its source segment."""
+        if len(sources) != len(encoded):
+            print(f"Error: {len(encoded)} encoded segments for {len(sources)} source segments", file=sys.stderr)
+            return False
+
+        infos = probe_files(sources + encoded, jobs=os.cpu_count() or 1, backend=backend)
+        framerate = next((stream.get('framerate') for stream in self.info.get('streams', [])
+                          if stream.get('codec_type') == 'video' and stream.get('framerate')), 25.0)
+        # Allow two frames of difference for container rounding
+        tolerance = 2.0 / framerate
+
+        for i, (source, target) in enumerate(zip(sources, encoded)):
+            source_duration = infos[source].get('duration')
+            target_duration = infos[target].get('duration')
+            if source_duration is None or target_duration is None:
+                print(f"Error: Could not probe segment {i}", file=sys.stderr)
+                return False
+            if abs(source_duration - target_duration) > tolerance:
+                print(f"Error: Segment {i} is {target_duration:.3f}s long after encoding, "
+                      f"expected {source_duration:.3f}s", file=sys.stderr)
+                return False
+        return True
+
+    def _run_in_process(self, pipeline: str, verbose: bool, env: dict, reporter: ProgressReporter,
+                        segment: tuple = None, accurate: bool = False) -> tuple:
+        """
+        Run the pipeline in this process through the shared GstEngine, querying its position.
+
+        With a segment (start, stop) in seconds only that range of the input is processed,
+        and the progress is reported relative to its start.
+        """
+        engine = GstEngine.shared()
+        Gst = engine.Gst
+
+        if verbose:
+            print(f"\nPipeline: {pipeline}\n")
+
+        def on_tick(gst_pipeline):
+            self._check_cancelled()
+            have_position, position = gst_pipeline.query_position(Gst.Format.TIME)
+            have_duration, duration = gst_pipeline.query_duration(Gst.Format.TIME)
+            if segment:
+                # The reporter already knows the length of the range
+                position -= int(segment[0] * Gst.SECOND)
+                have_duration = False
+            reporter.update(position / Gst.SECOND if have_position and position >= 0 else None,
+                            duration / Gst.SECOND if have_duration and duration > 0 else None)
+
+        # libva reads its driver selection from the process environment
+        with _process_environ(self._pipeline_env()):
+            success, error = engine.run(pipeline, on_tick=on_tick, segment=segment, accurate=accurate)
+
+        if not success:
+            print("\nError: pipeline failed", file=sys.stderr)
+            print("\n--- GStreamer Error Output ---", file=sys.stderr)
+            print(error, file=sys.stderr)
+            print("--- End of Error Output ---\n", file=sys.stderr)
+        return success, error
+
+    def _check_cancelled(self):
+        """Raise RemuxCancelled when the job was cancelled through its token."""
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+
+    def _pass_fds(self) -> tuple:
+        """Descriptors gst-launch-1.0 inherits, the duplicated stdout when streaming to it."""
+        return (self._stream_fd,) if self._stream_fd is not None else ()
+
+    def _verbose_output(self):
+        """
+        Descriptor receiving the stdout of a verbose gst-launch-1.0: stderr when streaming to
+        stdout, otherwise wherever sys.stdout points (stderr too when main() keeps stdout for
+        progress events), None to inherit the process stdout.
+        """
+        stream = sys.stderr if self.stream == '-' else sys.stdout
+        try:
+            return stream.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            return 2 if self.stream == '-' else None
+
+    # progressreport output: "progressreport0 (00:00:05): 5 / 120 seconds ( 4.2 %)"
+    PROGRESSREPORT_RE = re.compile(r'\(\d+:\d+:\d+\): (\d+) / (\d+) seconds')
+
+    def _run_gst_launch(self, pipeline: str, verbose: bool, env: dict, reporter: ProgressReporter) -> tuple:
+        """Run the pipeline through a gst-launch-1.0 subprocess, parsing progressreport output."""
+        quiet_flag = '-q' if not verbose else ''
+        cmd = f'gst-launch-1.0 {quiet_flag} {pipeline}'.strip()
+
+        if verbose:
+            print(f"\nCommand: {cmd}\n")
+
+        process = None
+        try:
+            if verbose:
+                # Verbose mode - show all output, on stderr when stdout carries the stream
+                result = subprocess.run(cmd, env=env, shell=True, pass_fds=self._pass_fds(),
+                                        stdout=self._verbose_output())
+                if result.returncode != 0:
+                    return False, f"gst-launch exited with code {result.returncode}"
+                return True, None
+
+            # Run with progress monitoring
+            process = subprocess.Popen(
+                cmd,
+                env=env,
+                shell=True,
+                pass_fds=self._pass_fds(),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                bufsize=1
+            )
+
+            # Read both pipes as the job runs so that progress is live and a chatty
+            # pipeline cannot block on a full pipe
+            samples = deque(maxlen=1)
+            stderr_output = deque(maxlen=200)
+
+            def read_stdout():
+                for line in process.stdout:
+                    match = self.PROGRESSREPORT_RE.search(line)
+                    if match:
+                        samples.append((float(match.group(1)), float(match.group(2))))
+
+            def read_stderr():
+                for line in process.stderr:
+                    stderr_output.append(line)
+
+            readers = [threading.Thread(target=read_stdout, daemon=True),
+                       threading.Thread(target=read_stderr, daemon=True)]
+            for reader in readers:
+                reader.start()
+
+            while process.poll() is None:
+                self._check_cancelled()
+                position, duration = samples[-1] if samples else (None, None)
+                reporter.update(position, duration)
+                time.sleep(0.1)
+
+            for reader in readers:
+                reader.join()
+
+            if process.returncode != 0:
+                error = ''.join(stderr_output)
+                print(f"\nError: gst-launch exited with code {process.returncode}", file=sys.stderr)
+                if error:
+                    print("\n--- GStreamer Error Output ---", file=sys.stderr)
+                    print(error, file=sys.stderr)
+                    print("--- End of Error Output ---\n", file=sys.stderr)
+                return False, error or f"gst-launch exited with code {process.returncode}"
+
+            return True, None
+
+        except KeyboardInterrupt:
             # Try to kill the process
-            if 'process' in locals():
+            if process is not None:
                 process.terminate()
                 process.wait()
-            return False
+            raise
 
     @staticmethod
     def _format_size(size_bytes: int) -> str:
@@ -463,6 +2900,421 @@ class VideoRemuxer:
         return f"{size_bytes:.2f} TB"
 
 
+def probe_files(paths: list, jobs: int = 8, probe_cache: ProbeCache = None, backend: str = 'auto') -> dict:
+    """
+    Probe many files with at most `jobs` probes in flight.
+
+    Cached results are returned without probing. Misses are probed in-process with
+    MediaProber when the backend allows it, otherwise with concurrent gst-discoverer-1.0
+    subprocesses.
+
+    Returns:
+        Dict mapping each path to its info, empty dict for files that could not be probed.
+    """
+    paths = list(dict.fromkeys(Path(p) for p in paths))
+    results = {}
+    missing = []
+    for path in paths:
+        info = probe_cache.get(path) if probe_cache else None
+        if info is not None:
+            results[path] = info
+        else:
+            missing.append(path)
+
+    if missing:
+        if backend == 'gst' or (backend == 'auto' and MediaProber.available()):
+            probed = MediaProber(jobs=jobs).probe(missing)
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+                probed = dict(zip(missing, executor.map(VideoRemuxer._probe_with_discoverer_cli, missing)))
+
+        for path in missing:
+            info = probed.get(path, {})
+            if info and probe_cache:
+                probe_cache.put(path, info)
+            results[path] = info
+
+    return {path: results[path] for path in paths}
+
+
+def find_media_files(directory: Path, recursive: bool = True) -> list:
+    """List the video files of a directory, sorted by path."""
+    pattern = '**/*' if recursive else '*'
+    return [path for path in sorted(Path(directory).glob(pattern))
+            if path.is_file() and path.suffix.lstrip('.').lower() in VIDEO_EXTENSIONS]
+
+
+def print_video_info(info: dict):
+    """Print the probe result of one file in human readable form."""
+    if not info:
+        return
+    if 'duration' in info:
+        print(f"  Duration: {info['duration']:.2f} seconds")
+    if 'container' in info:
+        print(f"  Container: {info['container']}")
+    print(f"  Streams: {len(info.get('streams', []))}")
+    for i, stream in enumerate(info.get('streams', [])):
+        codec_type = stream.get('codec_type', 'unknown')
+        codec_name = stream.get('codec_name', 'unknown')
+        details = []
+        if 'width' in stream and 'height' in stream:
+            details.append(f"{stream['width']}x{stream['height']}")
+        if 'framerate' in stream:
+            details.append(f"{stream['framerate']} fps")
+        if 'channels' in stream:
+            details.append(f"{stream['channels']} ch")
+        if 'sample_rate' in stream:
+            details.append(f"{stream['sample_rate']} Hz")
+        if stream.get('bitrate'):
+            details.append(f"{stream['bitrate'] // 1000} kb/s")
+        extra = f" [{', '.join(details)}]" if details else ''
+        print(f"    Stream {i}: {codec_type} ({codec_name}){extra}")
+
+
+class _ThreadOutput:
+    """
+    sys.stdout/sys.stderr replacement sending what registered threads print to their own
+    buffer, so that jobs running concurrently in one process keep separate logs.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def write(self, text):
+        return self.buffers.get(threading.get_ident(), self.stream).write(text)
+
+    def flush(self):
+        self.buffers.get(threading.get_ident(), self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_output_lock = threading.Lock()
+_output_captures = 0
+
+
+@contextlib.contextmanager
+def _capture_output(buffer: io.StringIO):
+    """
+    Capture what the current thread prints to stdout and stderr into buffer.
+
+    sys.stdout and sys.stderr are replaced while at least one thread captures its output
+    and restored when the last capture ends.
+    """
+    global _output_captures
+    ident = threading.get_ident()
+    with _output_lock:
+        if _output_captures == 0:
+            sys.stdout = _ThreadOutput(sys.stdout)
+            sys.stderr = _ThreadOutput(sys.stderr)
+        _output_captures += 1
+        stdout, stderr = sys.stdout, sys.stderr
+        stdout.buffers[ident] = buffer
+        stderr.buffers[ident] = buffer
+    try:
+        yield buffer
+    finally:
+        with _output_lock:
+            stdout.buffers.pop(ident, None)
+            stderr.buffers.pop(ident, None)
+            _output_captures -= 1
+            if _output_captures == 0:
+                # Leave streams someone else installed in the meantime alone
+                if sys.stdout is stdout:
+                    sys.stdout = stdout.stream
+                if sys.stderr is stderr:
+                    sys.stderr = stderr.stream
+
+
+@dataclass
+class RemuxResult:
+    """Outcome of a RemuxJob."""
+    input: str
+    output: str = None
+    outputs: list = field(default_factory=list)
+    success: bool = False
+    cancelled: bool = False
+    error: str = None
+    elapsed: float = 0.0
+    duration: float = 0.0
+    input_size: int = 0
+    output_size: int = 0
+    log: str = ''
+    profile: dict = None
+
+
+class RemuxJob:
+    """
+    Library interface of the remuxer: one job, run blocking, as a generator of progress
+    events, or awaited from an asyncio event loop.
+
+    The job does not print: messages are captured into RemuxResult.log (unless
+    capture_output is False, as for the CLI), progress is reported as the event dicts of
+    ProgressReporter ('start', 'progress', 'end') and the outcome as a RemuxResult.
+    Jobs run in threads of the calling process, so with the in-process backend many jobs
+    share one process and one GStreamer registry.
+
+    Example:
+        job = RemuxJob('in.mkv', output_format='mp4', video_codec='h264')
+        for event in job.events():
+            print(event['event'], event.get('percent'))
+        print(job.result.success)
+    """
+
+    MODES = ('remux', 'segmented', 'resumable', 'ladder')
+
+    def __init__(self, input_file: str, mode: str = 'remux', cancel_token: CancellationToken = None,
+                 overwrite: bool = False, verbose: bool = False, capture_output: bool = True,
+                 show_progress: bool = False, progress_events=None, segment_jobs: int = None,
+                 segment_duration: float = None, renditions: list = None, profile: bool = False,
+                 **options):
+        """
+        Args:
+            input_file: Input video file
+            mode: 'remux' (default), 'segmented' or 'resumable' (parallel segment encoding,
+                  see VideoRemuxer.remux_segmented()) or 'ladder' (see VideoRemuxer.remux_ladder())
+            cancel_token: Token cancelling the job, a new one is created if not given
+            overwrite: Overwrite existing output files
+            verbose: Show the pipelines being run
+            capture_output: Capture the messages of the job into the result instead of printing them
+            show_progress: Render the terminal progress line
+            progress_events: Optional writable text file also receiving the events as JSON lines
+            segment_jobs: With the segmented modes, number of segments encoded concurrently
+            segment_duration: With the segmented modes, minimum segment length in seconds
+            renditions: With mode 'ladder', rendition specs RESOLUTION:CODEC[:PRESET[:OUTPUT]]
+            profile: With mode 'remux', profile the pipeline with the GStreamer tracers
+            options: VideoRemuxer options (output_file, output_format, video_codec, ...)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of: {', '.join(self.MODES)}")
+        if mode == 'ladder' and not renditions:
+            raise ValueError("Mode 'ladder' requires renditions")
+        self.input_file = input_file
+        self.mode = mode
+        self.cancel_token = cancel_token or CancellationToken()
+        self.overwrite = overwrite
+        self.verbose = verbose
+        self.capture_output = capture_output
+        self.show_progress = show_progress
+        self.progress_events = progress_events
+        self.segment_jobs = segment_jobs
+        self.segment_duration = segment_duration
+        self.renditions = renditions or []
+        self.profile = profile
+        self.options = options
+        self.result = None
+
+    def cancel(self):
+        """Cancel the job, it stops as soon as the running pipeline can be torn down."""
+        self.cancel_token.cancel()
+
+    def run(self, on_event=None) -> RemuxResult:
+        """
+        Run the job in the calling thread.
+
+        Args:
+            on_event: Optional callable receiving each progress event dict
+
+        Returns:
+            The RemuxResult, also stored as self.result
+        """
+        result = RemuxResult(input=str(self.input_file))
+        end_event = {}
+
+        def emit(event: dict):
+            if event['event'] == 'end':
+                end_event.update(event)
+            if self.progress_events:
+                self.progress_events.write(json.dumps(event) + '\n')
+                self.progress_events.flush()
+            if on_event:
+                on_event(event)
+
+        log = io.StringIO()
+        start_time = time.time()
+        with _capture_output(log) if self.capture_output else contextlib.nullcontext():
+            try:
+                remuxer = VideoRemuxer(self.input_file, cancel_token=self.cancel_token, **self.options)
+                outputs = [remuxer.output_file]
+                if self.mode == 'ladder':
+                    renditions = [
+                        VideoRemuxer.from_rendition_spec(
+                            spec, self.input_file, output_format=self.options.get('output_format'),
+                            vaapi_device=self.options.get('vaapi_device'),
+                            backend=self.options.get('backend', 'auto'), threads=self.options.get('threads'),
+                            capabilities=self.options.get('capabilities'))
+                        for spec in self.renditions
+                    ]
+                    outputs = [rendition.output_file for rendition in renditions]
+                    result.success = remuxer.remux_ladder(renditions, verbose=self.verbose,
+                                                          overwrite=self.overwrite, progress_events=emit)
+                elif self.mode in ('segmented', 'resumable'):
+                    result.success = remuxer.remux_segmented(jobs=self.segment_jobs,
+                                                             segment_duration=self.segment_duration,
+                                                             verbose=self.verbose, overwrite=self.overwrite,
+                                                             resumable=self.mode == 'resumable')
+                else:
+                    if remuxer.stream:
+                        outputs = []
+                    result.success = remuxer.remux(verbose=self.verbose, overwrite=self.overwrite,
+                                                   progress_events=emit, show_progress=self.show_progress,
+                                                   profile=self.profile)
+                    result.profile = remuxer.profile
+                result.duration = remuxer.info.get('duration', 0.0)
+                result.input_size = remuxer.input_file.stat().st_size
+                result.output = remuxer.stream or str(outputs[0])
+                result.outputs = [str(output) for output in outputs]
+                if result.success:
+                    result.output_size = sum(output.stat().st_size for output in outputs if output.exists())
+            except RemuxCancelled:
+                # Cancelled before the pipeline started, e.g. while probing
+                print("Operation cancelled", file=sys.stderr)
+            except (FileNotFoundError, ValueError) as e:
+                print(f"Error: {e}", file=sys.stderr)
+                end_event.setdefault('error', str(e))
+            except Exception as e:
+                # Pipeline, sink or cancellation failure while running: fail the job, never the thread
+                result.success = False
+                print(f"Error: {type(e).__name__}: {e}", file=sys.stderr)
+                end_event.setdefault('error', f"{type(e).__name__}: {e}")
+
+        result.cancelled = self.cancel_token.cancelled and not result.success
+        result.elapsed = time.time() - start_time
+        result.log = log.getvalue()
+        if not result.success:
+            errors = [line for line in result.log.splitlines() if line.startswith('Error:')]
+            result.error = ('cancelled' if result.cancelled else
+                            end_event.get('error') or (errors[-1] if errors else None) or 'remux failed')
+        if 'event' not in end_event:
+            # The job failed before its pipeline reported, or the mode reports no events
+            emit({'event': 'end', 'time': time.time(), 'success': result.success, 'error': result.error})
+        self.result = result
+        return result
+
+    def events(self):
+        """
+        Run the job in a background thread, yielding its progress events as they come.
+
+        The RemuxResult is available as self.result once the generator is exhausted.
+        Closing the generator early cancels the job.
+        """
+        events = queue.Queue()
+        done = object()
+
+        def target():
+            try:
+                self.run(on_event=events.put)
+            finally:
+                events.put(done)
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        try:
+            while True:
+                event = events.get()
+                if event is done:
+                    break
+                yield event
+        finally:
+            if thread.is_alive():
+                self.cancel()
+            thread.join()
+
+    async def run_async(self, on_event=None, executor=None) -> RemuxResult:
+        """
+        Run the job in a worker thread without blocking the event loop.
+
+        Args:
+            on_event: Optional callable receiving each progress event dict, called in the event loop
+            executor: Optional concurrent.futures executor running the job, the loop default if None
+
+        Cancelling the awaiting task cancels the job and waits for it to stop.
+        """
+        loop = asyncio.get_running_loop()
+        callback = None
+        if on_event:
+            def callback(event):
+                loop.call_soon_threadsafe(on_event, event)
+
+        future = loop.run_in_executor(executor, self.run, callback)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.cancel()
+            await future
+            raise
+
+    async def aevents(self, executor=None):
+        """Async generator of the progress events, the RemuxResult is in self.result afterwards."""
+        events = asyncio.Queue()
+        done = object()
+        task = asyncio.ensure_future(self.run_async(on_event=events.put_nowait, executor=executor))
+        task.add_done_callback(lambda _: events.put_nowait(done))
+        try:
+            while True:
+                event = await events.get()
+                if event is done:
+                    break
+                yield event
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+
+async def remux_async(input_file: str, on_event=None, **options) -> RemuxResult:
+    """Run a single RemuxJob from an event loop, see RemuxJob for the options."""
+    return await RemuxJob(input_file, **options).run_async(on_event=on_event)
+
+
+async def remux_many(jobs: list, limit: int = None, on_event=None) -> list:
+    """
+    Run many jobs concurrently from an event loop, at most `limit` at a time.
+
+    Args:
+        jobs: RemuxJob instances, or dicts of RemuxJob arguments
+        limit: Maximum number of concurrent jobs. Default: number of CPU cores.
+        on_event: Optional callable(job, event) receiving the progress events of every job
+
+    Returns:
+        List of RemuxResult, in the order of `jobs`
+    """
+    jobs = [job if isinstance(job, RemuxJob) else RemuxJob(**job) for job in jobs]
+    limit = limit or os.cpu_count() or 1
+    semaphore = asyncio.Semaphore(limit)
+    executor = ThreadPoolExecutor(max_workers=limit)
+
+    async def run_one(job: RemuxJob) -> RemuxResult:
+        async with semaphore:
+            if job.cancel_token.cancelled:
+                return RemuxResult(input=str(job.input_file), cancelled=True, error='cancelled')
+            callback = (lambda event: on_event(job, event)) if on_event else None
+            return await job.run_async(on_event=callback, executor=executor)
+
+    try:
+        return await asyncio.gather(*(run_one(job) for job in jobs))
+    except asyncio.CancelledError:
+        for job in jobs:
+            job.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False)
+
+
+def parse_timestamp(value: str) -> float:
+    """Parse a time given in seconds or as [HH:]MM:SS[.fff] into seconds."""
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    if value.count(':') > 2 or seconds < 0:
+        raise ValueError(f"Invalid time: {value}")
+    return seconds
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Convert video files between container formats using GStreamer (gst-launch-1.0)',
@@ -484,6 +3336,9 @@ Examples:
   # Re-encode video to H.265 but copy audio
   %(prog)s input.mp4 -f mp4 --video-codec libx265 -o output_h265.mp4 --overwrite
 
+  # Copy video as-is and only re-encode audio
+  %(prog)s input.mkv -f webm --video-codec copy --audio-codec libopus
+
   # Use Intel VAAPI hardware encoding for VP9 (WebM) with fast preset
   %(prog)s input.mp4 -f webm --video-codec vp9_vaapi --audio-codec libopus --vaapi-device /dev/dri/renderD129 --preset fast
 
@@ -499,6 +3354,40 @@ Examples:
   # Just copy streams without format change
   %(prog)s input.avi -o output_copy.avi
 
+  # Stream progress telemetry as JSON lines for a job scheduler
+  %(prog)s input.mkv -f mp4 --video-codec libx264 --progress-json progress.jsonl
+
+  # Produce a 1080p/720p/480p ladder with a single decode, AAC audio shared by all outputs
+  %(prog)s master.mov -f mp4 --audio-codec aac --rendition 1920x1080:libx264:slow \\
+      --rendition 1280x720:libx264:medium --rendition 854x480:libx264:fast
+
+  # Encode a long master to H.264 in parallel segments on all cores
+  %(prog)s master.mov -f mkv --video-codec libx264 --split-encode
+
+  # Same on a preemptible node: rerun the command after an interruption to resume
+  %(prog)s master.mov -f mkv --video-codec libx264 --resumable
+
+  # Stream fragmented MP4 with 2 second fragments to a packager reading stdin
+  %(prog)s input.mkv -f mp4 --video-codec libx264 --stream - --fragment-duration 2 | packager
+
+  # Stream MPEG-TS to a consumer listening on a local TCP port
+  %(prog)s input.mkv -f ts --stream tcp://127.0.0.1:9000
+
+  # Find the bottleneck element of a slow encode
+  %(prog)s input.mkv -f mp4 --video-codec libx264 --resolution 1280x720 --profile --profile-report profile.json
+
+  # Cut a clip without re-encoding, starting at the keyframe before 1:30
+  %(prog)s master.mp4 -o clip.mp4 --start 1:30 --end 2:15
+
+  # Re-ingests of the same content with the same settings reuse the cached output
+  %(prog)s input.mkv -f mp4 --video-codec libx264 --output-cache
+
+  # Probe every video file below a directory and print the result as JSON
+  %(prog)s /media/library --info --json
+
+  # Force the gst-launch-1.0 subprocess backend instead of the in-process engine
+  %(prog)s input.mp4 -f mkv --backend launch
+
 Supported formats:
   mp4, mkv, webm, avi, mov, ogv, ogg, flv, ts, 3gp
 
@@ -512,13 +3401,23 @@ Note:
   - Output format is determined by: -o extension, -f flag, or input extension
   - VAAPI encoders require --vaapi-device (check available devices: ls /dev/dri/)
   - Codec compatibility depends on the target container format
+  - Copied streams are demuxed and parsed only (parsebin), never decoded
+  - A stream already encoded with the requested codec is copied instead (unless scaled), and a copied
+    stream the output container does not accept is re-encoded with its default codec; see --force-encode
+  - --resumable keeps its checkpoint in .<output name>.checkpoint next to the output until the job succeeds
+  - --start/--end index the keyframes of the input once into .<input name>.keyframes.json next to it (or the
+    cache directory) and reuse the index for later cuts; copied video starts at the keyframe before --start
+  - Generic codec names (h264, hevc, vp9, av1, ...) pick the fastest encoder installed, hardware first;
+    the list of installed elements is cached and refreshed when the GStreamer registry changes
   - Requires gst-launch-1.0 and gst-discoverer-1.0 (part of GStreamer)
+  - The in-process backend additionally requires the GStreamer Python bindings (PyGObject)
         """
     )
 
     parser.add_argument(
         'input',
-        help='Input video file'
+        nargs='?',
+        help='Input video file (or directory with --info)'
     )
 
     parser.add_argument(
@@ -541,17 +3440,31 @@ Note:
     parser.add_argument(
         '--info',
         action='store_true',
-        help='Show input file information and exit (does not perform remuxing)'
+        help='Show input file information and exit (does not perform remuxing). '
+             'If the input is a directory, all video files below it are probed.'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='With --info, print the information as JSON'
+    )
+
+    parser.add_argument(
+        '--probe-jobs',
+        type=int,
+        default=8,
+        help='With --info on a directory, maximum number of files probed concurrently (default: 8)'
     )
 
     parser.add_argument(
         '--video-codec',
-        help='Video codec to use (e.g., libx264, libx265, libvpx-vp9). If not specified, video stream is copied without re-encoding.'
+        help='Video codec to use (e.g., libx264, libx265, libvpx-vp9). If not specified or "copy", video stream is copied without re-encoding.'
     )
 
     parser.add_argument(
         '--audio-codec',
-        help='Audio codec to use (e.g., aac, libopus, libvorbis). If not specified, audio stream is copied without re-encoding.'
+        help='Audio codec to use (e.g., aac, libopus, libvorbis). If not specified or "copy", audio stream is copied without re-encoding.'
     )
 
     parser.add_argument(
@@ -577,34 +3490,261 @@ Note:
         help='Output resolution in WIDTHxHEIGHT format (e.g., 1920x1080, 1280x720). If not specified, keeps original resolution.'
     )
 
+    parser.add_argument(
+        '--threads',
+        type=int,
+        help='Number of threads software encoders may use (x264, x265, vp8, vp9). If not specified, encoders pick their own.'
+    )
+
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Number of jobs sharing this machine; encoder threads get an equal share of the cores (default: 1)'
+    )
+
+    parser.add_argument(
+        '--no-auto-tune',
+        action='store_true',
+        help='Use default queue limits instead of sizing them from the input resolution and framerate'
+    )
+
+    parser.add_argument(
+        '--probe-cache',
+        help='Path of the persistent probe cache (default: $XDG_CACHE_HOME/gstreamer-toolkit/probe-cache.sqlite)'
+    )
+
+    parser.add_argument(
+        '--no-probe-cache',
+        action='store_true',
+        help='Always probe the input with gst-discoverer-1.0, do not use the probe cache'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Run the pipeline through gst-launch-1.0 with the GStreamer tracers (latency, proctime, queuelevel, '
+             'rusage, stats) and print a per-element report: buffers/s, processing time, latency, queue fill and '
+             'thread CPU load. proctime and queuelevel come from GstShark, without it processing times and '
+             'queue fill are left out'
+    )
+
+    parser.add_argument(
+        '--profile-report',
+        metavar='FILE',
+        help='With --profile, also write the report as JSON to FILE; its "folded" list can be fed to flamegraph tools'
+    )
+
+    parser.add_argument(
+        '--output-cache',
+        nargs='?',
+        const='',
+        metavar='DIR',
+        help='Reuse the output of an identical earlier job (same input content and settings) from the '
+             'content-addressed output cache, and store new outputs in it '
+             '(default DIR: $XDG_CACHE_HOME/gstreamer-toolkit/output-cache)'
+    )
+
+    parser.add_argument(
+        '--output-cache-size',
+        type=float,
+        default=20.0,
+        help='With --output-cache, maximum cache size in GB; least recently used outputs are evicted (default: 20)'
+    )
+
+    parser.add_argument(
+        '--rendition',
+        action='append',
+        metavar='SPEC',
+        help='Add an ABR ladder rendition RESOLUTION:CODEC[:PRESET[:OUTPUT]] (repeatable). '
+             'All renditions are produced from a single decode of the input.'
+    )
+
+    parser.add_argument(
+        '--progress-json',
+        metavar='FILE',
+        help='Write progress telemetry (position, fps, bitrate, realtime factor, ETA) as JSON lines to FILE, "-" for stdout'
+    )
+
+    parser.add_argument(
+        '--split-encode',
+        action='store_true',
+        help='Re-encode the video in keyframe-aligned segments on a process pool and join them losslessly (requires --video-codec)'
+    )
+
+    parser.add_argument(
+        '--segment-jobs',
+        type=int,
+        help='With --split-encode, number of segments encoded concurrently (default: number of CPU cores)'
+    )
+
+    parser.add_argument(
+        '--segment-duration',
+        type=float,
+        help='With --split-encode, minimum segment length in seconds (default: derived from the input duration)'
+    )
+
+    parser.add_argument(
+        '--stream',
+        metavar='TARGET',
+        help='Stream the output while it is produced instead of writing the output file: "-" for stdout, '
+             'tcp://HOST:PORT to connect to a listening consumer, or the path of a named pipe '
+             '(formats: mp4 and mov as fragmented MP4, mkv, webm, flv, ts)'
+    )
+
+    parser.add_argument(
+        '--fragment-duration',
+        type=float,
+        default=1.0,
+        help='With --stream, fragment duration in seconds; re-encoded video gets a keyframe per fragment (default: 1.0)'
+    )
+
+    parser.add_argument(
+        '--force-encode',
+        action='store_true',
+        help='Re-encode with the requested codecs even if the source streams already use them, and never '
+             'pick an encoder for copied streams the output container does not accept'
+    )
+
+    parser.add_argument(
+        '--resumable',
+        action='store_true',
+        help='Like --split-encode, but commit every encoded segment to a checkpoint next to the output; '
+             'running the same command again after an interruption resumes with the next segment'
+    )
+
+    parser.add_argument(
+        '--start',
+        type=parse_timestamp,
+        help='Start of the range to cut, in seconds or [HH:]MM:SS[.fff]; copied video starts at the '
+             'previous keyframe (requires the gst backend)'
+    )
+
+    parser.add_argument(
+        '--end',
+        type=parse_timestamp,
+        help='End of the range to cut, in seconds or [HH:]MM:SS[.fff] (requires the gst backend)'
+    )
+
+    parser.add_argument(
+        '--no-encoder-selection',
+        action='store_true',
+        help='Do not consult the cached GStreamer capability registry; use the static codec to element mapping'
+    )
+
+    parser.add_argument(
+        '--list-encoders',
+        action='store_true',
+        help='List the available encoder implementations of each codec (fastest first) and exit'
+    )
+
+    parser.add_argument(
+        '--backend',
+        choices=VideoRemuxer.BACKENDS,
+        default='auto',
+        help='Pipeline backend (default: auto). gst = run in-process via the GStreamer Python bindings, '
+             'launch = spawn gst-launch-1.0, auto = gst if the bindings are available, otherwise launch.'
+    )
+
     args = parser.parse_args()
 
+    if not args.input and not args.list_encoders:
+        parser.error('the following arguments are required: input')
+    if (args.profile or args.profile_report) and (args.rendition or args.split_encode or args.resumable):
+        parser.error('--profile cannot be combined with --rendition, --split-encode or --resumable')
+    if args.stream and (args.rendition or args.split_encode or args.resumable):
+        parser.error('--stream cannot be combined with --rendition, --split-encode or --resumable')
+    if (args.start is not None or args.end is not None) and \
+            (args.rendition or args.split_encode or args.resumable or args.profile or args.profile_report):
+        parser.error('--start/--end cannot be combined with --rendition, --split-encode, --resumable or --profile')
+    if args.stream == '-' and args.progress_json == '-':
+        parser.error('--stream - and --progress-json - both need stdout')
+    if args.fragment_duration <= 0:
+        parser.error('--fragment-duration must be positive')
+
     try:
-        remuxer = VideoRemuxer(args.input, output_file=args.output, output_format=args.output_format,
-                              video_codec=args.video_codec, audio_codec=args.audio_codec,
-                              vaapi_device=args.vaapi_device, preset=args.preset,
-                              resolution=args.resolution)
+        probe_cache = None if args.no_probe_cache else ProbeCache(args.probe_cache)
+        capabilities = None if args.no_encoder_selection else CapabilityRegistry(backend=args.backend)
+        output_cache = None
+        if args.output_cache is not None:
+            output_cache = OutputCache(args.output_cache or None, max_size=int(args.output_cache_size * 1024 ** 3))
+
+        if args.list_encoders:
+            if not capabilities or not capabilities.available:
+                print("Error: Could not scan the GStreamer registry", file=sys.stderr)
+                sys.exit(1)
+            for family, implementations in VideoRemuxer.ENCODER_IMPLEMENTATIONS.items():
+                available = [name for name in implementations if capabilities.has(name)]
+                print(f"{family}: {', '.join(available) if available else '(none)'}")
+            sys.exit(0)
+
+        # Probe a whole directory tree if requested
+        if args.info and Path(args.input).is_dir():
+            files = find_media_files(Path(args.input))
+            infos = probe_files(files, jobs=args.probe_jobs, probe_cache=probe_cache, backend=args.backend)
+            if args.json:
+                print(json.dumps({str(path): info for path, info in infos.items()}, indent=2))
+            else:
+                for path, info in infos.items():
+                    print(f"{path}:")
+                    print_video_info(info)
+                    print()
+            sys.exit(0 if all(infos.values()) else 1)
+
+        options = dict(output_file=args.output, output_format=args.output_format,
+                       video_codec=args.video_codec, audio_codec=args.audio_codec,
+                       vaapi_device=args.vaapi_device, preset=args.preset,
+                       resolution=args.resolution, backend=args.backend,
+                       threads=args.threads, probe_cache=probe_cache,
+                       capabilities=capabilities, auto_copy=not args.force_encode,
+                       stream=args.stream, fragment_duration=args.fragment_duration,
+                       output_cache=output_cache, auto_tune=not args.no_auto_tune,
+                       concurrency=args.concurrency, start=args.start, end=args.end)
 
         # Show video info if requested
         if args.info:
-            print("Input file information:")
-            info = remuxer.get_video_info()
-            if info:
-                if 'duration' in info:
-                    print(f"  Duration: {info['duration']:.2f} seconds")
-                print(f"  Streams: {len(info.get('streams', []))}")
-                for i, stream in enumerate(info.get('streams', [])):
-                    codec_type = stream.get('codec_type', 'unknown')
-                    codec_name = stream.get('codec_name', 'unknown')
-                    print(f"    Stream {i}: {codec_type} ({codec_name})")
-            print()
+            info = VideoRemuxer(args.input, **options).get_video_info()
+            if args.json:
+                print(json.dumps(info, indent=2))
+            else:
+                print("Input file information:")
+                print_video_info(info)
+                print()
             sys.exit(0)  # Exit after showing info, don't perform remux
 
-        # Perform remuxing
-        success = remuxer.remux(verbose=args.verbose, overwrite=args.overwrite)
-        sys.exit(0 if success else 1)
-
-    except FileNotFoundError as e:
+        if args.rendition:
+            mode = 'ladder'
+        elif args.resumable:
+            mode = 'resumable'
+        elif args.split_encode:
+            mode = 'segmented'
+        else:
+            mode = 'remux'
+
+        events = None
+        if args.progress_json:
+            events = sys.stdout if args.progress_json == '-' else open(args.progress_json, 'a')
+
+        # Perform remuxing, printing messages and progress as they come. When stdout carries
+        # the progress events, the terminal progress line is left out
+        job = RemuxJob(args.input, mode=mode, overwrite=args.overwrite, verbose=args.verbose,
+                       capture_output=False, show_progress=args.progress_json != '-', progress_events=events,
+                       segment_jobs=args.segment_jobs, segment_duration=args.segment_duration,
+                       renditions=args.rendition, profile=args.profile or bool(args.profile_report), **options)
+        if args.stream == '-' or args.progress_json == '-':
+            # stdout carries the media stream or the progress events, print messages to stderr
+            with contextlib.redirect_stdout(sys.stderr):
+                result = job.run()
+        else:
+            result = job.run()
+        if events and events is not sys.stdout:
+            events.close()
+        if args.profile_report and result.profile:
+            with open(args.profile_report, 'w') as f:
+                json.dump(result.profile, f, indent=2)
+        sys.exit(0 if result.success else 1)
+
+    except (FileNotFoundError, ValueError) as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
     except KeyboardInterrupt:
@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Video Remuxing Service
+Long-running job service built around VideoRemuxer.
+Accepts jobs over localhost HTTP or a Unix socket, keeps the queue in SQLite so that no
+job is lost across restarts, and runs jobs on warm worker processes with admission
+control based on the CPU load. The same script submits, lists and cancels jobs.
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from video_remux_batch import output_path_for
+from video_remux_gstlaunch import (CapabilityRegistry, GstEngine, OutputCache, ProbeCache, VideoRemuxer,
+                                   default_cache_dir, parse_timestamp)
+
+
+# Job fields accepted on submission, passed to VideoRemuxer
+JOB_FIELDS = ('input', 'output', 'output_format', 'video_codec', 'audio_codec', 'vaapi_device',
+              'preset', 'resolution', 'overwrite', 'force_encode', 'start', 'end')
+
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+
+
+class JobStore:
+    """SQLite backed job queue shared by the HTTP threads and the scheduler."""
+
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        with self._lock:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT, status TEXT, spec TEXT,'
+                ' created REAL, started REAL, finished REAL, progress TEXT, result TEXT, error TEXT)'
+            )
+            # Jobs that were running when the service stopped start over
+            self._db.execute("UPDATE jobs SET status = 'queued', started = NULL, progress = NULL "
+                             "WHERE status = 'running'")
+            self._db.commit()
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(row)
+        for key in ('spec', 'progress', 'result'):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def add(self, spec: dict) -> int:
+        with self._lock:
+            cursor = self._db.execute("INSERT INTO jobs (status, spec, created) VALUES ('queued', ?, ?)",
+                                      (json.dumps(spec), time.time()))
+            self._db.commit()
+            return cursor.lastrowid
+
+    def get(self, job_id: int) -> dict:
+        with self._lock:
+            row = self._db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: str = None, limit: int = 100) -> list:
+        query = 'SELECT * FROM jobs'
+        params = ()
+        if status:
+            query += ' WHERE status = ?'
+            params = (status,)
+        query += ' ORDER BY id DESC LIMIT ?'
+        with self._lock:
+            rows = self._db.execute(query, params + (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def next_queued(self) -> dict:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+        return self._to_dict(row) if row else None
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {state: 0 for state in JOB_STATES} | {row[0]: row[1] for row in rows}
+
+    def update(self, job_id: int, **fields):
+        for key in ('progress', 'result'):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        assignments = ', '.join(f'{key} = ?' for key in fields)
+        with self._lock:
+            self._db.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+            self._db.commit()
+
+    def cancel_queued(self, job_id: int) -> bool:
+        """Cancel a job that has not started yet."""
+        with self._lock:
+            cursor = self._db.execute("UPDATE jobs SET status = 'cancelled', finished = ? "
+                                      "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            self._db.commit()
+            return cursor.rowcount == 1
+
+
+class _EventWriter:
+    """File-like object forwarding VideoRemuxer progress events to the scheduler."""
+
+    def __init__(self, conn, job_id: int):
+        self.conn = conn
+        self.job_id = job_id
+
+    def write(self, data: str):
+        for line in data.splitlines():
+            if line.strip():
+                self.conn.send(('event', self.job_id, json.loads(line)))
+
+    def flush(self):
+        pass
+
+
+def worker_main(conn, options: dict):
+    """
+    Worker process loop.
+
+    GStreamer, the probe cache and the capability registry are set up once when the
+    worker starts, so jobs do not pay the start-up cost. The worker leads its own process
+    group so that cancelling a job also stops the gst-launch-1.0 children it spawned.
+    """
+    os.setpgrp()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if options['backend'] != 'launch':
+        GstEngine.available()
+    probe_cache = ProbeCache(options['probe_cache']) if options['probe_cache'] is not False else None
+    capabilities = CapabilityRegistry(backend=options['backend'])
+    output_cache = None
+    if options['output_cache'] is not None:
+        output_cache = OutputCache(options['output_cache'] or None, max_size=options['output_cache_size'])
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        job_id, spec = message
+
+        log = io.StringIO()
+        start_time = time.time()
+        result = {'success': False, 'elapsed': 0.0, 'output': None, 'output_size': 0}
+        error = None
+        try:
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                remuxer = VideoRemuxer(spec['input'], output_file=spec.get('output'),
+                                       output_format=spec.get('output_format'),
+                                       video_codec=spec.get('video_codec'), audio_codec=spec.get('audio_codec'),
+                                       vaapi_device=spec.get('vaapi_device'), preset=spec.get('preset', 'medium'),
+                                       resolution=spec.get('resolution'), backend=options['backend'],
+                                       threads=options['threads'], probe_cache=probe_cache,
+                                       capabilities=capabilities, auto_copy=not spec.get('force_encode'),
+                                       output_cache=output_cache, concurrency=options['concurrency'],
+                                       start=spec.get('start'), end=spec.get('end'))
+                result['output'] = str(remuxer.output_file)
+                result['success'] = remuxer.remux(overwrite=spec.get('overwrite', False),
+                                                  progress_events=_EventWriter(conn, job_id),
+                                                  show_progress=False)
+            if result['success']:
+                result['output_size'] = remuxer.output_file.stat().st_size
+            else:
+                error = log.getvalue().strip()[-4000:] or 'remux failed'
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}\n{log.getvalue()[-4000:]}".strip()
+        result['elapsed'] = time.time() - start_time
+        conn.send(('result', job_id, result, error))
+
+
+class Worker:
+    """A warm worker process and the job it is running."""
+
+    def __init__(self, options: dict):
+        # Spawn, not fork: the service process has already started GStreamer (capability
+        # scan) and a forked worker would inherit its GLib threads' locks mid-use
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, options), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job_id = None
+
+    def submit(self, job_id: int, spec: dict):
+        self.job_id = job_id
+        self.conn.send((job_id, spec))
+
+    def kill(self):
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(self.process.pid, signal.SIGTERM)
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def stop(self):
+        with contextlib.suppress(OSError):
+            self.conn.send(None)
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+
+
+class Scheduler:
+    """Dispatches queued jobs to idle workers while the CPU load allows it."""
+
+    def __init__(self, store: JobStore, workers: int, options: dict, max_load: float):
+        self.store = store
+        self.options = options
+        self.max_load = max_load
+        self.workers = [Worker(options) for _ in range(workers)]
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def load_allows_start(self) -> bool:
+        """Admission control: start a job only while the load per core stays below max_load."""
+        if not any(worker.job_id for worker in self.workers):
+            # Never starve the queue completely
+            return True
+        return os.getloadavg()[0] / (os.cpu_count() or 1) < self.max_load
+
+    def status(self) -> dict:
+        with self._lock:
+            running = [worker.job_id for worker in self.workers if worker.job_id]
+        return {
+            'workers': len(self.workers),
+            'running': running,
+            'load': os.getloadavg()[0],
+            'cpu_count': os.cpu_count(),
+            'max_load': self.max_load,
+            'jobs': self.store.counts(),
+        }
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job."""
+        # Under the lock the scheduler neither dispatches the job nor records its result meanwhile
+        with self._lock:
+            if self.store.cancel_queued(job_id):
+                return True
+            for i, worker in enumerate(self.workers):
+                if worker.job_id != job_id:
+                    continue
+                # The worker may have sent the result of the job already
+                with contextlib.suppress(EOFError, OSError):
+                    while worker.conn.poll():
+                        self._handle(worker, worker.conn.recv())
+                if worker.job_id == job_id and self.store.get(job_id)['status'] == 'running':
+                    worker.kill()
+                    self.workers[i] = Worker(self.options)
+                    self.store.update(job_id, status='cancelled', finished=time.time())
+                    return True
+        return False
+
+    def _handle(self, worker: Worker, message: tuple):
+        if message[0] == 'event':
+            _, job_id, event = message
+            self.store.update(job_id, progress=event)
+        elif message[0] == 'result':
+            _, job_id, result, error = message
+            self.store.update(job_id, status='done' if result['success'] else 'failed',
+                              finished=time.time(), result=result, error=error)
+            worker.job_id = None
+
+    def run(self):
+        while not self._stopping.is_set():
+            with self._lock:
+                for i, worker in enumerate(self.workers):
+                    try:
+                        while worker.conn.poll():
+                            self._handle(worker, worker.conn.recv())
+                    except (EOFError, OSError):
+                        # The worker died (e.g. OOM kill), fail its job and replace it
+                        if worker.job_id:
+                            self.store.update(worker.job_id, status='failed', finished=time.time(),
+                                              error='worker process died')
+                        self.workers[i] = Worker(self.options)
+
+                for worker in self.workers:
+                    if worker.job_id or not self.load_allows_start():
+                        continue
+                    job = self.store.next_queued()
+                    if not job:
+                        break
+                    self.store.update(job['id'], status='running', started=time.time())
+                    worker.submit(job['id'], job['spec'])
+            time.sleep(0.2)
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            for worker in self.workers:
+                # Running jobs are re-queued on the next start
+                if worker.job_id:
+                    worker.kill()
+                else:
+                    worker.stop()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API:
+      POST /jobs               submit a job, body: {"input": ..., "output_format": ..., ...}
+      GET  /jobs[?status=S]    list jobs
+      GET  /jobs/<id>          job status, progress and result
+      POST /jobs/<id>/cancel   cancel a queued or running job
+      GET  /status             service status
+    """
+
+    store = None
+    scheduler = None
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_id(self):
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if len(parts) >= 2 and parts[0] == 'jobs' and parts[1].isdigit():
+            return int(parts[1]), parts[2:]
+        return None, parts
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path.rstrip('/') == '/status':
+            self._send(200, self.scheduler.status())
+        elif path.rstrip('/') == '/jobs':
+            params = dict(p.split('=', 1) for p in query.split('&') if '=' in p)
+            limit = params.get('limit', '100')
+            if not limit.isdigit() or int(limit) < 1:
+                self._send(400, {'error': 'limit must be a positive integer'})
+                return
+            self._send(200, self.store.list(status=params.get('status'), limit=int(limit)))
+        else:
+            job_id, rest = self._job_id()
+            job = self.store.get(job_id) if job_id is not None and not rest else None
+            if job:
+                self._send(200, job)
+            else:
+                self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        job_id, rest = self._job_id()
+        if job_id is not None and rest == ['cancel']:
+            if not self.store.get(job_id):
+                self._send(404, {'error': 'not found'})
+            elif self.scheduler.cancel(job_id):
+                self._send(200, self.store.get(job_id))
+            else:
+                self._send(409, {'error': 'job already finished'})
+            return
+
+        if self.path.rstrip('/') != '/jobs':
+            self._send(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            spec = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'error': 'invalid JSON'})
+            return
+        unknown = set(spec) - set(JOB_FIELDS)
+        if unknown:
+            self._send(400, {'error': f"unknown fields: {', '.join(sorted(unknown))}"})
+            return
+        if not spec.get('input'):
+            self._send(400, {'error': 'input is required'})
+            return
+        spec['input'] = str(Path(spec['input']).resolve())
+        if not Path(spec['input']).is_file():
+            self._send(400, {'error': f"input file not found: {spec['input']}"})
+            return
+        if spec.get('preset', 'medium') not in ('fast', 'medium', 'slow'):
+            self._send(400, {'error': 'preset must be fast, medium or slow'})
+            return
+        if any(not isinstance(spec.get(key, 0), (int, float)) for key in ('start', 'end')):
+            self._send(400, {'error': 'start and end must be numbers of seconds'})
+            return
+        if spec.get('output') and not Path(spec['output']).is_absolute():
+            self._send(400, {'error': 'output must be an absolute path'})
+            return
+        if not spec.get('output'):
+            # Next to the input, the working directory of the service means nothing to clients
+            input_path = Path(spec['input'])
+            spec['output'] = str(output_path_for(input_path, Path(input_path.name), input_path.parent,
+                                                 spec.get('output_format')))
+
+        self._send(201, {'id': self.store.add(spec)})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP client connection over a Unix socket."""
+
+    def __init__(self, path: str):
+        super().__init__('localhost')
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def serve(args):
+    state_dir = Path(args.state_dir)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    store = JobStore(state_dir / 'jobs.sqlite')
+
+    workers = args.workers or max(1, (os.cpu_count() or 1) // 2)
+    options = {
+        'backend': args.backend,
+        'threads': args.threads_per_job or max(1, (os.cpu_count() or 1) // workers),
+        'concurrency': workers,
+        'probe_cache': False if args.no_probe_cache else None,
+        'output_cache': args.output_cache,
+        'output_cache_size': int(args.output_cache_size * 1024 ** 3),
+    }
+    # Scan the registry once, the workers then only load the cached result
+    CapabilityRegistry(backend=args.backend)
+
+    scheduler = Scheduler(store, workers, options, args.max_load)
+    RequestHandler.store = store
+    RequestHandler.scheduler = scheduler
+
+    if args.socket:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(args.socket)
+        server = UnixHTTPServer(args.socket, RequestHandler)
+        where = args.socket
+    else:
+        host, _, port = args.listen.rpartition(':')
+        server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), RequestHandler)
+        where = f'http://{args.listen}'
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving on {where} with {workers} workers ({options['threads']} encoder threads per job)")
+
+    def on_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        print("\nStopping, running jobs will be resumed on the next start", file=sys.stderr)
+    finally:
+        server.shutdown()
+        scheduler.stop()
+        if args.socket:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(args.socket)
+
+
+def request(args, method: str, path: str, body: dict = None):
+    """Send an API request to a running service and return (status, response)."""
+    if args.socket:
+        conn = UnixHTTPConnection(args.socket)
+    else:
+        host, _, port = args.listen.rpartition(':')
+        conn = http.client.HTTPConnection(host or '127.0.0.1', int(port))
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b'null')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Local remux job service with a persistent queue and warm workers',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Start the service on localhost:8765 with 4 workers
+  %(prog)s serve --workers 4
+
+  # Submit jobs and follow them
+  %(prog)s submit input.mkv -f mp4 --video-codec h264
+  %(prog)s status 1
+  %(prog)s list --status running
+  %(prog)s cancel 1
+
+  # Use a Unix socket instead of TCP
+  %(prog)s --socket /run/user/1000/remux.sock serve
+
+  # Submit over HTTP directly
+  curl -X POST localhost:8765/jobs -d '{"input": "/media/in.mkv", "output_format": "mp4"}'
+
+Note:
+  - The queue is stored in STATE_DIR/jobs.sqlite; jobs interrupted by a restart run again
+  - A new job is only started while the 1 minute load average per core is below --max-load
+        """
+    )
+    parser.add_argument('--listen', default='127.0.0.1:8765', help='HOST:PORT to listen on / connect to')
+    parser.add_argument('--socket', help='Unix socket path to listen on / connect to instead of TCP')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Run the service')
+    serve_parser.add_argument('--state-dir', default=str(default_cache_dir() / 'remux-service'),
+                              help='Directory holding the job database')
+    serve_parser.add_argument('--workers', type=int, help='Number of worker processes (default: CPU cores / 2)')
+    serve_parser.add_argument('--threads-per-job', type=int,
+                              help='Encoder thread budget of each job (default: CPU cores / workers)')
+    serve_parser.add_argument('--max-load', type=float, default=1.0,
+                              help='Do not start jobs while the load average per core is above this (default: 1.0)')
+    serve_parser.add_argument('--backend', choices=VideoRemuxer.BACKENDS, default='auto',
+                              help='Pipeline backend (default: auto)')
+    serve_parser.add_argument('--output-cache', nargs='?', const='', metavar='DIR',
+                              help='Serve resubmitted identical jobs from the content-addressed output cache '
+                                   '(default DIR: shared user cache)')
+    serve_parser.add_argument('--output-cache-size', type=float, default=20.0,
+                              help='Maximum output cache size in GB (default: 20)')
+    serve_parser.add_argument('--no-probe-cache', action='store_true', help='Do not use the probe cache')
+
+    submit_parser = subparsers.add_parser('submit', help='Submit a job')
+    submit_parser.add_argument('input', help='Input video file')
+    submit_parser.add_argument('-o', '--output', help='Output file path')
+    submit_parser.add_argument('-f', '--format', dest='output_format', help='Output container format')
+    submit_parser.add_argument('--video-codec', help='Video codec, "copy" or unset to copy')
+    submit_parser.add_argument('--audio-codec', help='Audio codec, "copy" or unset to copy')
+    submit_parser.add_argument('--vaapi-device', help='VAAPI device path')
+    submit_parser.add_argument('--preset', choices=['fast', 'medium', 'slow'], default='medium')
+    submit_parser.add_argument('--resolution', help='Output resolution in WIDTHxHEIGHT format')
+    submit_parser.add_argument('--force-encode', action='store_true',
+                               help='Re-encode even if the source streams already use the requested codecs')
+    submit_parser.add_argument('--start', type=parse_timestamp,
+                               help='Start of the range to cut, in seconds or [HH:]MM:SS[.fff]')
+    submit_parser.add_argument('--end', type=parse_timestamp,
+                               help='End of the range to cut, in seconds or [HH:]MM:SS[.fff]')
+    submit_parser.add_argument('--overwrite', action='store_true', help='Overwrite the output file if it exists')
+
+    status_parser = subparsers.add_parser('status', help='Show the service status or the status of a job')
+    status_parser.add_argument('job', nargs='?', type=int, help='Job id')
+
+    list_parser = subparsers.add_parser('list', help='List jobs')
+    list_parser.add_argument('--status', choices=JOB_STATES, help='Only list jobs in this state')
+    list_parser.add_argument('--limit', type=int, default=100, help='Maximum number of jobs (default: 100)')
+
+    cancel_parser = subparsers.add_parser('cancel', help='Cancel a queued or running job')
+    cancel_parser.add_argument('job', type=int, help='Job id')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args)
+        return
+
+    try:
+        if args.command == 'submit':
+            spec = {key: getattr(args, key) for key in JOB_FIELDS if getattr(args, key, None) is not None}
+            spec['input'] = str(Path(args.input).resolve())
+            if args.output:
+                spec['output'] = str(Path(args.output).resolve())
+            status, body = request(args, 'POST', '/jobs', spec)
+        elif args.command == 'status':
+            status, body = request(args, 'GET', f'/jobs/{args.job}' if args.job else '/status')
+        elif args.command == 'list':
+            query = f'?limit={args.limit}' + (f'&status={args.status}' if args.status else '')
+            status, body = request(args, 'GET', f'/jobs{query}')
+        else:
+            status, body = request(args, 'POST', f'/jobs/{args.job}/cancel')
+    except (ConnectionError, FileNotFoundError) as e:
+        print(f"Error: Could not reach the service: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(body, indent=2))
+    sys.exit(0 if status < 400 else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Video Thumbnail and Sprite Sheet Generator
+Builds scrub-bar sprite sheets and a WebVTT thumbnail index for many video files in parallel.
+Every thumbnail is taken with a keyframe (KEY_UNIT) seek and only that frame is decoded, so the
+cost depends on the number of thumbnails, not on the length of the video.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from video_remux_batch import collect_inputs, find_collisions, report_collisions
+from video_remux_gstlaunch import load_gst
+
+
+# Image encoder of each sprite sheet format
+IMAGE_ENCODERS = {
+    'jpg': 'jpegenc quality={quality}',
+    'png': 'pngenc',
+}
+
+# Preroll and seek timeout in seconds
+STATE_TIMEOUT = 30
+
+
+def _stride(width: int) -> int:
+    """Row stride of packed RGB video frames, rows are 4-byte aligned in GStreamer."""
+    return (width * 3 + 3) // 4 * 4
+
+
+def _wait_preroll(Gst, pipeline) -> str:
+    """Wait until the pipeline is prerolled, returns an error message or None."""
+    result = pipeline.get_state(STATE_TIMEOUT * Gst.SECOND)[0]
+    if result == Gst.StateChangeReturn.SUCCESS:
+        return None
+    msg = pipeline.get_bus().pop_filtered(Gst.MessageType.ERROR)
+    if msg:
+        err, _ = msg.parse_error()
+        return err.message
+    return 'timed out' if result == Gst.StateChangeReturn.ASYNC else 'state change failed'
+
+
+def grab_thumbnails(input_file: Path, count: int = None, interval: float = None, width: int = 160) -> tuple:
+    """
+    Decode `count` evenly spaced frames of the input, or one frame every `interval` seconds.
+
+    The pipeline is prerolled once, then every position is reached with a flushing
+    KEY_UNIT seek: the demuxer jumps to the keyframe before it and the decoder only
+    decodes that frame for the new preroll, which appsink hands out scaled to `width`.
+
+    Returns:
+        Tuple (frames, frame_width, frame_height, duration, interval); frames are the packed
+        RGB bytes of each thumbnail and thumbnail i covers [i * interval, (i + 1) * interval)
+    """
+    Gst, _ = load_gst()
+    pipeline = Gst.parse_launch(
+        f'uridecodebin uri="{input_file.resolve().as_uri()}" caps="video/x-raw(ANY)" expose-all-streams=false ! '
+        f'videoconvert ! videoscale ! video/x-raw,format=RGB,width={width},pixel-aspect-ratio=1/1 ! '
+        f'appsink name=sink sync=false max-buffers=1'
+    )
+    sink = pipeline.get_by_name('sink')
+    try:
+        pipeline.set_state(Gst.State.PAUSED)
+        error = _wait_preroll(Gst, pipeline)
+        if error:
+            raise RuntimeError(f"Could not open {input_file}: {error}")
+
+        have_duration, duration = pipeline.query_duration(Gst.Format.TIME)
+        if not have_duration or duration <= 0:
+            raise RuntimeError(f"Could not get the duration of {input_file}")
+        duration /= Gst.SECOND
+        if interval:
+            count = max(1, math.ceil(duration / interval))
+        interval = duration / count
+
+        frames = []
+        frame_width = frame_height = None
+        for i in range(count):
+            # Aim at the middle of the range the thumbnail stands for
+            position = int((i + 0.5) * interval * Gst.SECOND)
+            if not pipeline.seek_simple(Gst.Format.TIME, Gst.SeekFlags.FLUSH | Gst.SeekFlags.KEY_UNIT, position):
+                raise RuntimeError(f"{input_file} is not seekable")
+            error = _wait_preroll(Gst, pipeline)
+            if error:
+                raise RuntimeError(f"Seek in {input_file} failed: {error}")
+            sample = sink.emit('try-pull-preroll', STATE_TIMEOUT * Gst.SECOND)
+            if sample is None:
+                raise RuntimeError(f"No frame at {position / Gst.SECOND:.2f}s in {input_file}")
+            if frame_width is None:
+                structure = sample.get_caps().get_structure(0)
+                frame_width = structure.get_value('width')
+                frame_height = structure.get_value('height')
+            buffer = sample.get_buffer()
+            frames.append(buffer.extract_dup(0, buffer.get_size()))
+    finally:
+        pipeline.set_state(Gst.State.NULL)
+
+    return frames, frame_width, frame_height, duration, interval
+
+
+def compose_sheet(frames: list, frame_width: int, frame_height: int, columns: int) -> tuple:
+    """
+    Lay the thumbnails out row by row on one RGB image.
+
+    Returns:
+        Tuple (data, width, height) of the packed RGB sheet
+    """
+    rows = math.ceil(len(frames) / columns)
+    sheet_width = frame_width * min(columns, len(frames))
+    sheet_height = frame_height * rows
+    sheet_stride = _stride(sheet_width)
+    frame_stride = _stride(frame_width)
+    row_bytes = frame_width * 3
+
+    sheet = bytearray(sheet_stride * sheet_height)
+    for i, frame in enumerate(frames):
+        x = (i % columns) * row_bytes
+        y = (i // columns) * frame_height
+        for line in range(frame_height):
+            target = (y + line) * sheet_stride + x
+            source = line * frame_stride
+            sheet[target:target + row_bytes] = frame[source:source + row_bytes]
+    return bytes(sheet), sheet_width, sheet_height
+
+
+def write_image(path: Path, data: bytes, width: int, height: int, image_format: str, quality: int):
+    """Encode a packed RGB image to JPEG or PNG with GStreamer."""
+    Gst, _ = load_gst()
+    encoder = IMAGE_ENCODERS[image_format].format(quality=quality)
+    pipeline = Gst.parse_launch(
+        f'appsrc name=src caps="video/x-raw,format=RGB,width={width},height={height},framerate=0/1" ! '
+        f'videoconvert ! {encoder} ! filesink location="{path}"'
+    )
+    src = pipeline.get_by_name('src')
+    try:
+        pipeline.set_state(Gst.State.PLAYING)
+        src.emit('push-buffer', Gst.Buffer.new_wrapped(data))
+        src.emit('end-of-stream')
+        msg = pipeline.get_bus().timed_pop_filtered(STATE_TIMEOUT * Gst.SECOND,
+                                                    Gst.MessageType.EOS | Gst.MessageType.ERROR)
+        if msg is None or msg.type == Gst.MessageType.ERROR:
+            raise RuntimeError(f"Could not write {path}: {msg.parse_error()[0].message if msg else 'timed out'}")
+    finally:
+        pipeline.set_state(Gst.State.NULL)
+
+
+def _vtt_time(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}'
+
+
+def write_vtt(path: Path, cues: list):
+    """Write the WebVTT thumbnail index, cues are (start, end, image, x, y, width, height) tuples."""
+    lines = ['WEBVTT', '']
+    for start, end, image, x, y, width, height in cues:
+        lines.append(f'{_vtt_time(start)} --> {_vtt_time(end)}')
+        lines.append(f'{image}#xywh={x},{y},{width},{height}')
+        lines.append('')
+    path.write_text('\n'.join(lines))
+
+
+def run_job(input_file: str, output_dir: str, options: dict) -> dict:
+    """Generate the sprite sheets and the WebVTT index of one file. Executed in a worker process."""
+    result = {
+        'input': input_file,
+        'vtt': None,
+        'sprites': [],
+        'thumbnails': 0,
+        'duration': 0.0,
+        'success': False,
+        'elapsed': 0.0,
+        'error': None,
+    }
+    start_time = time.time()
+    try:
+        input_path = Path(input_file)
+        output_path = Path(output_dir)
+        vtt_path = output_path / f'{input_path.stem}_thumbnails.vtt'
+        if vtt_path.exists() and not options['overwrite']:
+            raise FileExistsError(f"Output already exists: {vtt_path}")
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        frames, width, height, duration, interval = grab_thumbnails(
+            input_path, count=options['count'], interval=options['interval'], width=options['width'])
+
+        columns = options['columns']
+        per_sheet = columns * options['rows']
+        sheets = math.ceil(len(frames) / per_sheet)
+        cues = []
+        for n in range(sheets):
+            name = f'{input_path.stem}_sprite{f"_{n:03d}" if sheets > 1 else ""}.{options["format"]}'
+            sheet_frames = frames[n * per_sheet:(n + 1) * per_sheet]
+            data, sheet_width, sheet_height = compose_sheet(sheet_frames, width, height, columns)
+            write_image(output_path / name, data, sheet_width, sheet_height, options['format'], options['quality'])
+            result['sprites'].append(str(output_path / name))
+            for i in range(len(sheet_frames)):
+                index = n * per_sheet + i
+                cues.append((index * interval, min(duration, (index + 1) * interval), name,
+                             (i % columns) * width, (i // columns) * height, width, height))
+
+        write_vtt(vtt_path, cues)
+        result.update(vtt=str(vtt_path), thumbnails=len(frames), duration=duration, success=True)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['elapsed'] = time.time() - start_time
+    return result
+
+
+def _init_worker():
+    """Let the parent process handle Ctrl+C and cancel the remaining jobs."""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate scrub-bar sprite sheets and WebVTT thumbnail indexes with keyframe seeks',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # 100 thumbnails per file of a directory, 10x10 per sheet, on all cores
+  %(prog)s /media/remuxed -O thumbs
+
+  # One 240 px wide thumbnail every 5 seconds, as PNG
+  %(prog)s movie.mp4 -O thumbs --interval 5 --width 240 --format png
+
+Note:
+  - Writes <name>_sprite.jpg (<name>_sprite_NNN.jpg when several sheets are needed) and
+    <name>_thumbnails.vtt, whose cues point at the thumbnails with #xywh= fragments
+  - Thumbnails are the keyframes before the middle of the time range they stand for
+  - Requires the GStreamer Python bindings (PyGObject)
+        """
+    )
+
+    parser.add_argument('inputs', nargs='*', help='Input files, directories or glob patterns')
+    parser.add_argument('--manifest', help='File listing one input (file, directory or glob) per line')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='Scan directories recursively and let ** match subdirectories in globs')
+    parser.add_argument('-O', '--output-dir', default='.',
+                        help='Directory receiving the sprite sheets and indexes (default: current directory)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Number of files processed concurrently (default: number of CPU cores)')
+    parser.add_argument('-n', '--count', type=int, default=100, help='Thumbnails per file (default: 100)')
+    parser.add_argument('--interval', type=float,
+                        help='Take one thumbnail every INTERVAL seconds instead of a fixed count')
+    parser.add_argument('--width', type=int, default=160, help='Thumbnail width in pixels (default: 160)')
+    parser.add_argument('--columns', type=int, default=10, help='Thumbnails per sheet row (default: 10)')
+    parser.add_argument('--rows', type=int, default=10, help='Thumbnail rows per sheet (default: 10)')
+    parser.add_argument('--format', choices=sorted(IMAGE_ENCODERS), default='jpg',
+                        help='Sprite sheet image format (default: jpg)')
+    parser.add_argument('--quality', type=int, default=85, help='JPEG quality (default: 85)')
+    parser.add_argument('--overwrite', action='store_true', help='Overwrite existing outputs')
+    parser.add_argument('--report', help='Write per-file results as JSON to this file')
+
+    args = parser.parse_args()
+
+    if not args.inputs and not args.manifest:
+        parser.error('no input given, pass files, directories, globs or --manifest')
+    if args.jobs < 1 or args.count < 1 or args.width < 2 or args.columns < 1 or args.rows < 1:
+        parser.error('--jobs, --count, --columns and --rows must be at least 1, --width at least 2')
+    if args.interval is not None and args.interval <= 0:
+        parser.error('--interval must be positive')
+
+    inputs = collect_inputs(args.inputs, manifest=args.manifest, recursive=args.recursive)
+    if not inputs:
+        print("Error: No input files found", file=sys.stderr)
+        sys.exit(1)
+    output_dir = Path(args.output_dir)
+    collisions = find_collisions([(path, output_dir / rel.with_suffix('')) for path, rel in inputs])
+    if collisions:
+        report_collisions(collisions)
+        sys.exit(1)
+
+    options = {
+        'count': args.count,
+        'interval': args.interval,
+        'width': args.width,
+        'columns': args.columns,
+        'rows': args.rows,
+        'format': args.format,
+        'quality': args.quality,
+        'overwrite': args.overwrite,
+    }
+    workers = min(args.jobs, len(inputs))
+    print(f"Generating thumbnails of {len(inputs)} files with {workers} workers")
+
+    results = []
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(run_job, str(path), str(output_dir / rel.parent), options): path
+            for path, rel in inputs
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'input': str(futures[future]), 'vtt': None, 'sprites': [], 'thumbnails': 0,
+                              'duration': 0.0, 'success': False, 'elapsed': 0.0, 'error': f"Worker failed: {e}"}
+                results.append(result)
+                status = '✓' if result['success'] else '✗'
+                print(f"[{len(results)}/{len(inputs)}] {status} {result['input']} "
+                      f"({result['thumbnails']} thumbnails, {result['elapsed']:.1f}s)")
+                if not result['success']:
+                    print(f"    {result['error']}", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("\nOperation cancelled by user, waiting for running jobs...", file=sys.stderr)
+            for future in futures:
+                future.cancel()
+            sys.exit(130)
+
+    failed = sum(1 for result in results if not result['success'])
+    print()
+    print(f"Done: {len(results) - failed}/{len(results)} succeeded in {time.time() - start_time:.1f}s")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    sys.exit(0 if failed == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()